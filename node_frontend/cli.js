@@ -14,10 +14,11 @@ const OutputPanel = ({ history }) => (
             if (item.type === 'error') color = 'red';
             if (item.type === 'system') color = 'blue';
             if (item.type === 'user') color = 'green';
+            if (item.type === 'stream') color = 'cyan';
 
             return (
                 <Box key={index}>
-                    <Text color={color}>{item.data}</Text>
+                    <Text color={color}>{item.type === 'stream' ? `[${item.agent}] ${item.data}` : item.data}</Text>
                 </Box>
             );
         })}
@@ -46,6 +47,19 @@ const App = () => {
         setHistory(prev => [...prev, { type, data }]);
     };
 
+    // Appends streamed agent output to that agent's open entry, or starts a new one
+    const appendDelta = ({ agent, delta, done }) => {
+        setHistory(prev => {
+            const index = prev.findLastIndex(item => item.type === 'stream' && item.agent === agent && !item.done);
+            if (index === -1) {
+                return delta || !done ? [...prev, { type: 'stream', agent, data: delta, done }] : prev;
+            }
+            const next = prev.slice();
+            next[index] = { ...prev[index], data: prev[index].data + delta, done };
+            return next;
+        });
+    };
+
     useEffect(() => {
         const connect = async () => {
             try {
@@ -63,7 +77,9 @@ const App = () => {
                     const message = JSON.parse(data.toString());
                     const messageData = message.data;
 
-                    if (message.type === 'diff') {
+                    if (message.type === 'agent_delta') {
+                        appendDelta(messageData);
+                    } else if (message.type === 'diff') {
                         addHistory('system', `--- PROPOSED CHANGE for ${messageData.file_path} ---`);
                         addHistory('diff', messageData.diff);
                         setNotification({ title: 'Confirm', message: 'Apply this diff? (yes/no)' });
@@ -1,33 +1,31 @@
 # python_backend/agents/base_agent.py
-import openai
-import os
 from orchestrator.agent_state import AgentState
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 import json
 
-def run_agent(agent_name: str, state: AgentState, prompt_template_path: str, prompt_context: dict) -> AgentState:
+async def run_agent(agent_name: str, state: AgentState, prompt_name: str, prompt_context: dict) -> AgentState:
     """
-    A generic function to run any agent that uses a prompt template.
+    A generic function to run any agent that uses a prompt template
+    (a name from prompt_registry, e.g. "solution_architect").
     """
-    with open(prompt_template_path, "r") as f:
-        prompt_template = f.read()
+    prompt = prompt_registry.render(prompt_name, prompt_context)
 
-    prompt = prompt_template.format(**prompt_context)
-
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini", # Using the specified model
-        messages=[
-            {"role": "system", "content": "You are a world-class agentic assistant. Follow the user's instructions precisely."},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    async with state.stream_deltas(agent_name) as stream:
+        content, finish_reason = await llm_service.stream(
+            model="gpt-4.1-mini", # Using the specified model
+            messages=[
+                {"role": "system", "content": "You are a world-class agentic assistant. Follow the user's instructions precisely."},
+                {"role": "user", "content": prompt}
+            ],
+            on_delta=stream.push
+        )
     
     # Assumes the agent's output is stored in a key matching its name
     output_key = agent_name.lower()
-    state[output_key] = response.choices[0].message.content
+    state[output_key] = content
     
     # A simple confidence score placeholder
-    state.last_agent_confidence = response.choices[0].finish_reason != 'length'
+    state.last_agent_confidence = finish_reason != 'length'
     
     return state
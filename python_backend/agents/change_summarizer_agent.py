@@ -1,23 +1,25 @@
 # python_backend/agents/change_summarizer_agent.py
 from orchestrator.agent_state import AgentState
-from services.llm_service import LLMService
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 
-def run(state: AgentState, file_path: str):
+prompt_registry.expect("change_summarizer", ["code_diff"])
+
+async def run(state: AgentState):
     """
-    Analyzes a diff using the LLMService to generate a structured summary.
+    Analyzes the proposed diff using the LLMService to generate a structured summary.
     """
-    diff_text = state.last_agent_output
+    diff_text = (state.proposed_diff or {}).get("diff")
     if not diff_text:
         state.last_agent_output = {"error": "No diff found in state."}
         return state
 
-    with open("python_backend/prompts/change_summarizer.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("change_summarizer")
     
     context = {"code_diff": diff_text}
     
-    llm = LLMService()
-    summary_json = llm.execute_prompt(prompt_template, context, is_json=True)
+    async with state.stream_deltas("ChangeSummarizer") as stream:
+        summary_json = await llm_service.execute_prompt(prompt_template, context, is_json=True, on_delta=stream.push)
     
     state.change_summary = summary_json
     state.last_agent_output = summary_json
@@ -1,13 +1,13 @@
 # python_backend/agents/code_search_agent.py
 from orchestrator.agent_state import AgentState
-from utils.swe_tools import ASTParserTool, CodeRetrieverTool
-import ast
+from utils.swe_tools import get_code_retriever
+from context_engine.lexical_index import reciprocal_rank_fusion
+import linecache
 
 class CodeSearchAgent:
     def __init__(self, state: AgentState):
         self.state = state
-        self.ast_parser = ASTParserTool()
-        self.code_retriever = CodeRetrieverTool()
+        self.code_retriever = get_code_retriever()
 
     def run(self, query: str) -> list[dict]:
         """
@@ -27,47 +27,70 @@ class CodeSearchAgent:
             return self._run_semantic_search(query)
 
     def _run_ast_search(self, search_type: str, search_name: str) -> list[dict]:
-        """Performs a search on the AST of all loaded files."""
-        results = []
-        for file_path, content in self.state.loaded_files.items():
-            if not file_path.endswith('.py'):
-                continue # AST search is for Python files
-            
-            try:
-                tree = self.ast_parser.parse(content)
-                search_tool = self.state.get_ast_search_tool(file_path, tree) # Get or create tool
-                
-                found_nodes = []
-                if search_type == 'class':
-                    node = search_tool.find_class(search_name)
-                    if node: found_nodes.append(node)
-                elif search_type == 'function':
-                    node = search_tool.find_function(search_name)
-                    if node: found_nodes.append(node)
-                elif search_type == 'calls':
-                    found_nodes = search_tool.find_function_calls(search_name)
-                
-                for node in found_nodes:
-                    results.append({
-                        "type": "AST Match",
-                        "file_path": file_path,
-                        "name": search_name,
-                        "line": node.lineno,
-                        "preview": ast.get_source_segment(content, node).splitlines()[0]
-                    })
-            except Exception:
-                continue # Ignore files that fail to parse
-        return results
+        """
+        Looks a name up in the codebase index's inverted symbol index instead of
+        re-parsing and walking every loaded file. A trailing `*` makes it a
+        prefix search (`class:User*`) and a leading `~` a fuzzy one (`function:~autenticate`).
+        """
+        if search_type not in ('class', 'function', 'calls'):
+            return []
+        mode = 'exact'
+        if search_name.endswith('*'):
+            mode, search_name = 'prefix', search_name[:-1]
+        elif search_name.startswith('~'):
+            mode, search_name = 'fuzzy', search_name[1:]
+        if not search_name:
+            return []
 
-    def _run_semantic_search(self, query: str) -> list[dict]:
-        """Performs a semantic vector search."""
-        search_results = self.code_retriever.search(query)
-        # Format results for consistent output
+        matches = self.state.codebase_index.search_symbols(search_type, search_name, mode)
         return [{
-            "type": "Semantic Match",
-            "file_path": r.get("file_path", "N/A"),
-            "name": r.get("name", "N/A"),
-            "line": r.get("start_line", "N/A"),
-            "preview": r.get("content_preview", "")
-        } for r in search_results]
+            "type": "AST Match",
+            "file_path": match["file_path"],
+            "name": match["name"],
+            "line": match["line"],
+            "preview": self._preview_line(match["file_path"], match["line"])
+        } for match in matches]
+
+    def _preview_line(self, file_path: str, line: int) -> str:
+        if not isinstance(line, int):
+            return ""
+        content = self.state.loaded_files.get(file_path)
+        if content is not None:
+            lines = content.splitlines()
+            return lines[line - 1].strip() if 0 < line <= len(lines) else ""
+        return linecache.getline(file_path, line).strip()
+
+    def _run_semantic_search(self, query: str, k: int = 10) -> list[dict]:
+        """
+        Queries both the in-process BM25 index and the vector store and fuses
+        their rankings with reciprocal rank fusion, so exact identifiers
+        rank well even when embeddings are unavailable or miss them.
+        """
+        lexical_results = self.state.codebase_index.search_text(query, k=k * 2)
+        try:
+            vector_results = self.code_retriever.search(query, k=k * 2)
+        except Exception as e:
+            print(f"Vector search failed, using lexical results only: {e}")
+            vector_results = []
+
+        def key(r):
+            return (r.get("file_path", "N/A"), r.get("name", "N/A"), r.get("start_line", "N/A"))
 
+        metadata = {}
+        for r in vector_results + lexical_results:
+            metadata.setdefault(key(r), r)
+        fused = reciprocal_rank_fusion([[key(r) for r in lexical_results], [key(r) for r in vector_results]])
+
+        # Format results for consistent output; the span and token count feed the context packer
+        return [{
+            "type": "Hybrid Match",
+            "file_path": file_path,
+            "name": name,
+            "line": line,
+            "start_line": line,
+            "chunk_type": metadata[(file_path, name, line)].get("type"),
+            "end_line": metadata[(file_path, name, line)].get("end_line", line),
+            "token_count": metadata[(file_path, name, line)].get("token_count"),
+            "score": score,
+            "preview": metadata[(file_path, name, line)].get("content_preview") or self._preview_line(file_path, line)
+        } for (file_path, name, line), score in fused[:k]]
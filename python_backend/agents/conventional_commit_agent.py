@@ -1,9 +1,12 @@
 # python_backend/agents/conventional_commit_agent.py
 from orchestrator.agent_state import AgentState
-from services.llm_service import LLMService
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 import json
 
-def run(state: AgentState):
+prompt_registry.expect("conventional_commit_agent", ["summary_json"])
+
+async def run(state: AgentState):
     """
     Generates a conventional commit message using the LLMService.
     """
@@ -11,13 +14,12 @@ def run(state: AgentState):
         state.last_agent_output = {"error": "No change summary found."}
         return state
 
-    with open("python_backend/prompts/conventional_commit_agent.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("conventional_commit_agent")
     
     context = {"summary_json": json.dumps(state.change_summary, indent=2)}
     
-    llm = LLMService()
-    response_json = llm.execute_prompt(prompt_template, context, is_json=True)
+    async with state.stream_deltas("ConventionalCommit") as stream:
+        response_json = await llm_service.execute_prompt(prompt_template, context, is_json=True, on_delta=stream.push)
     
     state.commit_message = response_json.get("commit_message")
     state.last_agent_output = state.commit_message
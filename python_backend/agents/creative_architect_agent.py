@@ -1,10 +1,13 @@
 # python_backend/agents/creative_architect_agent.py
-import openai
-import os
-import json
 from orchestrator.agent_state import AgentState
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
+from context_engine.context_packer import CONTEXT_TOKEN_BUDGET
+from context_engine.tokenization import get_tokenizer
 
-def run(state: AgentState):
+prompt_registry.expect("creative_architect", ["requirements", "technical_context"])
+
+async def run(state: AgentState):
     """
     Generates 2-3 distinct, high-level solution strategies based on the requirements.
     """
@@ -12,22 +15,21 @@ def run(state: AgentState):
         state.last_agent_output = {"error": "Requirements not found in state."}
         return state
 
-    with open("python_backend/prompts/creative_architect.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("creative_architect")
     
-    prompt = prompt_template.format(
-        requirements=state.requirements,
-        technical_context=json.dumps(state.get_full_context_for_prompt(), indent=2)
-    )
+    # Whatever the template and requirements leave of the budget goes to packed context
+    fixed_tokens = len(get_tokenizer().encode(prompt_template.text + str(state.requirements)))
+    context = {
+        "requirements": state.requirements,
+        "technical_context": state.get_packed_context_for_prompt(CONTEXT_TOKEN_BUDGET - fixed_tokens)
+    }
+
+    async with state.stream_deltas("CreativeArchitect") as stream:
+        strategies = await llm_service.execute_prompt(prompt_template, context, is_json=True, on_delta=stream.push)
+    if "error" in strategies:
+        state.last_agent_output = strategies
+        return state
 
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"}
-    )
-    
-    strategies = json.loads(response.choices[0].message.content)
     state.proposed_strategies = strategies.get("strategies", [])
     state.last_agent_output = state.proposed_strategies
     
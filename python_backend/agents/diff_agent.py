@@ -25,7 +25,8 @@ def run(state: AgentState):
 +
 """
     
-    state.last_agent_output = {"file_path": file_path, "diff": diff_content}
+    state.proposed_diff = {"file_path": file_path, "diff": diff_content}
+    state.last_agent_output = state.proposed_diff
     state.add_message("system", f"Generated code diff for {file_path}.")
     
     return state
@@ -31,11 +31,11 @@ def run(state: AgentState, file_path: str, old_name: str, new_name: str):
     if not original_content:
         return f"Error: File '{file_path}' not found in state."
 
-    tree = state.codebase_index.asts.get(file_path)
-    if not tree:
+    if not state.codebase_index.has_file(file_path):
         return f"Error: AST for '{file_path}' not found in the codebase index. Please run /index first."
 
-    # 1. Transform the AST
+    # 1. Transform a private copy of the AST; the indexed tree is shared between sessions
+    tree = ast.parse(original_content, filename=file_path)
     transformer = RenameTransformer(old_name, new_name)
     new_tree = transformer.visit(tree)
     ast.fix_missing_locations(new_tree)
@@ -1,31 +1,25 @@
 from orchestrator.agent_state import AgentState
-import openai
-import os
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 
-def run(state: AgentState):
+prompt_registry.expect("requirements_engineer", ["user_request", "conversation_history"])
+
+async def run(state: AgentState):
     """
     This agent translates user requests into formal requirements.
     """
-    with open("prompts/requirements_engineer.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("requirements_engineer")
 
     user_request = state.conversation[-1]['content']
     history = "\n".join([f"{msg['role']}: {msg['content']}" for msg in state.conversation])
 
-    prompt = prompt_template.format(
-        user_request=user_request,
-        conversation_history=history
-    )
+    context = {
+        "user_request": user_request,
+        "conversation_history": history
+    }
 
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": "You are a world-class agentic assistant."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    
-    state.requirements = response.choices[0].message.content
+    async with state.stream_deltas("RequirementsEngineer") as stream:
+        state.requirements = await llm_service.execute_prompt(
+            prompt_template, context, system_prompt="You are a world-class agentic assistant.", on_delta=stream.push
+        )
     return state
@@ -1,14 +1,15 @@
 from orchestrator.agent_state import AgentState
-import openai
-import os
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 import json
 
-def run(state: AgentState):
+prompt_registry.expect("solution_architect", ["requirements", "technical_context"])
+
+async def run(state: AgentState):
     """
     This agent designs a high-level solution to meet the requirements.
     """
-    with open("prompts/solution_architect.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("solution_architect")
 
     # Create a simplified technical context for the prompt
     technical_context = {
@@ -17,20 +18,13 @@ def run(state: AgentState):
         "ast_analysis": state.get("ast_analysis", "Not available.")
     }
 
-    prompt = prompt_template.format(
-        requirements=state.requirements,
-        technical_context=json.dumps(technical_context, indent=2)
-    )
+    context = {
+        "requirements": state.requirements,
+        "technical_context": json.dumps(technical_context, indent=2)
+    }
 
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": "You are a world-class agentic assistant."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    
-    state.solution = response.choices[0].message.content
+    async with state.stream_deltas("SolutionArchitect") as stream:
+        state.solution = await llm_service.execute_prompt(
+            prompt_template, context, system_prompt="You are a world-class agentic assistant.", on_delta=stream.push
+        )
     return state
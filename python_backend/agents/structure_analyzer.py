@@ -12,9 +12,8 @@ def run(state: AgentState):
 
     # The main work is already done during the initial indexing.
     # Here, we can just report on the results.
-    num_asts = len(state.codebase_index.asts)
-    num_nodes = state.codebase_index.call_graph.number_of_nodes()
-    num_edges = state.codebase_index.call_graph.number_of_edges()
+    num_asts = state.codebase_index.file_count()
+    num_nodes, num_edges = state.codebase_index.call_graph_size()
 
     summary = (
         f"Code structure analysis complete.\n"
@@ -22,6 +21,7 @@ def run(state: AgentState):
         f"- Built a call graph with {num_nodes} functions (nodes) and {num_edges} calls (edges)."
     )
     
+    state.structure_summary = summary
     state.last_agent_output = {"summary": summary}
     state.add_message("system", summary)
     
@@ -1,10 +1,12 @@
 # python_backend/agents/technical_analyst_agent.py
-import openai
-import os
 import json
 from orchestrator.agent_state import AgentState
+from services.llm_service import llm_service
+from services.prompt_registry import prompt_registry
 
-def run(state: AgentState):
+prompt_registry.expect("technical_analyst", ["strategies_json", "requirements"])
+
+async def run(state: AgentState):
     """
     Evaluates the proposed strategies and selects the optimal one.
     """
@@ -12,22 +14,15 @@ def run(state: AgentState):
         state.last_agent_output = {"error": "Proposed strategies not found in state."}
         return state
 
-    with open("python_backend/prompts/technical_analyst.md", "r") as f:
-        prompt_template = f.read()
+    prompt_template = prompt_registry.get("technical_analyst")
     
-    prompt = prompt_template.format(
-        strategies_json=json.dumps(state.proposed_strategies, indent=2),
-        requirements=state.requirements
-    )
+    context = {
+        "strategies_json": json.dumps(state.proposed_strategies, indent=2),
+        "requirements": state.requirements
+    }
 
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[{"role": "user", "content": prompt}],
-        response_format={"type": "json_object"}
-    )
-    
-    analysis = json.loads(response.choices[0].message.content)
+    async with state.stream_deltas("TechnicalAnalyst") as stream:
+        analysis = await llm_service.execute_prompt(prompt_template, context, is_json=True, on_delta=stream.push)
     state.solution_analysis = analysis
     state.last_agent_output = analysis
     
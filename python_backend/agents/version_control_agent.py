@@ -1,17 +1,22 @@
 # python_backend/agents/version_control_agent.py
 from orchestrator.agent_state import AgentState
 
-def run(state: AgentState, file_path: str):
+def run(state: AgentState):
     """
-    Generates the git commands required to stage and commit the changes.
+    Generates the git commands required to stage and commit the proposed diff.
+    The commit reads its message (state.commit_message) from stdin, so the
+    commands only depend on the diff and quotes in the message are harmless.
     """
-    if not state.commit_message:
-        return "Error: No commit message found in the state."
-    
+    file_path = (state.proposed_diff or {}).get("file_path")
+    if not file_path:
+        state.last_agent_output = {"error": "No proposed diff found in the state."}
+        return state
+
     commands = [
         f"git add {file_path}",
-        f"git commit -m \"{state.commit_message}\""
+        "git commit -F -"
     ]
-    
+
     state.git_commands = commands
+    state.last_agent_output = {"commands": commands}
     return state
\ No newline at end of file
@@ -0,0 +1,168 @@
+# python_backend/context_engine/call_graph.py
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+import numpy as np
+from .reachability import ReachabilityIndex
+
+class CallGraph:
+    """
+    A compact directed call graph. Nodes are (file_path, qualified_name) tuples
+    interned to integer ids, each file owns a flat array of (caller, callee) id
+    pairs so its edges can be swapped out independently, and queries run on a
+    CSR (compressed sparse row) adjacency built lazily from those arrays.
+    Ancestor queries go through a ReachabilityIndex whose cached answers are
+    only evicted when the edges that can affect them change.
+    """
+    def __init__(self):
+        self._node_ids: Dict[tuple, int] = {}
+        self._nodes: List[tuple] = []
+        self._file_edges: Dict[str, array] = {}
+        self._file_nodes: Dict[str, array] = {}
+        # CSR of the reversed graph (callee -> callers), rebuilt on demand
+        self._reverse_indptr = None
+        self._reverse_indices = None
+        self._live_nodes = None
+        self.reachability = ReachabilityIndex()
+        # (caller, callee) edges added or removed since the reachability cache was last validated
+        self._changed_edges: Set[Tuple[int, int]] = set()
+
+    def node_id(self, node: tuple) -> int:
+        """Returns the interned id of a node, assigning a new one if needed."""
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._node_ids[node] = node_id
+            self._nodes.append(node)
+        return node_id
+
+    def node(self, node_id: int) -> tuple:
+        return self._nodes[node_id]
+
+    def set_file_edges(self, file_path: str, nodes: Iterable[tuple], edges: Iterable[Tuple[tuple, tuple]]):
+        """Replaces the nodes and (caller, callee) edges contributed by a file."""
+        flat = array('q')
+        for caller, callee in edges:
+            flat.append(self.node_id(caller))
+            flat.append(self.node_id(callee))
+        file_nodes = array('q', (self.node_id(n) for n in nodes))
+        old_edges = self._file_edges.get(file_path)
+        self._file_edges[file_path] = flat
+        if file_nodes != self._file_nodes.get(file_path):
+            self._file_nodes[file_path] = file_nodes
+            self._live_nodes = None
+        if old_edges != flat:
+            # Most edits leave a file's calls alone; only real edge changes touch the caches
+            self._edges_changed(old_edges or array('q'), flat)
+
+    def remove_file(self, file_path: str):
+        """Drops every node and edge contributed by a file."""
+        old_edges = self._file_edges.pop(file_path, None)
+        if old_edges:
+            self._edges_changed(old_edges, array('q'))
+        if self._file_nodes.pop(file_path, None) is not None:
+            self._live_nodes = None
+
+    def _edges_changed(self, old_edges: array, new_edges: array):
+        old_pairs = set(zip(old_edges[::2], old_edges[1::2]))
+        new_pairs = set(zip(new_edges[::2], new_edges[1::2]))
+        self._changed_edges.update(old_pairs ^ new_pairs)
+        self._invalidate()
+
+    def clear(self):
+        self._node_ids.clear()
+        self._nodes.clear()
+        self._file_edges.clear()
+        self._file_nodes.clear()
+        self._changed_edges.clear()
+        self.reachability.clear()
+        self._invalidate()
+
+    def _invalidate(self):
+        self._reverse_indptr = None
+        self._reverse_indices = None
+        self._live_nodes = None
+
+    def _edge_array(self) -> np.ndarray:
+        if not self._file_edges:
+            return np.empty((0, 2), dtype=np.int64)
+        flat = np.concatenate([np.frombuffer(edges, dtype=np.int64) for edges in self._file_edges.values() if len(edges)] or [np.empty(0, dtype=np.int64)])
+        edges = flat.reshape(-1, 2)
+        if not len(edges):
+            return edges
+        # Several call sites between the same pair collapse into a single edge; sorting one
+        # int64 key per pair keeps the (caller, callee) order and is much faster than np.unique
+        n = len(self._nodes)
+        keys = np.sort(edges[:, 0] * n + edges[:, 1])
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        return np.stack([keys // n, keys % n], axis=1)
+
+    def _ensure_csr(self):
+        if self._reverse_indptr is not None:
+            if self._live_nodes is None:
+                self._live_nodes = self._compute_live_nodes(self._edge_array())
+            return
+        if self._changed_edges:
+            self.reachability.invalidate(self._changed_edges)
+            self._changed_edges.clear()
+        edges = self._edge_array()
+        n = len(self._nodes)
+        callees, callers = edges[:, 1], edges[:, 0]
+        order = np.argsort(callees, kind='stable')
+        self._reverse_indices = callers[order]
+        self._reverse_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(callees, minlength=n), out=self._reverse_indptr[1:])
+        self._live_nodes = self._compute_live_nodes(edges)
+
+    def _compute_live_nodes(self, edges: np.ndarray) -> np.ndarray:
+        live = np.zeros(len(self._nodes), dtype=bool)
+        for nodes in self._file_nodes.values():
+            live[np.frombuffer(nodes, dtype=np.int64)] = True
+        live[edges.ravel()] = True
+        return live
+
+    def has_node(self, node: tuple) -> bool:
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            return False
+        self._ensure_csr()
+        return bool(self._live_nodes[node_id])
+
+    def nodes_in_file(self, file_path: str) -> List[tuple]:
+        """Lists the nodes a file contributed (its functions and their callees)."""
+        return [self._nodes[i] for i in self._file_nodes.get(file_path, ())]
+
+    def number_of_nodes(self) -> int:
+        self._ensure_csr()
+        return int(self._live_nodes.sum())
+
+    def number_of_edges(self) -> int:
+        self._ensure_csr()
+        return len(self._reverse_indices)
+
+    def edges(self) -> List[Tuple[tuple, tuple]]:
+        """Lists all distinct (caller, callee) edges."""
+        return [(self._nodes[a], self._nodes[b]) for a, b in self._edge_array().tolist()]
+
+    def predecessors(self, node: tuple) -> List[tuple]:
+        """Lists the direct callers of a node."""
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            return []
+        self._ensure_csr()
+        start, end = self._reverse_indptr[node_id], self._reverse_indptr[node_id + 1]
+        return [self._nodes[i] for i in self._reverse_indices[start:end].tolist()]
+
+    def ancestors(self, node: tuple) -> Set[tuple]:
+        """Returns every node that can reach `node`, i.e. all direct and transitive callers."""
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            return set()
+        return {self._nodes[i] for i in self._ancestor_ids(node_id).tolist()}
+
+    def ancestors_many(self, nodes: Iterable[tuple]) -> Dict[tuple, Set[tuple]]:
+        """Batch form of ancestors: the CSR and condensation are prepared once for all targets."""
+        return {node: self.ancestors(node) for node in nodes}
+
+    def _ancestor_ids(self, node_id: int) -> np.ndarray:
+        self._ensure_csr()
+        return self.reachability.ancestors(node_id, len(self._reverse_indptr) - 1, self._reverse_indptr, self._reverse_indices)
@@ -0,0 +1,212 @@
+# python_backend/context_engine/call_resolver.py
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .symbol_table import Symbol, SymbolTable
+
+# How many `from x import y` re-export hops to follow before giving up
+MAX_REEXPORT_DEPTH = 3
+
+def module_parts(file_path: str) -> List[str]:
+    """Splits a file path into dotted module components (`pkg/__init__.py` -> [..., 'pkg'])."""
+    stem, _ = os.path.splitext(os.path.normpath(file_path))
+    parts = [p for p in stem.split(os.sep) if p]
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    return parts
+
+class CallResolver:
+    """
+    Resolves the dotted call targets recorded in a SymbolTable (`helper`,
+    `self.save`, `utils.helper`, `mod.Class.method`) to (file_path,
+    qualified_name) call-graph nodes, following `import x`, `from x import y`
+    (including relative imports and simple re-exports) and `self`/`cls` methods.
+
+    Modules are looked up by every dotted suffix of their path, so both
+    `orchestrator.agent_state` and `python_backend.orchestrator.agent_state`
+    resolve without knowing the import root; ties go to the candidate closest
+    to the importing file. It also tracks which files depend on which, so
+    only the affected files are re-resolved after a change.
+    """
+    def __init__(self, symbols: SymbolTable):
+        self.symbols = symbols
+        self._modules: Dict[str, Set[str]] = {}
+        # file -> files its resolved edges point into (or resolve through), and the reverse
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        # last component of an imported name -> files importing it
+        self._importers: Dict[str, Set[str]] = {}
+        self._imported_names: Dict[str, Set[str]] = {}
+
+    def clear(self):
+        self._modules.clear()
+        self._dependencies.clear()
+        self._dependents.clear()
+        self._importers.clear()
+        self._imported_names.clear()
+
+    def add_module(self, file_path: str):
+        """Registers a file under all dotted suffixes of its module path."""
+        parts = module_parts(file_path)
+        for i in range(len(parts)):
+            self._modules.setdefault(".".join(parts[i:]), set()).add(file_path)
+
+    def remove_module(self, file_path: str):
+        """Forgets a file's module names and dependency bookkeeping."""
+        parts = module_parts(file_path)
+        for i in range(len(parts)):
+            key = ".".join(parts[i:])
+            files = self._modules.get(key)
+            if files is not None:
+                files.discard(file_path)
+                if not files:
+                    del self._modules[key]
+        self._set_dependencies(file_path, set())
+        self._set_imported_names(file_path, set())
+
+    def affected_by(self, changed: Iterable[str], added: Iterable[str], removed: Iterable[str]) -> Set[str]:
+        """
+        Returns the files whose edges must be re-resolved after the given files
+        changed, appeared or disappeared: the files themselves, the files with
+        edges into them, and the files importing a module of the same name.
+        """
+        changed, added, removed = set(changed), set(added), set(removed)
+        affected = changed | added
+        for file_path in changed | added | removed:
+            affected |= self._dependents.get(file_path, set())
+            parts = module_parts(file_path)
+            if parts:
+                affected |= self._importers.get(parts[-1], set())
+        return affected - removed
+
+    def resolve_file(self, file_path: str) -> Tuple[List[tuple], List[Tuple[tuple, tuple]]]:
+        """
+        Resolves every call site in a file. Returns the file's function nodes
+        and its (caller, callee) edges; unresolvable calls (builtins, third-party
+        code, dynamic dispatch) are dropped.
+        """
+        imports = {local: (module, attr, level) for local, module, attr, level in self.symbols.imports_in(file_path)}
+        self._set_imported_names(file_path, {name for module, attr, _ in imports.values()
+                                             for name in ((module or "").split(".")[-1], attr) if name})
+
+        nodes = []
+        edges = []
+        visited: Set[str] = set()
+        for symbol in self.symbols.symbols_in(file_path):
+            if symbol.kind != "function":
+                continue
+            caller_node = (file_path, self.symbols.qualified_name(symbol))
+            nodes.append(caller_node)
+            for target, _ in symbol.calls:
+                callee_node = self._resolve_target(file_path, symbol, target, imports, visited)
+                if callee_node is not None:
+                    edges.append((caller_node, callee_node))
+
+        visited.discard(file_path)
+        self._set_dependencies(file_path, visited)
+        return nodes, edges
+
+    def _resolve_target(self, file_path: str, caller: Symbol, target: str, imports: dict, visited: Set[str]) -> Optional[tuple]:
+        parts = target.split(".")
+        head, rest = parts[0], parts[1:]
+
+        if head in ("self", "cls") and rest:
+            cls = self.symbols.enclosing_class(caller)
+            if cls is None:
+                return None
+            return self._lookup_function(file_path, ".".join([self.symbols.qualified_name(cls)] + rest))
+
+        if head in imports:
+            module, attr, level = imports[head]
+            path = (module.split(".") if module else []) + ([attr] if attr else [])
+            return self._resolve_in_modules(file_path, path + rest, level, visited, 0)
+
+        # A definition in the same file: exact dotted name first, then any function of that name
+        node = self._lookup_function(file_path, target)
+        if node is not None or rest:
+            return node
+        for symbol in self.symbols.symbols_in(file_path):
+            if symbol.kind == "function" and symbol.name == head:
+                return (file_path, self.symbols.qualified_name(symbol))
+        return None
+
+    def _resolve_in_modules(self, importer: str, parts: List[str], level: int, visited: Set[str], depth: int) -> Optional[tuple]:
+        """Splits `parts` into the longest module prefix that exists and a symbol path inside it."""
+        lowest = 0 if level else 1
+        for i in range(len(parts), lowest - 1, -1):
+            module_file = self._find_module(importer, parts[:i], level)
+            if module_file is None:
+                continue
+            remainder = parts[i:]
+            if not remainder:
+                return None # Calling a module object
+            visited.add(module_file)
+            node = self._lookup_function(module_file, ".".join(remainder))
+            if node is None and depth < MAX_REEXPORT_DEPTH:
+                node = self._follow_reexport(module_file, remainder, visited, depth + 1)
+            return node
+        return None
+
+    def _follow_reexport(self, module_file: str, remainder: List[str], visited: Set[str], depth: int) -> Optional[tuple]:
+        """Handles `from .impl import helper` in a package that callers import `helper` from."""
+        for local, module, attr, level in self.symbols.imports_in(module_file):
+            if local == remainder[0]:
+                path = (module.split(".") if module else []) + ([attr] if attr else [])
+                return self._resolve_in_modules(module_file, path + remainder[1:], level, visited, depth)
+        return None
+
+    def _find_module(self, importer: str, parts: List[str], level: int) -> Optional[str]:
+        if level:
+            base = os.path.dirname(importer)
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+            candidates = [os.path.join(base, *parts, "__init__.py")]
+            if parts:
+                candidates.insert(0, os.path.join(base, *parts) + ".py")
+            for candidate in candidates:
+                if self.symbols.has_file(candidate):
+                    return candidate
+            return None
+
+        files = self._modules.get(".".join(parts))
+        if not files:
+            return None
+        if len(files) == 1:
+            return next(iter(files))
+        # Ambiguous suffix: prefer the module sharing the longest directory prefix with the importer
+        importer_dir = os.path.dirname(importer)
+        return max(sorted(files), key=lambda f: len(os.path.commonpath([importer_dir, os.path.dirname(f)])))
+
+    def _lookup_function(self, file_path: str, qualified_name: str) -> Optional[tuple]:
+        symbol = self.symbols.lookup(file_path, qualified_name)
+        if symbol is None:
+            return None
+        if symbol.kind == "class":
+            # Instantiating a class calls its constructor
+            qualified_name = f"{qualified_name}.__init__"
+            if self.symbols.lookup(file_path, qualified_name) is None:
+                return None
+        return (file_path, qualified_name)
+
+    def _set_dependencies(self, file_path: str, targets: Set[str]):
+        for target in self._dependencies.pop(file_path, set()):
+            dependents = self._dependents.get(target)
+            if dependents is not None:
+                dependents.discard(file_path)
+                if not dependents:
+                    del self._dependents[target]
+        if targets:
+            self._dependencies[file_path] = targets
+            for target in targets:
+                self._dependents.setdefault(target, set()).add(file_path)
+
+    def _set_imported_names(self, file_path: str, names: Set[str]):
+        for name in self._imported_names.pop(file_path, set()):
+            importers = self._importers.get(name)
+            if importers is not None:
+                importers.discard(file_path)
+                if not importers:
+                    del self._importers[name]
+        if names:
+            self._imported_names[file_path] = names
+            for name in names:
+                self._importers.setdefault(name, set()).add(file_path)
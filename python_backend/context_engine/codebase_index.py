@@ -1,72 +1,377 @@
 # python_backend/context_engine/codebase_index.py
 import os
 import ast
-import networkx as nx
-from typing import Dict
+import threading
+from typing import Dict, List, Tuple
 from .file_discovery import discover_files
+from . import index_snapshot, parse_worker
+from .symbol_table import SymbolTable
+from .call_graph import CallGraph
+from .call_resolver import CallResolver
+from .lexical_index import LexicalIndex, chunk_term_records
+from .tokenization import chunk_tree
+from .parse_worker import hash_content
+
+# Only these files are parsed into ASTs; everything else is left to the vector store.
+PARSABLE_EXTENSIONS = {'.py'}
+
+class FileFingerprint:
+    """Identifies the version of a file that was last indexed."""
+    __slots__ = ("mtime_ns", "size", "digest")
+
+    def __init__(self, mtime_ns: int, size: int, digest: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+
+    def matches_stat(self, stat_result: os.stat_result) -> bool:
+        """Cheap check: an unchanged mtime and size means the file can be skipped without reading it."""
+        return self.mtime_ns == stat_result.st_mtime_ns and self.size == stat_result.st_size
 
 class CodebaseIndex:
-    def __init__(self):
-        self.asts: Dict[str, ast.AST] = {}
-        self.call_graph = nx.DiGraph()
+    def __init__(self, snapshot_path: str | None = None):
+        # Compact definitions and call sites; full ASTs are only parsed on demand (see get_ast)
+        self.symbols = SymbolTable()
+        # Nodes are (file_path, qualified_name); calls are resolved across modules
+        self.call_graph = CallGraph()
+        self.resolver = CallResolver(self.symbols)
+        # BM25 index over the chunk_content_by_ast chunks of every file
+        self.lexical = LexicalIndex()
+        self.fingerprints: Dict[str, FileFingerprint] = {}
         self._is_indexed = False
+        # On-disk snapshot for fast cold starts (see index_snapshot)
+        self.snapshot_path = snapshot_path
+        self._dirty = False
+        # The index is shared between sessions (see index_registry): _lock guards the
+        # in-memory structures, _indexing_lock serializes whole index_directory runs.
+        self._lock = threading.RLock()
+        self._indexing_lock = threading.Lock()
+        # Serializes snapshot writes, so an older one never replaces a newer one
+        self._snapshot_lock = threading.Lock()
 
     def is_indexed(self) -> bool:
         """Checks if the codebase has been indexed."""
         return self._is_indexed
 
-    def index_directory(self, directory_path: str):
+    def index_directory(self, directory_path: str, incremental: bool = True) -> dict:
         """
-        Indexes all parsable files in a directory and builds the call graph.
+        Indexes all parsable files in a directory and updates the call graph.
+        In incremental mode only new or changed files are re-parsed, files that
+        disappeared from the directory are dropped, and only their call-graph
+        edges are patched. Stale files are parsed in a process pool (see
+        parse_worker) and merged into the index afterwards, so readers are only
+        blocked for the merge. Returns counts of parsed, removed and unchanged
+        files along with the changed and removed paths.
         """
-        all_files = discover_files(directory_path)
-        for file_path in all_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.index_file(file_path, content)
-            except Exception:
-                # Ignore files that can't be read
-                continue
-        
-        self.build_call_graph()
-        self._is_indexed = True
-        print(f"Codebase indexing complete. Indexed {len(self.asts)} files.")
+        directory_path = os.path.abspath(directory_path)
+        with self._indexing_lock:
+            if not incremental:
+                with self._lock:
+                    dropped = self._files_under(directory_path)
+                    for file_path in dropped:
+                        self._drop_file(file_path)
+                    self._update_call_graph((), (), dropped)
+
+            # Find stale files with a cheap stat() check
+            seen = set()
+            jobs = []
+            unchanged = 0
+            for file_path in discover_files(directory_path):
+                if os.path.splitext(file_path)[1].lower() not in PARSABLE_EXTENSIONS:
+                    continue
+                seen.add(file_path)
+                fingerprint = self.fingerprints.get(file_path)
+                try:
+                    if fingerprint and fingerprint.matches_stat(os.stat(file_path)):
+                        unchanged += 1
+                        continue
+                except OSError:
+                    continue
+                jobs.append((file_path, fingerprint.digest if fingerprint else None))
+
+            removed = [p for p in self._files_under(directory_path) if p not in seen]
+            stats = self._parse_and_merge(jobs, removed)
+            stats["unchanged"] += unchanged
+            with self._lock:
+                was_indexed = self._is_indexed
+                self._is_indexed = True
+            self.flush_snapshot()
+            if stats["parsed"] or stats["removed"] or not was_indexed:
+                print(f"Codebase indexing complete. Parsed {stats['parsed']} files, removed {stats['removed']}, {stats['unchanged']} unchanged.")
+            return stats
+
+    def index_paths(self, file_paths: List[str]) -> dict:
+        """
+        Re-indexes only the given files, e.g. those reported by the file watcher.
+        Paths that no longer exist are dropped from the index. The snapshot is
+        not rewritten here; see flush_snapshot.
+        """
+        with self._indexing_lock:
+            jobs = []
+            removed = []
+            for file_path in {os.path.abspath(p) for p in file_paths}:
+                if os.path.splitext(file_path)[1].lower() not in PARSABLE_EXTENSIONS:
+                    continue
+                if os.path.isfile(file_path):
+                    fingerprint = self.fingerprints.get(file_path)
+                    jobs.append((file_path, fingerprint.digest if fingerprint else None))
+                elif self.has_file(file_path):
+                    removed.append(file_path)
+            return self._parse_and_merge(jobs, removed)
+
+    def _parse_and_merge(self, jobs: List[Tuple[str, str | None]], removed: List[str]) -> dict:
+        """
+        Reads, hashes and parses the (file_path, known_digest) jobs, in parallel
+        for large batches, then merges the compact records and drops removed files
+        under the index lock.
+        """
+        records = parse_worker.parse_files(jobs)
+
+        changed_files = []
+        added_files = []
+        unchanged = 0
+        with self._lock:
+            for record in records:
+                if record is None:
+                    continue # Ignore files that can't be read
+                was_known = self.symbols.has_file(record[0])
+                if self._apply_record(record):
+                    changed_files.append(record[0])
+                    if not was_known:
+                        added_files.append(record[0])
+                else:
+                    unchanged += 1
+
+            for file_path in removed:
+                self._drop_file(file_path)
+            added = set(added_files)
+            self._update_call_graph([p for p in changed_files if p not in added], added, removed)
+        return {
+            "parsed": len(changed_files),
+            "removed": len(removed),
+            "unchanged": unchanged,
+            "changed_files": changed_files,
+            "removed_files": removed,
+        }
+
+    def _files_under(self, directory_path: str) -> List[str]:
+        prefix = os.path.join(directory_path, '')
+        return [p for p in self.fingerprints if p.startswith(prefix)]
+
+    def _apply_record(self, record: tuple) -> bool:
+        """
+        Merges a record produced by parse_worker.parse_file into the symbol table.
+        Returns True if the file's symbols were replaced; the caller re-resolves
+        the call graph once the whole batch is merged.
+        """
+        file_path, mtime_ns, size, digest, symbols, imports, chunks = record
+        self.fingerprints[file_path] = FileFingerprint(mtime_ns, size, digest)
+        self._dirty = True
+        if symbols is None:
+            # Touched but not modified
+            return False
+
+        self.symbols.set_file_symbols(file_path, symbols, imports)
+        self.resolver.add_module(file_path)
+        self.lexical.set_file(file_path, chunks)
+        return True
 
     def index_file(self, file_path: str, content: str):
-        """Parses a file into an AST and adds it to the index."""
+        """
+        Parses a file, records its symbols and call sites, and patches them into
+        the call graph in place of the file's previous entries. The AST itself
+        is not retained.
+        """
         try:
             tree = ast.parse(content, filename=file_path)
-            self.asts[file_path] = tree
+            symbols, imports = parse_worker.extract_symbols(tree), parse_worker.extract_imports(tree)
+            chunks = chunk_term_records(chunk_tree(tree, content, file_path))
         except (SyntaxError, ValueError):
-            self.asts[file_path] = None # Mark as unparsable
+            symbols, imports, chunks = [], [], [] # Unparsable
+        with self._lock:
+            was_known = self.symbols.has_file(file_path)
+            self.symbols.set_file_symbols(file_path, symbols, imports)
+            self.resolver.add_module(file_path)
+            self.lexical.set_file(file_path, chunks)
+            self._dirty = True
+            if was_known:
+                self._update_call_graph([file_path], (), ())
+            else:
+                self._update_call_graph((), [file_path], ())
+
+    def has_file(self, file_path: str) -> bool:
+        """Checks whether a file is part of the index."""
+        return file_path in self.fingerprints or self.symbols.has_file(file_path)
+
+    def file_count(self) -> int:
+        """Returns the number of indexed files."""
+        return len(set(self.fingerprints) | set(self.symbols.files()))
+
+    def get_ast(self, file_path: str) -> ast.AST | None:
+        """
+        Parses an indexed file from disk on demand, e.g. for refactors.
+        The tree is not cached; callers own it and may mutate it freely.
+        """
+        if not self.has_file(file_path):
+            return None
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return ast.parse(f.read(), filename=file_path)
+        except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+            return None
+
+    def remove_file(self, file_path: str):
+        """Drops a file and its call-graph edges from the index."""
+        with self._lock:
+            self._drop_file(file_path)
+            self._update_call_graph((), (), [file_path])
+
+    def _drop_file(self, file_path: str):
+        self.fingerprints.pop(file_path, None)
+        self.symbols.remove_file(file_path)
+        self.resolver.remove_module(file_path)
+        self.call_graph.remove_file(file_path)
+        self.lexical.remove_file(file_path)
+        self._dirty = True
 
     def build_call_graph(self):
         """
-        Builds a complete function call graph from all indexed ASTs.
+        Rebuilds the complete function call graph from the symbol table,
+        resolving every call site from scratch.
         """
         self.call_graph.clear()
-        for file_path, tree in self.asts.items():
-            if not tree: continue
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    caller_node = (file_path, node.name)
-                    self.call_graph.add_node(caller_node)
-                    
-                    for sub_node in ast.walk(node):
-                        if isinstance(sub_node, ast.Call) and isinstance(sub_node.func, ast.Name):
-                            callee_node = (file_path, sub_node.func.id)
-                            self.call_graph.add_edge(caller_node, callee_node)
+        self.resolver.clear()
+        files = list(self.symbols.files())
+        for file_path in files:
+            self.resolver.add_module(file_path)
+        for file_path in files:
+            self.call_graph.set_file_edges(file_path, *self.resolver.resolve_file(file_path))
         return self.call_graph
 
+    def _update_call_graph(self, changed, added, removed):
+        """
+        Re-resolves the edges of changed and added files plus every file whose
+        calls may now resolve differently (see CallResolver.affected_by).
+        """
+        for file_path in self.resolver.affected_by(changed, added, removed):
+            if self.symbols.has_file(file_path):
+                self.call_graph.set_file_edges(file_path, *self.resolver.resolve_file(file_path))
+
+    def save_snapshot(self, path: str | None = None):
+        """
+        Persists fingerprints and the symbol table so a restarted server can skip
+        re-parsing. Only collecting the rows holds the index lock; the SQLite
+        write happens after it is released, so queries are not blocked by it.
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return
+        with self._snapshot_lock:
+            with self._lock:
+                # Symbol lists and chunk records are replaced, never mutated, so references stay valid
+                fingerprints = dict(self.fingerprints)
+                file_symbols = {file_path: self.symbols.symbols_in(file_path) for file_path in fingerprints}
+                file_imports = {file_path: self.symbols.imports_in(file_path) for file_path in fingerprints}
+                file_chunks = {file_path: self.lexical.records_for(file_path) for file_path in fingerprints}
+                self._dirty = False
+            try:
+                index_snapshot.save_snapshot(path, fingerprints, file_symbols, file_imports, file_chunks)
+            except Exception:
+                self._dirty = True
+                raise
+
+    def flush_snapshot(self):
+        """Saves the snapshot only if the index changed since it was last written."""
+        if self._dirty:
+            self.save_snapshot()
+
+    def load_snapshot(self, path: str | None = None) -> bool:
+        """
+        Restores the index from a snapshot written by save_snapshot. Stale files
+        are picked up by the next incremental index_directory call.
+        Returns False if there is no usable snapshot.
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return False
+        loaded = index_snapshot.load_snapshot(path)
+        if loaded is None:
+            return False
+
+        fingerprints, file_symbols, file_imports, file_chunks = loaded
+        with self._lock:
+            self.symbols.clear()
+            self.lexical.clear()
+            self.fingerprints = fingerprints
+            for file_path in fingerprints:
+                self.symbols.set_file_symbols(file_path, file_symbols.get(file_path, []), file_imports.get(file_path, []))
+                self.lexical.set_file(file_path, file_chunks.get(file_path, []))
+            self.build_call_graph()
+            self._dirty = False
+        print(f"Loaded codebase index snapshot with {len(fingerprints)} files.")
+        return True
+
     def get_impacted_functions(self, target_file: str, target_function: str) -> list:
         """
-        Analyzes the pre-built graph to find functions impacted by a change.
+        Analyzes the pre-built graph to find functions impacted by a change,
+        including callers in other modules. `target_function` is either a
+        qualified name (`ClassName.method`) or a bare name, which matches every
+        function of that name in the file.
+        """
+        return self.get_impacted_functions_batch([(target_file, target_function)])[(target_file, target_function)]
+
+    def get_impacted_functions_batch(self, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], list]:
         """
-        target_node = (target_file, target_function)
-        if not self.call_graph.has_node(target_node):
-            return []
-        
-        impacted_nodes = nx.ancestors(self.call_graph, target_node)
-        return [f"{file}:{func}" for file, func in impacted_nodes]
\ No newline at end of file
+        Answers many impact queries at once, e.g. for every function touched by
+        a change set. Transitive callers come from the call graph's cached
+        reachability index, so repeated queries are dictionary lookups.
+        """
+        results = {}
+        with self._lock:
+            for target_file, target_function in targets:
+                impacted_nodes = set()
+                for target_node in self._match_functions(target_file, target_function):
+                    impacted_nodes |= self.call_graph.ancestors(target_node)
+                results[(target_file, target_function)] = [f"{file}:{func}" for file, func in sorted(impacted_nodes)]
+        return results
+
+    def search_symbols(self, search_type: str, name: str, mode: str = "exact", limit: int = 50) -> List[dict]:
+        """
+        Finds `class`, `function` or `calls` matches for a name through the
+        symbol table's inverted name index; see NameIndex.match_names for the
+        exact, prefix and fuzzy modes. Call sites report the calling symbol.
+        """
+        results = []
+        with self._lock:
+            names = self.symbols.names
+            for matched in names.match_names(search_type, name, mode):
+                if search_type == "calls":
+                    locations = ((file_id, position, line) for file_id, sites in names.call_sites(matched).items()
+                                 for position, line in sites)
+                else:
+                    locations = ((file_id, position, None) for file_id, positions in names.definitions(search_type, matched).items()
+                                 for position in positions)
+                for file_id, position, line in locations:
+                    file_path = self.symbols.path(file_id)
+                    symbol = self.symbols.symbols_in(file_path)[position]
+                    results.append({
+                        "file_path": file_path,
+                        "name": matched,
+                        "kind": symbol.kind,
+                        "qualified_name": self.symbols.qualified_name(symbol),
+                        "line": line if line is not None else symbol.start_line,
+                    })
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def search_text(self, query: str, k: int = 10) -> List[dict]:
+        """Ranks code chunks against a free-text or identifier query with BM25 (see LexicalIndex)."""
+        with self._lock:
+            return self.lexical.search(query, k)
+
+    def _match_functions(self, file_path: str, function_name: str) -> List[Tuple[str, str]]:
+        if self.call_graph.has_node((file_path, function_name)):
+            return [(file_path, function_name)]
+        return [(file_path, self.symbols.qualified_name(symbol)) for symbol in self.symbols.symbols_in(file_path)
+                if symbol.kind == "function" and symbol.name == function_name]
@@ -12,10 +12,10 @@ def get_context(prompt, conversation_history, repo_path, db_uri=None):
     }
 
     # RAG search
-    vs = vector_store.ChromaVectorStore()
+    vs = vector_store.get_vector_store()
     query_embedding = vector_store.generate_embeddings([prompt])
-    if query_embedding.any():
-        context["rag_search_results"] = vs.search(query_embedding[0])
+    if query_embedding:
+        context["rag_search_results"] = vs.search(prompt, query_embedding=query_embedding[0])
 
     # Git history
     ga = git_analyzer.GitAnalyzer(repo_path)
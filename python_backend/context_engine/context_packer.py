@@ -0,0 +1,187 @@
+# python_backend/context_engine/context_packer.py
+import os
+import math
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .tokenization import get_tokenizer
+
+# Tokens of packed context an agent may put into a single prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+# Share of the budget held back for the outline of chunks that did not fit
+OUTLINE_SHARE = 0.1
+# The knapsack table never gets wider than this many cells
+MAX_KNAPSACK_CELLS = 2048
+
+class PackedContext:
+    """The chunks chosen for a prompt, plus an outline of the ones left out."""
+    def __init__(self, chunks: List[dict], outline: List[str], tokens: int, budget: int):
+        self.chunks = chunks
+        self.outline = outline
+        self.tokens = tokens
+        self.budget = budget
+
+    def render(self) -> str:
+        parts = [chunk["text"] for chunk in self.chunks]
+        if self.outline:
+            parts.append("\n".join(self.outline))
+        return "\n\n".join(parts)
+
+class ContextPacker:
+    """
+    Fits ranked code chunks into a token budget. Each candidate is a search
+    result with `file_path`, `start_line`, `end_line` and `score` (and
+    optionally `token_count`, as stored by ChromaVectorStore.add_chunks).
+    The packer reads each span's text through `read_file`, picks the subset
+    with the highest total score that fits (a 0/1 knapsack over token
+    counts), never includes two overlapping spans, and lists everything
+    left out in a one-line-per-chunk outline.
+    """
+    def __init__(self, read_file: Callable[[str], Optional[str]], tokenizer=None):
+        self.read_file = read_file
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text))
+
+    def pack(self, candidates: List[dict], budget: int = CONTEXT_TOKEN_BUDGET) -> PackedContext:
+        items = self._prepare(candidates)
+        outline_budget = int(budget * OUTLINE_SHARE) if len(items) > 1 else 0
+        capacity = budget - outline_budget
+
+        # Overlapping spans conflict; drop the lower-scored one of a clashing pair and re-solve
+        excluded = set()
+        while True:
+            selected = self._knapsack([i for i in range(len(items)) if i not in excluded], items, capacity)
+            clash = self._first_overlap(selected, items)
+            if clash is None:
+                break
+            excluded.add(clash)
+
+        # The real token count of the rendered text is the final word
+        selected.sort(key=lambda i: items[i]["score"], reverse=True)
+        tokens = sum(self.count_tokens(items[i]["text"]) + 1 for i in selected)
+        while selected and tokens > capacity:
+            dropped = selected.pop()
+            tokens -= self.count_tokens(items[dropped]["text"]) + 1
+
+        chosen = set(selected)
+        left_out = [item for i, item in enumerate(items) if i not in chosen]
+        outline, outline_tokens = self._outline(left_out, budget - tokens)
+        return PackedContext([items[i] for i in selected], outline, tokens + outline_tokens, budget)
+
+    def _prepare(self, candidates: List[dict]) -> List[dict]:
+        """Loads the text of every distinct span and prices it in tokens."""
+        files: Dict[str, Optional[List[str]]] = {}
+        items: Dict[tuple, dict] = {}
+        for candidate in candidates:
+            file_path = candidate.get("file_path")
+            start, end = candidate.get("start_line"), candidate.get("end_line")
+            if file_path not in files:
+                content = self.read_file(file_path)
+                files[file_path] = content.splitlines() if content is not None else None
+            lines = files[file_path]
+            if lines is None:
+                continue
+            if not isinstance(start, int) or start < 1:
+                start, end = 1, len(lines)
+            if not isinstance(end, int) or end < start:
+                end = start
+            end = min(end, len(lines))
+            key = (file_path, start, end)
+            score = float(candidate.get("score") or 0.0)
+            if key in items:
+                items[key]["score"] = max(items[key]["score"], score)
+                continue
+
+            chunk_type = candidate.get("chunk_type") or candidate.get("type") or "code"
+            header = f"# {file_path}:{start}-{end} ({chunk_type} {candidate.get('name', '')})".rstrip()
+            body = "\n".join(lines[start - 1:end])
+            text = f"{header}\n```\n{body}\n```"
+            token_count = candidate.get("token_count")
+            # The extra tokens cover the code fence and the blank line between chunks
+            if isinstance(token_count, int) and token_count > 0:
+                tokens = token_count + self.count_tokens(header) + 6
+            else:
+                tokens = self.count_tokens(text) + 1
+            items[key] = {
+                "file_path": file_path,
+                "type": chunk_type,
+                "name": candidate.get("name", ""),
+                "start_line": start,
+                "end_line": end,
+                "score": score,
+                "tokens": tokens,
+                "text": text,
+            }
+        return list(items.values())
+
+    @staticmethod
+    def _knapsack(indices: List[int], items: List[dict], capacity: int) -> List[int]:
+        """
+        Classic 0/1 knapsack by dynamic programming, one vectorized row per
+        item. Weights are rounded up to a granularity that keeps the table
+        at most MAX_KNAPSACK_CELLS wide, so a selection never exceeds the
+        capacity.
+        """
+        if capacity <= 0 or not indices:
+            return []
+        granularity = max(1, math.ceil(capacity / MAX_KNAPSACK_CELLS))
+        cells = capacity // granularity
+        weights = [math.ceil(items[i]["tokens"] / granularity) for i in indices]
+        # A tiny length penalty prefers the smaller chunk when scores tie
+        values = [items[i]["score"] + 1e-9 / (1 + items[i]["tokens"]) for i in indices]
+
+        best = np.zeros(cells + 1)
+        taken = np.zeros((len(indices), cells + 1), dtype=bool)
+        for row, (weight, value) in enumerate(zip(weights, values)):
+            if weight > cells:
+                continue
+            with_item = best[:cells + 1 - weight] + value
+            better = with_item > best[weight:]
+            taken[row, weight:] = better
+            best[weight:] = np.where(better, with_item, best[weight:])
+
+        selected = []
+        cell = int(np.argmax(best))
+        for row in range(len(indices) - 1, -1, -1):
+            if taken[row, cell]:
+                selected.append(indices[row])
+                cell -= weights[row]
+        return selected
+
+    @staticmethod
+    def _first_overlap(selected: List[int], items: List[dict]) -> Optional[int]:
+        """Returns the lower-scored chunk of the first overlapping pair in the selection."""
+        by_file: Dict[str, List[int]] = {}
+        for i in selected:
+            by_file.setdefault(items[i]["file_path"], []).append(i)
+        for spans in by_file.values():
+            spans.sort(key=lambda i: items[i]["start_line"])
+            for a, b in zip(spans, spans[1:]):
+                if items[b]["start_line"] <= items[a]["end_line"]:
+                    return a if items[a]["score"] < items[b]["score"] else b
+        return None
+
+    def _outline(self, items: List[dict], budget: int) -> tuple:
+        """One line per chunk left out, best first, for as many as the budget allows."""
+        if not items or budget <= 0:
+            return [], 0
+        items = sorted(items, key=lambda item: item["score"], reverse=True)
+        title = "Other relevant code (not included):"
+        lines = [title]
+        tokens = self.count_tokens(title)
+        for n, item in enumerate(items):
+            line = f"- {item['file_path']}:{item['start_line']}-{item['end_line']} {item['type']} {item['name']}".rstrip()
+            line_tokens = self.count_tokens(line) + 1
+            # Leave room for the closing "...and N more" line
+            if tokens + line_tokens + 8 > budget:
+                rest = f"- ...and {len(items) - n} more"
+                if tokens + self.count_tokens(rest) + 1 <= budget:
+                    lines.append(rest)
+                    tokens += self.count_tokens(rest) + 1
+                break
+            lines.append(line)
+            tokens += line_tokens
+        if len(lines) == 1:
+            return [], 0
+        return lines, tokens
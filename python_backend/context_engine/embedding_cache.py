@@ -0,0 +1,101 @@
+# python_backend/context_engine/embedding_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from .index_snapshot import INDEX_CACHE_DIR
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(INDEX_CACHE_DIR, "embeddings.db"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+def normalize_text(text: str) -> str:
+    """The form of a chunk that is actually embedded (and therefore cached)."""
+    return text.replace("\n", " ") or " "
+
+def content_key(model: str, normalized_text: str) -> bytes:
+    """Content address of an embedding: a hash of the model and the normalized text."""
+    return hashlib.blake2b(f"{model}\0{normalized_text}".encode("utf-8"), digest_size=16).digest()
+
+class EmbeddingCache:
+    """
+    A content-addressed embedding store in SQLite. Vectors are kept as
+    float32 blobs under content_key, so a chunk that did not change is never
+    sent to the API again, wherever it moved. Entries carry a last-used
+    stamp and the least recently used ones are evicted once the cache grows
+    past `max_entries`.
+    """
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Returns the cached vectors for the given keys and marks them as recently used."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            try:
+                conn = self._connect()
+                unique = list(dict.fromkeys(keys))
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(unique), 500):
+                    batch = unique[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    for key, vector in conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch):
+                        found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+                if found:
+                    now = time.time_ns()
+                    with conn:
+                        conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            except sqlite3.Error as e:
+                print(f"Embedding cache read failed: {e}")
+        return found
+
+    def put_many(self, entries: Dict[bytes, List[float]]):
+        """Stores new vectors, evicting the least recently used ones beyond max_entries."""
+        if not entries:
+            return
+        now = time.time_ns()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in entries.items()]
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+                    excess = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        conn.execute("DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,))
+            except sqlite3.Error as e:
+                print(f"Embedding cache write failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,107 @@
+# python_backend/context_engine/embedding_pipeline.py
+import time
+import threading
+from typing import List, Optional
+from .embedding_cache import EmbeddingCache, content_key, normalize_text
+from .embedding_providers import EmbeddingProvider, create_provider
+
+class EmbeddingStats:
+    """Running totals used to report pipeline throughput."""
+    def __init__(self):
+        self.chunks = 0
+        self.tokens = 0
+        self.failed_chunks = 0
+        self.cache_hits = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, chunks: int, tokens: int, failed: int, cache_hits: int, seconds: float):
+        with self._lock:
+            self.chunks += chunks
+            self.tokens += tokens
+            self.failed_chunks += failed
+            self.cache_hits += cache_hits
+            self.seconds += seconds
+
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "tokens": self.tokens,
+            "failed_chunks": self.failed_chunks,
+            "cache_hits": self.cache_hits,
+            "chunks_per_second": round(self.chunks_per_second(), 2),
+        }
+
+class EmbeddingPipeline:
+    """
+    Front door for every embedding in the backend (code chunks, search
+    queries, conversation messages). Texts are normalized, looked up in a
+    content-addressed EmbeddingCache, and only the misses are sent to the
+    configured EmbeddingProvider, identical texts once. A provider failure
+    leaves None in place of the affected embeddings instead of failing the
+    whole call.
+    """
+    def __init__(self, provider: EmbeddingProvider | None = None, cache: EmbeddingCache | None = None):
+        self.provider = provider if provider is not None else create_provider()
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.stats = EmbeddingStats()
+
+    @property
+    def model(self) -> str:
+        return self.provider.model
+
+    def available(self) -> bool:
+        return self.provider.available()
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[Optional[List[float]]]:
+        """
+        Returns one embedding per input text, in order; None marks inputs that
+        could not be embedded. `token_counts` can be passed when the caller has
+        already tokenized the texts.
+        """
+        if not texts:
+            return []
+        start = time.perf_counter()
+        inputs = [normalize_text(text) for text in texts]
+        keys = [content_key(self.model, text) for text in inputs]
+        cached = self.cache.get_many(keys)
+        results: List[Optional[List[float]]] = [cached.get(key) for key in keys]
+
+        # Identical texts are embedded once
+        pending: dict = {}
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                pending.setdefault(key, []).append(i)
+        if not pending:
+            self.stats.record(0, 0, 0, len(texts), time.perf_counter() - start)
+            return results
+
+        misses = [indices[0] for indices in pending.values()]
+        miss_counts = [token_counts[i] for i in misses] if token_counts is not None else None
+        embeddings = self.provider.embed([inputs[i] for i in misses], miss_counts)
+        fresh = {}
+        for i, embedding in zip(misses, embeddings):
+            if embedding is None:
+                continue
+            fresh[keys[i]] = embedding
+            for j in pending[keys[i]]:
+                results[j] = embedding
+        self.cache.put_many(fresh)
+
+        elapsed = time.perf_counter() - start
+        failed = len(misses) - len(fresh)
+        self.stats.record(len(fresh), sum(miss_counts) if miss_counts else 0, failed, len(texts) - len(misses), elapsed)
+        if len(misses) > 1:
+            rate = len(fresh) / elapsed if elapsed else 0.0
+            print(f"Embedded {len(fresh)}/{len(misses)} new chunks ({len(texts) - len(misses)} cached) with {self.model}, "
+                  f"{elapsed:.2f}s ({rate:.1f} chunks/s, {self.provider.retries} retries so far).")
+        return results
+
+    def embed_one(self, text: str) -> Optional[List[float]]:
+        return self.embed([text])[0]
+
+# A single, shared instance of the pipeline
+embedding_pipeline = EmbeddingPipeline()
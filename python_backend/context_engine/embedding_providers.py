@@ -0,0 +1,257 @@
+# python_backend/context_engine/embedding_providers.py
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import openai
+from .tokenization import get_tokenizer
+
+# Per-request limits: the API rejects inputs above 8191 tokens and requests above ~300k tokens / 2048 inputs
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "100000"))
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "512"))
+# Requests in flight across every caller (watcher, sessions, initial scans)
+MAX_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+REQUEST_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+LOCAL_WORKERS = int(os.getenv("LOCAL_EMBEDDING_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+# Lazy loading for sentence_transformers
+SentenceTransformer = None
+
+def _lazy_load_transformer():
+    global SentenceTransformer
+    if SentenceTransformer is None:
+        try:
+            from sentence_transformers import SentenceTransformer as STransformer
+            SentenceTransformer = STransformer
+        except ImportError:
+            raise RuntimeError("SentenceTransformer is not installed. Please `pip install sentence-transformers`.")
+    return SentenceTransformer
+
+class EmbeddingProvider:
+    """
+    Interface for embedding backends. `embed` returns one vector per input,
+    in order, with None for inputs that could not be embedded; `model` names
+    the vector space (it keys the embedding cache and the Chroma collection).
+    """
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.dimension: Optional[int] = None # learnt from the first accepted batch
+        self.requests = 0
+        self.retries = 0
+
+    def available(self) -> bool:
+        """Whether the backend can run here (credentials, installed packages)."""
+        return True
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[Optional[List[float]]]:
+        raise NotImplementedError
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds through the OpenAI API in token-capped batches. Batches run
+    concurrently on a shared executor, a semaphore bounds the requests in
+    flight process-wide, and rate limits (429), server errors (5xx) and
+    connection failures are retried with exponential backoff and jitter,
+    honouring Retry-After. One pooled client is reused for every request.
+    A batch whose vectors do not match the model's dimension is rejected.
+    """
+    name = "openai"
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        super().__init__(model)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="embed")
+
+    def available(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    def _get_client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    # Retries are handled here, so the SDK's own retry loop is disabled
+                    self._client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, timeout=REQUEST_TIMEOUT)
+        return self._client
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[Optional[List[float]]]:
+        inputs, token_counts = self._truncate(texts, token_counts)
+        batches = self._batches(token_counts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        futures = [self._executor.submit(self._embed_batch, [inputs[i] for i in batch]) for batch in batches]
+        for batch, future in zip(batches, futures):
+            embeddings = future.result()
+            if embeddings is not None:
+                for i, embedding in zip(batch, embeddings):
+                    results[i] = embedding
+        return results
+
+    def _truncate(self, texts: List[str], token_counts: Optional[List[int]]):
+        # The tokenizer is only loaded when a count is missing or a chunk needs cutting
+        tokenizer = None
+        inputs = []
+        counts = []
+        for i, text in enumerate(texts):
+            count = token_counts[i] if token_counts is not None else None
+            if count is None or count > MAX_INPUT_TOKENS:
+                tokenizer = tokenizer or get_tokenizer()
+                tokens = tokenizer.encode(text)
+                count = len(tokens)
+            if count > MAX_INPUT_TOKENS:
+                # Over-long chunks would fail the whole request; embed their head instead
+                text = tokenizer.decode(tokens[:MAX_INPUT_TOKENS])
+                count = MAX_INPUT_TOKENS
+            inputs.append(text)
+            counts.append(count)
+        return inputs, counts
+
+    @staticmethod
+    def _batches(token_counts: List[int]) -> List[List[int]]:
+        """Groups input indices into batches capped by token count and input count."""
+        batches = []
+        current, current_tokens = [], 0
+        for i, count in enumerate(token_counts):
+            if current and (current_tokens + count > MAX_BATCH_TOKENS or len(current) >= MAX_BATCH_SIZE):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += count
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, inputs: List[str]):
+        attempt = 0
+        while True:
+            try:
+                self.requests += 1
+                with self._semaphore:
+                    response = self._get_client().embeddings.create(model=self.model, input=inputs)
+                embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                return embeddings if self._check_dimensions(embeddings, len(inputs)) else None
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                error = e
+            except openai.APIStatusError as e:
+                if e.status_code < 500:
+                    print(f"Embedding request rejected ({e.status_code}): {e}")
+                    return None
+                error = e
+            except openai.OpenAIError as e:
+                print(f"Embedding request failed: {e}") # e.g. missing credentials
+                return None
+
+            if attempt >= MAX_RETRIES:
+                print(f"Embedding batch failed after {attempt} retries: {error}")
+                return None
+            time.sleep(self._backoff(attempt, error))
+            attempt += 1
+            self.retries += 1
+
+    def _check_dimensions(self, embeddings: List[List[float]], expected: int) -> bool:
+        """
+        Accepts a batch only whole: one vector per input, all of the model's
+        dimension. A mismatched vector would otherwise end up in the cache
+        and the Chroma collection, which hold a single dimension per model.
+        """
+        if len(embeddings) != expected:
+            print(f"Embedding batch rejected: {len(embeddings)} vectors for {expected} inputs from {self.model}")
+            return False
+        dimensions = {len(embedding) for embedding in embeddings}
+        with self._client_lock:
+            if self.dimension is None and len(dimensions) == 1:
+                self.dimension = next(iter(dimensions))
+        if dimensions != {self.dimension}:
+            print(f"Embedding batch rejected: expected {self.dimension}-dimensional vectors from {self.model}, got {sorted(dimensions)}")
+            return False
+        return True
+
+    @staticmethod
+    def _backoff(attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+        return min(0.5 * 2 ** attempt, 30.0) * (0.5 + random.random() / 2)
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds on the local CPU with a sentence-transformers model, so indexing
+    and search work offline. Inputs are sorted by length and cut into
+    fixed-size batches, so each batch is padded only to the length of
+    similar inputs, and batches run on a small worker pool (the model
+    releases the GIL during inference).
+    """
+    name = "local"
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, batch_size: int = LOCAL_BATCH_SIZE, workers: int = LOCAL_WORKERS):
+        super().__init__(model)
+        self.batch_size = batch_size
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="local-embed")
+
+    def available(self) -> bool:
+        try:
+            _lazy_load_transformer()
+            return True
+        except RuntimeError:
+            return False
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    print("Lazy loading embedding model...")
+                    self._model = _lazy_load_transformer()(self.model, device="cpu")
+                    print("Embedding model loaded.")
+        return self._model
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[Optional[List[float]]]:
+        model = self._get_model()
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        futures = [self._executor.submit(self._embed_batch, model, [texts[i] for i in batch]) for batch in batches]
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, future in zip(batches, futures):
+            embeddings = future.result()
+            if embeddings is not None:
+                for i, embedding in zip(batch, embeddings):
+                    results[i] = embedding
+        return results
+
+    def _embed_batch(self, model, inputs: List[str]):
+        self.requests += 1
+        try:
+            return model.encode(inputs, batch_size=len(inputs), convert_to_numpy=True, show_progress_bar=False).tolist()
+        except Exception as e:
+            print(f"Local embedding batch failed: {e}")
+            return None
+
+def create_provider(name: str | None = None) -> EmbeddingProvider:
+    """
+    Builds the provider selected by `name` or EMBEDDING_PROVIDER: "openai",
+    "local", or "auto" (the default), which uses OpenAI when an API key is
+    set and the local model otherwise.
+    """
+    name = (name or os.getenv("EMBEDDING_PROVIDER", "auto")).lower()
+    if name == "auto":
+        name = "openai" if os.getenv("OPENAI_API_KEY") else "local"
+    if name == "openai":
+        return OpenAIEmbeddingProvider(os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"))
+    if name == "local":
+        return LocalEmbeddingProvider()
+    raise ValueError(f"Unknown embedding provider: {name}")
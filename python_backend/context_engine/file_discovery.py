@@ -7,16 +7,33 @@ SUPPORTED_EXTENSIONS = {
     '.go', '.rs', '.php', '.rb', '.sql', '.txt'
 }
 
+def load_ignore_spec(start_path: str):
+    """Loads the top-level .gitignore of a directory, or returns None if there is none."""
+    gitignore_path = os.path.join(start_path, '.gitignore')
+    if os.path.exists(gitignore_path):
+        with open(gitignore_path, 'r') as f:
+            return pathspec.PathSpec.from_lines('gitwildmatch', f.readlines())
+    return None
+
+def is_discoverable(file_path: str, start_path: str, spec=None) -> bool:
+    """
+    Applies the same filters as discover_files to a single path, e.g. one
+    reported by the file watcher.
+    """
+    relative_path = os.path.relpath(file_path, start_path)
+    if relative_path.startswith('..') or '.git' in relative_path.split(os.sep):
+        return False
+    if spec and spec.match_file(relative_path):
+        return False
+    _, ext = os.path.splitext(file_path)
+    return ext.lower() in SUPPORTED_EXTENSIONS
+
 def discover_files(start_path: str):
     """
     Recursively discovers files in a directory, respecting a top-level .gitignore file.
     Yields paths for supported files that are not ignored.
     """
-    gitignore_path = os.path.join(start_path, '.gitignore')
-    spec = None
-    if os.path.exists(gitignore_path):
-        with open(gitignore_path, 'r') as f:
-            spec = pathspec.PathSpec.from_lines('gitwildmatch', f.readlines())
+    spec = load_ignore_spec(start_path)
 
     for root, dirs, files in os.walk(start_path, topdown=True):
         # Prune ignored directories
@@ -0,0 +1,180 @@
+# python_backend/context_engine/file_watcher.py
+import os
+import asyncio
+from typing import Dict, List, Set, Tuple
+from .file_discovery import load_ignore_spec, is_discoverable, discover_files
+from .codebase_index import CodebaseIndex, PARSABLE_EXTENSIONS
+from .index_registry import index_registry
+
+# Lazy loading for watchfiles (inotify/FSEvents/ReadDirectoryChangesW); falls back to polling
+awatch = None
+
+def _lazy_load_awatch():
+    global awatch
+    if awatch is None:
+        try:
+            from watchfiles import awatch as _awatch
+            awatch = _awatch
+        except ImportError:
+            print("Warning: watchfiles is not installed; falling back to polling for file changes (pip install watchfiles)")
+            return None
+    return awatch
+
+class FileWatcher:
+    """
+    Watches a project root and keeps its shared CodebaseIndex and the Chroma
+    vector store in sync with edits on disk. Bursts of saves are debounced into
+    one batch, only the touched files are re-indexed, and every subscribed
+    session receives an `index_updated` message. Files the symbol parser
+    skips (every supported extension but .py) still refresh the vector store.
+    """
+    def __init__(self, project_root: str, codebase_index: CodebaseIndex,
+                 debounce_ms: int = 300, poll_interval: float = 2.0, use_polling: bool = False):
+        self.project_root = os.path.abspath(project_root)
+        self.codebase_index = codebase_index
+        self.debounce_ms = debounce_ms
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or os.getenv("INDEX_WATCHER") == "poll"
+        self.subscribers: Set = set()
+        self._vector_store = None
+        self._unparsed_mtimes: Dict[str, int] | None = None # polling only
+        self._task: asyncio.Task | None = None
+        self._stop_event = asyncio.Event()
+
+    def start(self):
+        """Starts watching in a background task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stop_event.clear()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Stops the background task."""
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        watch = None if self.use_polling else _lazy_load_awatch()
+        if watch is not None:
+            try:
+                await self._watch_events(watch)
+                return
+            except (OSError, RuntimeError) as e:
+                # e.g. the inotify watch limit was reached
+                print(f"File watcher falling back to polling: {e}")
+        await self._poll()
+
+    async def _watch_events(self, watch):
+        spec = load_ignore_spec(self.project_root)
+        async for changes in watch(self.project_root, debounce=self.debounce_ms, stop_event=self._stop_event):
+            paths = {path for _, path in changes if is_discoverable(path, self.project_root, spec)}
+            if paths:
+                stats = await asyncio.to_thread(self.codebase_index.index_paths, list(paths))
+                unparsed = [p for p in paths if not _is_parsable(p)]
+                changed = [p for p in unparsed if os.path.isfile(p)]
+                await self._publish(_with_unparsed(stats, changed, [p for p in unparsed if p not in changed]))
+
+    async def _poll(self):
+        # index_directory only stats unchanged files, so a poll is cheap
+        await asyncio.to_thread(self._scan_unparsed)
+        while not self._stop_event.is_set():
+            await asyncio.sleep(self.poll_interval)
+            stats = await asyncio.to_thread(self.codebase_index.index_directory, self.project_root)
+            changed, removed = await asyncio.to_thread(self._scan_unparsed)
+            await self._publish(_with_unparsed(stats, changed, removed))
+
+    def _scan_unparsed(self) -> Tuple[List[str], List[str]]:
+        """Stats the files index_directory skips; returns those changed and removed since the last poll."""
+        mtimes = {}
+        for file_path in discover_files(self.project_root):
+            if not _is_parsable(file_path):
+                try:
+                    mtimes[file_path] = os.stat(file_path).st_mtime_ns
+                except OSError:
+                    continue
+        previous, self._unparsed_mtimes = self._unparsed_mtimes, mtimes
+        if previous is None:
+            return [], [] # the first poll only records the baseline
+        changed = [p for p, mtime in mtimes.items() if previous.get(p) != mtime]
+        removed = [p for p in previous if p not in mtimes]
+        return changed, removed
+
+    async def _publish(self, stats: dict):
+        changed_files = stats.get("changed_files", [])
+        removed_files = stats.get("removed_files", [])
+        if not changed_files and not removed_files:
+            return
+
+        try:
+            await asyncio.to_thread(self._update_vector_store, changed_files, removed_files)
+        except Exception as e:
+            print(f"Error updating vector store: {e}")
+
+        data = {
+            "parsed": stats["parsed"],
+            "removed": stats["removed"],
+            "changed_files": [os.path.relpath(p, self.project_root) for p in changed_files],
+            "removed_files": [os.path.relpath(p, self.project_root) for p in removed_files],
+        }
+        for state in list(self.subscribers):
+            try:
+                await state.send_message("index_updated", data)
+            except Exception:
+                continue # A disconnecting client must not stop updates for the others
+
+    def _update_vector_store(self, changed_files: list, removed_files: list):
+        if self._vector_store is None:
+            from .vector_store import get_vector_store
+            self._vector_store = get_vector_store()
+        for file_path in removed_files:
+            self._vector_store.remove_file(file_path)
+        for file_path in changed_files:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            self._vector_store.update_file(file_path, content)
+
+def _is_parsable(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in PARSABLE_EXTENSIONS
+
+def _with_unparsed(stats: dict, changed: List[str], removed: List[str]) -> dict:
+    """Adds files only the vector store tracks to an index_paths/index_directory result."""
+    if not changed and not removed:
+        return stats
+    return dict(stats, changed_files=stats.get("changed_files", []) + changed,
+                removed_files=stats.get("removed_files", []) + removed)
+
+class WatcherRegistry:
+    """
+    Runs one FileWatcher per project root, shared by every session on that root,
+    mirroring how index_registry shares the CodebaseIndex itself.
+    """
+    def __init__(self):
+        self._watchers: Dict[str, FileWatcher] = {}
+
+    def subscribe(self, state):
+        """Starts (or joins) the watcher for a session's project root."""
+        key = os.path.realpath(state.project_root)
+        watcher = self._watchers.get(key)
+        if watcher is None:
+            watcher = FileWatcher(state.project_root, index_registry.writable_index(state.project_root))
+            self._watchers[key] = watcher
+        watcher.subscribers.add(state)
+        watcher.start()
+
+    def unsubscribe(self, state):
+        """Removes a session; the watcher stops once no session is left."""
+        key = os.path.realpath(state.project_root)
+        watcher = self._watchers.get(key)
+        if watcher is None:
+            return
+        watcher.subscribers.discard(state)
+        if not watcher.subscribers:
+            watcher.stop()
+            del self._watchers[key]
+
+# A single, shared instance of the registry
+watcher_registry = WatcherRegistry()
@@ -0,0 +1,116 @@
+# python_backend/context_engine/index_registry.py
+import os
+import threading
+from typing import Dict, List, Tuple
+from .codebase_index import CodebaseIndex
+from .index_snapshot import snapshot_path_for
+
+class IndexView:
+    """
+    A session's read-only handle on a shared CodebaseIndex. It offers the
+    queries only: indexing goes through IndexRegistry.index_directory or the
+    file watcher, so no session can change the index under another one.
+    Each query holds the index lock, so it sees either the whole of a
+    concurrent update or none of it.
+    """
+    def __init__(self, index: CodebaseIndex):
+        self._index = index
+
+    def is_indexed(self) -> bool:
+        return self._index.is_indexed()
+
+    def has_file(self, file_path: str) -> bool:
+        return self._index.has_file(file_path)
+
+    def file_count(self) -> int:
+        return self._index.file_count()
+
+    def call_graph_size(self) -> Tuple[int, int]:
+        """The number of functions and call edges in the call graph."""
+        with self._index._lock:
+            return self._index.call_graph.number_of_nodes(), self._index.call_graph.number_of_edges()
+
+    def file_digests(self) -> List[Tuple[str, str]]:
+        """(path, content digest) of every indexed file, sorted."""
+        with self._index._lock:
+            return sorted((path, fingerprint.digest) for path, fingerprint in self._index.fingerprints.items())
+
+    def get_ast(self, file_path: str):
+        return self._index.get_ast(file_path)
+
+    def get_impacted_functions(self, target_file: str, target_function: str) -> list:
+        return self._index.get_impacted_functions(target_file, target_function)
+
+    def get_impacted_functions_batch(self, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], list]:
+        return self._index.get_impacted_functions_batch(targets)
+
+    def search_symbols(self, search_type: str, name: str, mode: str = "exact", limit: int = 50) -> List[dict]:
+        return self._index.search_symbols(search_type, name, mode, limit)
+
+    def search_text(self, query: str, k: int = 10) -> List[dict]:
+        return self._index.search_text(query, k)
+
+class IndexRegistry:
+    """
+    Shares a single CodebaseIndex per project root across all sessions in the process.
+    Indexes are reference-counted: the first session to acquire a root creates it
+    (restoring the last snapshot if one exists), later sessions reuse the
+    already-built index, and it is dropped once the last session releases it.
+    Sessions only get an IndexView; updates go through `index_directory`
+    or the file watcher (`writable_index`).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, CodebaseIndex] = {}
+        self._refcounts: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(project_root: str) -> str:
+        return os.path.realpath(project_root)
+
+    def acquire(self, project_root: str) -> IndexView:
+        """Returns a read-only view of the shared index for a project root, creating it on first use."""
+        key = self._key(project_root)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                # Start from the on-disk snapshot when one exists; the initial scan revalidates it
+                index = CodebaseIndex(snapshot_path=snapshot_path_for(key))
+                index.load_snapshot()
+                self._indexes[key] = index
+            self._refcounts[key] = self._refcounts.get(key, 0) + 1
+            return IndexView(index)
+
+    def writable_index(self, project_root: str) -> CodebaseIndex:
+        """The shared index itself, for the file watcher; the root must be acquired."""
+        with self._lock:
+            return self._indexes[self._key(project_root)]
+
+    def index_directory(self, project_root: str, directory_path: str | None = None) -> dict:
+        """(Re)indexes a directory (the project root by default) into the root's shared index."""
+        return self.writable_index(project_root).index_directory(directory_path or project_root)
+
+    def release(self, project_root: str):
+        """
+        Drops one reference to a project root's index, freeing it when unused.
+        The last release writes the index's snapshot, so call it off the event loop;
+        the write happens after the registry lock is released.
+        """
+        key = self._key(project_root)
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] > 0:
+                return
+            del self._refcounts[key]
+            index = self._indexes.pop(key)
+        index.flush_snapshot()
+
+    def active_roots(self) -> List[str]:
+        """Lists the project roots that currently have a shared index."""
+        with self._lock:
+            return list(self._indexes.keys())
+
+# A single, shared instance of the registry
+index_registry = IndexRegistry()
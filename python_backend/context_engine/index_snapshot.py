@@ -0,0 +1,151 @@
+# python_backend/context_engine/index_snapshot.py
+import os
+import sqlite3
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+# Bump whenever the schema or the meaning of the stored records changes;
+# snapshots with a different version are ignored and rebuilt from scratch.
+SNAPSHOT_VERSION = 4
+
+INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR", ".index_cache")
+
+_SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE symbols (
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start_line INTEGER,
+    end_line INTEGER,
+    parent INTEGER NOT NULL
+);
+CREATE TABLE calls (
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    callee TEXT NOT NULL,
+    line INTEGER
+);
+CREATE TABLE imports (
+    file_id INTEGER NOT NULL,
+    local_name TEXT NOT NULL,
+    module TEXT,
+    attr TEXT,
+    level INTEGER NOT NULL
+);
+CREATE TABLE chunks (
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    start_line INTEGER,
+    end_line INTEGER,
+    terms TEXT NOT NULL
+);
+"""
+
+def snapshot_path_for(project_root: str) -> str:
+    """Returns the snapshot file used for a given project root."""
+    root_key = hashlib.blake2b(os.path.realpath(project_root).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(INDEX_CACHE_DIR, f"index_{root_key}.db")
+
+def save_snapshot(path: str, fingerprints: dict, file_symbols: Dict[str, list], file_imports: Dict[str, tuple], file_chunks: Dict[str, list]):
+    """
+    Writes a complete snapshot of fingerprints, Symbol lists, import records
+    and lexical chunk records to a temporary
+    file and atomically swaps it in, so a crash mid-write never leaves a
+    corrupt snapshot behind.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(_SCHEMA)
+        with conn:
+            files, symbols, calls, imports, chunks = [], [], [], [], []
+            for file_id, (file_path, fp) in enumerate(fingerprints.items()):
+                files.append((file_id, file_path, fp.mtime_ns, fp.size, fp.digest))
+                for position, symbol in enumerate(file_symbols.get(file_path, ())):
+                    symbols.append((file_id, position, symbol.name, symbol.kind, symbol.start_line, symbol.end_line, symbol.parent))
+                    calls.extend((file_id, position, callee, line) for callee, line in symbol.calls)
+                imports.extend((file_id,) + tuple(record) for record in file_imports.get(file_path, ()))
+                for position, (chunk_type, name, start_line, end_line, terms) in enumerate(file_chunks.get(file_path, ())):
+                    # Terms are identifiers, so "term:count" pairs joined by spaces are unambiguous
+                    encoded = " ".join(f"{term}:{count}" for term, count in terms)
+                    chunks.append((file_id, position, chunk_type, name, start_line, end_line, encoded))
+            conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", files)
+            conn.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?)", symbols)
+            conn.executemany("INSERT INTO calls VALUES (?, ?, ?, ?)", calls)
+            conn.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)", imports)
+            conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)", chunks)
+        conn.execute(f"PRAGMA user_version = {SNAPSHOT_VERSION}")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+def load_snapshot(path: str) -> Optional[Tuple[dict, Dict[str, List[tuple]], Dict[str, List[tuple]], Dict[str, List[tuple]]]]:
+    """
+    Reads a snapshot back into (fingerprints, file_symbols, file_imports,
+    file_chunks), where file_symbols maps each path to (name, kind,
+    start_line, end_line, parent, calls) records, file_imports to
+    (local_name, module, attr, level) records and file_chunks to
+    (type, name, start_line, end_line, terms) lexical-index records.
+    Returns None if the file is missing, unreadable or from another snapshot version.
+    """
+    from .codebase_index import FileFingerprint
+
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        conn.execute("PRAGMA mmap_size = 268435456")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SNAPSHOT_VERSION:
+            return None
+
+        paths = {}
+        fingerprints = {}
+        for file_id, file_path, mtime_ns, size, digest in conn.execute("SELECT id, path, mtime_ns, size, digest FROM files"):
+            paths[file_id] = file_path
+            fingerprints[file_path] = FileFingerprint(mtime_ns, size, digest)
+
+        calls: Dict[Tuple[int, int], list] = {}
+        for file_id, position, callee, line in conn.execute("SELECT file_id, position, callee, line FROM calls"):
+            calls.setdefault((file_id, position), []).append((callee, line))
+
+        file_symbols: Dict[str, List[tuple]] = {}
+        rows = conn.execute("SELECT file_id, position, name, kind, start_line, end_line, parent FROM symbols ORDER BY file_id, position")
+        for file_id, position, name, kind, start_line, end_line, parent in rows:
+            record = (name, kind, start_line, end_line, parent, tuple(calls.get((file_id, position), ())))
+            file_symbols.setdefault(paths[file_id], []).append(record)
+
+        file_imports: Dict[str, List[tuple]] = {}
+        for file_id, local_name, module, attr, level in conn.execute("SELECT file_id, local_name, module, attr, level FROM imports"):
+            file_imports.setdefault(paths[file_id], []).append((local_name, module, attr, level))
+
+        file_chunks: Dict[str, List[tuple]] = {}
+        rows = conn.execute("SELECT file_id, type, name, start_line, end_line, terms FROM chunks ORDER BY file_id, position")
+        for file_id, chunk_type, name, start_line, end_line, encoded in rows:
+            terms = tuple((term, int(count)) for term, _, count in (pair.rpartition(":") for pair in encoded.split()))
+            file_chunks.setdefault(paths[file_id], []).append((chunk_type, name, start_line, end_line, terms))
+        return fingerprints, file_symbols, file_imports, file_chunks
+    except (sqlite3.Error, KeyError):
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,197 @@
+# python_backend/context_engine/lexical_index.py
+import re
+import math
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Trigram expansion of query terms that are not in the vocabulary
+MIN_TRIGRAM_SIMILARITY = 0.4
+MAX_EXPANSIONS = 3
+# A chunk whose own name (class or function) is in the query gets this many
+# times the query's total idf on top, so definitions outrank their callers
+NAME_MATCH_BONUS = 2.0
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from how i in is it of on or that the this to was what where which who why with
+self cls def return if else elif none true false not pass import class async await lambda
+""".split())
+
+def code_terms(text: str) -> List[str]:
+    """
+    Splits code or a query into lowercase search terms: every identifier as a
+    whole plus its snake_case and camelCase parts, so `UserManager` yields
+    `usermanager`, `user` and `manager`.
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        whole = identifier.lower()
+        if whole not in _STOPWORDS:
+            terms.append(whole)
+        parts = [p.lower() for segment in identifier.split("_") for p in _CAMEL_PARTS.findall(segment)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if len(p) > 1 and p not in _STOPWORDS)
+    return terms
+
+def chunk_term_records(chunks: List[dict]) -> List[tuple]:
+    """
+    Turns chunks from tokenization.chunk_content_by_ast into compact
+    (type, name, start_line, end_line, ((term, count), ...)) records, so the
+    chunk text itself never has to be kept in memory.
+    """
+    records = []
+    for chunk in chunks:
+        counts = Counter(code_terms(chunk["content"] or ""))
+        records.append((chunk["type"], chunk["name"], chunk["start_line"], chunk["end_line"], tuple(counts.items())))
+    return records
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def reciprocal_rank_fusion(rankings: Iterable[List[tuple]], k: int = 60) -> List[Tuple[tuple, float]]:
+    """
+    Fuses several rankings of hashable keys: each key scores the sum of
+    1 / (k + rank) over the rankings it appears in. Returns (key, score) pairs,
+    best first.
+    """
+    scores: Dict[tuple, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class LexicalIndex:
+    """
+    An in-process BM25 index over code chunks, maintained per file alongside
+    the symbol table. Identifier queries such as `UserManager` are answered
+    from the postings directly, and query terms missing from the vocabulary
+    (typos, partial names) are expanded through a trigram index to the
+    closest indexed terms.
+    """
+    def __init__(self):
+        # chunk id -> (file_path, type, name, start_line, end_line, length, terms)
+        self._chunks: Dict[int, tuple] = {}
+        self._file_chunks: Dict[str, List[int]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._trigram_terms: Dict[str, Set[str]] = {}
+        self._next_id = 0
+        self._total_length = 0
+
+    def set_file(self, file_path: str, records: List[tuple]):
+        """Replaces a file's chunks with (type, name, start_line, end_line, terms) records."""
+        self.remove_file(file_path)
+        chunk_ids = []
+        for chunk_type, name, start_line, end_line, terms in records:
+            chunk_id = self._next_id
+            self._next_id += 1
+            terms = tuple(terms)
+            length = sum(count for _, count in terms)
+            self._chunks[chunk_id] = (file_path, chunk_type, name, start_line, end_line, length, terms)
+            self._total_length += length
+            for term, count in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    for trigram in _trigrams(term):
+                        self._trigram_terms.setdefault(trigram, set()).add(term)
+                postings[chunk_id] = count
+            chunk_ids.append(chunk_id)
+        if chunk_ids:
+            self._file_chunks[file_path] = chunk_ids
+
+    def remove_file(self, file_path: str):
+        for chunk_id in self._file_chunks.pop(file_path, ()):
+            _, _, _, _, _, length, terms = self._chunks.pop(chunk_id)
+            self._total_length -= length
+            for term, _ in terms:
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+                    for trigram in _trigrams(term):
+                        terms_with_trigram = self._trigram_terms.get(trigram)
+                        if terms_with_trigram is not None:
+                            terms_with_trigram.discard(term)
+                            if not terms_with_trigram:
+                                del self._trigram_terms[trigram]
+
+    def clear(self):
+        self._chunks.clear()
+        self._file_chunks.clear()
+        self._postings.clear()
+        self._trigram_terms.clear()
+        self._total_length = 0
+
+    def records_for(self, file_path: str) -> List[tuple]:
+        """Returns a file's chunk records in the form set_file accepts (used for snapshots)."""
+        return [self._chunks[chunk_id][1:5] + (self._chunks[chunk_id][6],) for chunk_id in self._file_chunks.get(file_path, ())]
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Maps a query term to (indexed term, weight) pairs."""
+        if term in self._postings:
+            return [(term, 1.0)]
+        if len(term) < 3:
+            return []
+        query_trigrams = _trigrams(term)
+        shared: Counter = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigram_terms.get(trigram, ()))
+        scored = []
+        for candidate, overlap in shared.items():
+            similarity = overlap / (len(query_trigrams) + len(candidate) + 1 - overlap)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scored.append((candidate, similarity))
+        return heapq.nlargest(MAX_EXPANSIONS, scored, key=lambda item: item[1])
+
+    def search(self, query: str, k: int = 10) -> List[dict]:
+        """Returns the k best-scoring chunks for a query, as metadata dicts with a `score`."""
+        if not self._chunks:
+            return []
+        query_terms = Counter(code_terms(query))
+        if not query_terms:
+            return []
+        # Name matches only count for code-like tokens, not plain English words in a sentence
+        identifiers = _IDENTIFIER.findall(query)
+        names = {i.lower() for i in identifiers if len(identifiers) == 1 or "_" in i or not i.islower()}
+
+        n = len(self._chunks)
+        average_length = self._total_length / n or 1.0
+        scores: Dict[int, float] = {}
+        total_idf = 0.0
+        for query_term, query_count in query_terms.items():
+            for term, weight in self._expand(query_term):
+                postings = self._postings[term]
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                term_weight = weight * query_count * idf
+                total_idf += term_weight
+                for chunk_id, tf in postings.items():
+                    length = self._chunks[chunk_id][5]
+                    score = term_weight * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+
+        for chunk_id in scores:
+            if self._chunks[chunk_id][2].lower() in names:
+                scores[chunk_id] += NAME_MATCH_BONUS * total_idf
+
+        results = []
+        for chunk_id, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1]):
+            file_path, chunk_type, name, start_line, end_line, _, _ = self._chunks[chunk_id]
+            results.append({
+                "file_path": file_path,
+                "type": chunk_type,
+                "name": name,
+                "start_line": start_line,
+                "end_line": end_line,
+                "score": score,
+            })
+        return results
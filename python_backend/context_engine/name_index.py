@@ -0,0 +1,102 @@
+# python_backend/context_engine/name_index.py
+import bisect
+import difflib
+from typing import Dict, List, Tuple
+
+# Query kinds served by the index and the symbol kinds they match
+DEFINITION_KINDS = {"class": "class", "function": "function"}
+
+class NameIndex:
+    """
+    Inverted name -> locations index over a SymbolTable, kept up to date as
+    files are (re)indexed. Definitions are keyed by their own name and call
+    sites by the last component of their dotted target (`self.save()` and
+    `db.save()` are both calls to `save`), so lookups cost O(matches) instead
+    of a walk over every AST. Sorted name lists back prefix queries and are
+    rebuilt lazily after a change.
+    """
+    def __init__(self):
+        # name -> {file_id: [symbol positions]}, per definition kind
+        self._definitions: Dict[str, Dict[str, Dict[int, List[int]]]] = {kind: {} for kind in DEFINITION_KINDS.values()}
+        # name -> {file_id: [(caller position, line)]}
+        self._calls: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+        # file_id -> names it contributed, so a file can be dropped without a scan
+        self._file_names: Dict[int, Tuple[List[Tuple[str, str]], List[str]]] = {}
+        self._sorted: Dict[str, List[str]] = {}
+
+    def set_file(self, file_id: int, symbols: list):
+        """Replaces the entries of a file with those of its new Symbol list."""
+        self.remove_file(file_id)
+        definitions = []
+        calls = set()
+        for position, symbol in enumerate(symbols):
+            by_name = self._definitions.get(symbol.kind)
+            if by_name is not None:
+                by_name.setdefault(symbol.name, {}).setdefault(file_id, []).append(position)
+                definitions.append((symbol.kind, symbol.name))
+            for target, line in symbol.calls:
+                name = target.rsplit(".", 1)[-1]
+                self._calls.setdefault(name, {}).setdefault(file_id, []).append((position, line))
+                calls.add(name)
+        self._file_names[file_id] = (definitions, list(calls))
+        self._sorted.clear()
+
+    def remove_file(self, file_id: int):
+        names = self._file_names.pop(file_id, None)
+        if names is None:
+            return
+        definitions, calls = names
+        for kind, name in definitions:
+            self._discard(self._definitions[kind], name, file_id)
+        for name in calls:
+            self._discard(self._calls, name, file_id)
+        self._sorted.clear()
+
+    def clear(self):
+        for by_name in self._definitions.values():
+            by_name.clear()
+        self._calls.clear()
+        self._file_names.clear()
+        self._sorted.clear()
+
+    @staticmethod
+    def _discard(by_name: dict, name: str, file_id: int):
+        files = by_name.get(name)
+        if files is not None:
+            files.pop(file_id, None)
+            if not files:
+                del by_name[name]
+
+    def _names(self, search_type: str) -> dict:
+        if search_type == "calls":
+            return self._calls
+        return self._definitions[DEFINITION_KINDS[search_type]]
+
+    def match_names(self, search_type: str, name: str, mode: str = "exact", limit: int = 20) -> List[str]:
+        """
+        Returns the indexed names matching `name` for a `class`, `function` or
+        `calls` query. `mode` is "exact", "prefix" or "fuzzy" (closest names by
+        similarity ratio, best first).
+        """
+        by_name = self._names(search_type)
+        if mode == "exact":
+            return [name] if name in by_name else []
+        if mode == "prefix":
+            names = self._sorted.get(search_type)
+            if names is None:
+                names = sorted(by_name)
+                self._sorted[search_type] = names
+            start = bisect.bisect_left(names, name)
+            end = bisect.bisect_left(names, name + "\U0010ffff")
+            return names[start:min(end, start + limit)]
+        if mode == "fuzzy":
+            return difflib.get_close_matches(name, by_name.keys(), n=limit, cutoff=0.6)
+        raise ValueError(f"Unknown match mode: {mode}")
+
+    def definitions(self, search_type: str, name: str) -> Dict[int, List[int]]:
+        """Returns {file_id: [symbol positions]} of the definitions named `name`."""
+        return self._names(search_type).get(name, {}) if search_type != "calls" else {}
+
+    def call_sites(self, name: str) -> Dict[int, List[Tuple[int, int]]]:
+        """Returns {file_id: [(caller position, line)]} of the calls to `name`."""
+        return self._calls.get(name, {})
@@ -0,0 +1,146 @@
+# python_backend/context_engine/parse_worker.py
+import os
+import ast
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+from .tokenization import chunk_tree
+from .lexical_index import chunk_term_records
+
+# Below this many stale files the process pool costs more than it saves.
+PARALLEL_THRESHOLD = 64
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_DEFINITION_KINDS = {ast.ClassDef: "class", ast.FunctionDef: "function", ast.AsyncFunctionDef: "function"}
+
+def hash_content(data: bytes) -> str:
+    """Returns a short, stable digest of a file's raw bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """Turns `a.b.c` attribute chains rooted at a plain name into the string 'a.b.c'."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+def extract_symbols(tree: ast.AST) -> List[tuple]:
+    """
+    Collects (name, kind, start_line, end_line, parent, calls) records for every
+    class and function in a single pass over the tree. `parent` is the position
+    of the enclosing definition in the returned list (-1 at module level), and
+    each call site is attributed to its innermost enclosing function as a
+    (dotted_target, line) pair such as ('helper', 3), ('self.save', 8) or
+    ('os.path.join', 12).
+    """
+    symbols = []
+    # Iterative DFS so deeply nested expressions can't hit the recursion limit
+    # (children are pushed in reverse so definitions come out in source order).
+    stack = [(child, -1, -1) for child in reversed(list(ast.iter_child_nodes(tree)))]
+    while stack:
+        node, parent, owner = stack.pop()
+        kind = _DEFINITION_KINDS.get(type(node))
+        if kind:
+            position = len(symbols)
+            symbols.append((node.name, kind, node.lineno, node.end_lineno, parent, []))
+            parent = position
+            if kind == "function":
+                owner = position
+        elif isinstance(node, ast.Call) and owner >= 0:
+            target = _dotted_name(node.func)
+            if target:
+                symbols[owner][5].append((target, node.lineno))
+        stack.extend((child, parent, owner) for child in reversed(list(ast.iter_child_nodes(node))))
+    return [(name, kind, start, end, parent, tuple(calls)) for name, kind, start, end, parent, calls in symbols]
+
+def extract_imports(tree: ast.AST) -> List[tuple]:
+    """
+    Collects (local_name, module, attr, level) records for every import in a
+    file. `import a.b` binds ('a', 'a', None, 0), `import a.b as c` binds
+    ('c', 'a.b', None, 0) and `from ..m import f as g` binds ('g', 'm', 'f', 2).
+    """
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    imports.append((alias.asname, alias.name, None, 0))
+                else:
+                    top_level = alias.name.split(".")[0]
+                    imports.append((top_level, top_level, None, 0))
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name != "*":
+                    imports.append((alias.asname or alias.name, node.module, alias.name, node.level))
+    return imports
+
+def parse_file(file_path: str, known_digest: Optional[str] = None) -> Optional[tuple]:
+    """
+    Reads, hashes and parses one file, returning a compact record
+    (file_path, mtime_ns, size, digest, symbols, imports, chunks) instead of
+    the AST, where chunks are the lexical-index records of the file's
+    chunk_content_by_ast chunks. symbols, imports and chunks are None when
+    the content still matches known_digest.
+    Returns None if the file can't be read.
+    """
+    try:
+        stat_result = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        content = data.decode('utf-8')
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    digest = hash_content(data)
+    if digest == known_digest:
+        return (file_path, stat_result.st_mtime_ns, stat_result.st_size, digest, None, None, None)
+
+    try:
+        tree = ast.parse(content, filename=file_path)
+    except (SyntaxError, ValueError):
+        return (file_path, stat_result.st_mtime_ns, stat_result.st_size, digest, [], [], [])
+
+    chunks = chunk_term_records(chunk_tree(tree, content, file_path))
+    return (file_path, stat_result.st_mtime_ns, stat_result.st_size, digest, extract_symbols(tree), extract_imports(tree), chunks)
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _pool
+
+def shutdown_pool():
+    """Stops the shared worker processes, e.g. on server shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def parse_files(jobs: List[Tuple[str, Optional[str]]]) -> List[Optional[tuple]]:
+    """
+    Parses (file_path, known_digest) jobs, fanning out to a shared process pool
+    for large batches so throughput scales with the number of cores.
+    """
+    workers = os.cpu_count() or 1
+    if len(jobs) < PARALLEL_THRESHOLD or workers < 2:
+        return [parse_file(file_path, digest) for file_path, digest in jobs]
+
+    file_paths = [file_path for file_path, _ in jobs]
+    digests = [digest for _, digest in jobs]
+    chunksize = max(1, len(jobs) // (workers * 8))
+    try:
+        return list(_get_pool().map(parse_file, file_paths, digests, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); drop the pool and finish the batch in-process
+        shutdown_pool()
+        return [parse_file(file_path, digest) for file_path, digest in jobs]
@@ -0,0 +1,437 @@
+# python_backend/context_engine/reachability.py
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+import numpy as np
+
+# Memory for cached component closures and per-node answers, in bytes; least recently used entries go first
+REACHABILITY_CACHE_BYTES = int(os.getenv("REACHABILITY_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+def strongly_connected_components(n: int, indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    Iterative Tarjan over a CSR graph. Returns the component id of every node;
+    components are numbered in the order Tarjan completes them, so every edge
+    a -> b between different components satisfies component[b] < component[a].
+    """
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    index = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack: List[int] = []
+    counter = 0
+    next_component = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        work = [(root, indptr[root])]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, position = work[-1]
+            end = indptr[node + 1]
+            while position < end:
+                neighbour = indices[position]
+                position += 1
+                if index[neighbour] == -1:
+                    work[-1] = (node, position)
+                    index[neighbour] = lowlink[neighbour] = counter
+                    counter += 1
+                    stack.append(neighbour)
+                    on_stack[neighbour] = True
+                    work.append((neighbour, indptr[neighbour]))
+                    break
+                if on_stack[neighbour] and index[neighbour] < lowlink[node]:
+                    lowlink[node] = index[neighbour]
+            else:
+                work.pop()
+                if work and lowlink[node] < lowlink[work[-1][0]]:
+                    lowlink[work[-1][0]] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = next_component
+                        if member == node:
+                            break
+                    next_component += 1
+    return np.array(component, dtype=np.int64)
+
+class _SizedLRU:
+    """An LRU mapping bounded by the total `sizeof` of its values rather than by entry count."""
+    def __init__(self, budget: int, sizeof: Callable[[object], int]):
+        self.budget = budget
+        self.size = 0
+        self._sizeof = sizeof
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.pop(key)
+        self._entries[key] = value
+        self.size += self._sizeof(value)
+        while self.size > self.budget and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= self._sizeof(evicted)
+
+    def pop(self, key):
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.size -= self._sizeof(value)
+        return value
+
+    def items(self) -> List[tuple]:
+        return list(self._entries.items())
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ReachabilityIndex:
+    """
+    Answers "which nodes can reach this node" over the reversed call graph.
+
+    The graph is condensed into its strongly connected components, whose
+    reverse closure is memoized as integer bitsets (bit i = component i) and
+    filled in lazily, in topological order, for the part of the DAG a query
+    touches. Final answers are cached per node and survive graph edits: after
+    a batch of edge changes only the answers that contain, or belong to, a
+    changed callee are evicted (see invalidate). The condensation is patched
+    rather than rebuilt (see _update_condensation), and closures and answers
+    live in LRUs sharing `cache_bytes`, so deep graphs cannot grow them
+    towards the n² bits a full closure would take.
+    """
+    def __init__(self, cache_bytes: int = REACHABILITY_CACHE_BYTES):
+        self._answers = _SizedLRU(cache_bytes // 2, lambda answer: answer.nbytes + 112)
+        self._closure = _SizedLRU(cache_bytes // 2, lambda bits: bits.bit_length() // 8 + 32)
+        self._pending_edges: Set[Tuple[int, int]] = set()
+        self._reset_condensation()
+
+    def _reset_condensation(self):
+        self._component = None
+        # Topological position of each component id: DAG edges run from lower to higher; NaN once an id is merged away
+        self._order = None
+        self._next_component = 0
+        self._members_indptr = None
+        self._members = None
+        # Condensed reverse DAG both ways: component -> caller components, and component -> callee components
+        self._dag_indptr = None
+        self._dag_indices = None
+        self._dag_in_indptr = None
+        self._dag_in_indices = None
+        # Edges added to the DAG while _update_condensation reorders it, until the next _build_dag
+        self._extra_out: Dict[int, Set[int]] = {}
+        self._extra_in: Dict[int, Set[int]] = {}
+        self._closure.clear()
+        self._pending_edges.clear()
+
+    def clear(self):
+        self._answers.clear()
+        self._reset_condensation()
+
+    def invalidate(self, changed_edges: Iterable[Tuple[int, int]]):
+        """
+        Takes a batch of added or removed (caller, callee) edges. Drops the
+        cached answers they can affect: the ancestor set of w changes only if
+        the callee v of some changed edge is w itself or could already reach
+        w, i.e. v was in w's old answer. The edges are kept to patch the
+        condensation on the next query.
+        """
+        changed_edges = set(changed_edges)
+        if not changed_edges:
+            return
+        if self._component is not None:
+            self._pending_edges |= changed_edges
+        changed = np.fromiter({callee for _, callee in changed_edges}, dtype=np.int64)
+        changed_set = set(changed.tolist())
+        stale = [node for node, answer in self._answers.items()
+                 if node in changed_set or (answer.size and np.isin(answer, changed, assume_unique=True).any())]
+        for node in stale:
+            self._answers.pop(node)
+
+    def ancestors(self, node_id: int, n: int, indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Returns the sorted ids of every node that can reach `node_id` (excluding itself)."""
+        answer = self._answers.get(node_id)
+        if answer is not None:
+            return answer
+        if node_id >= n:
+            return np.empty(0, dtype=np.int64)
+        self._ensure_condensation(n, indptr, indices)
+
+        component = int(self._component[node_id])
+        closure = self._component_closure(component)
+        ancestor_components = self._bits_to_ids(closure)
+        starts = self._members_indptr[ancestor_components]
+        counts = self._members_indptr[ancestor_components + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        answer = self._members[offsets]
+        # Other members of a cycle reach this node too
+        own = self._members[self._members_indptr[component]:self._members_indptr[component + 1]]
+        if own.size > 1:
+            answer = np.concatenate([answer, own[own != node_id]])
+        answer = np.sort(answer)
+        self._answers.put(node_id, answer)
+        return answer
+
+    def _ensure_condensation(self, n: int, indptr: np.ndarray, indices: np.ndarray):
+        if self._component is None:
+            component = strongly_connected_components(n, indptr, indices)
+            num_components = int(component.max()) + 1 if n else 0
+            self._component = component
+            # Tarjan numbers callers before callees; the DAG runs callee -> caller
+            self._order = (num_components - 1 - np.arange(num_components)).astype(np.float64)
+            self._next_component = num_components
+            self._build_dag(n, indptr, indices)
+        elif self._pending_edges or n > len(self._component):
+            self._update_condensation(n, indptr, indices)
+
+    def _build_dag(self, n: int, indptr: np.ndarray, indices: np.ndarray, without: List[Tuple[int, int]] = ()):
+        """Rebuilds the member lists and both DAG directions, leaving out the (caller, callee) edges in `without`."""
+        component = self._component
+        self._extra_out, self._extra_in = {}, {}
+        num_components = self._next_component
+        self._members = np.argsort(component, kind='stable')
+        self._members_indptr = np.zeros(num_components + 1, dtype=np.int64)
+        np.cumsum(np.bincount(component, minlength=num_components), out=self._members_indptr[1:])
+
+        sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        pairs = np.stack([component[sources], component[indices]], axis=1) if indices.size else np.empty((0, 2), dtype=np.int64)
+        keep = pairs[:, 0] != pairs[:, 1]
+        if len(without):
+            left_out = np.array([callee * n + caller for caller, callee in without], dtype=np.int64)
+            keep &= ~np.isin(sources * n + indices, left_out)
+        pairs = pairs[keep]
+        if len(pairs):
+            # Unique on one int64 key per pair; np.unique (axis=0 in particular) is far slower
+            keys = np.sort(pairs[:, 0] * num_components + pairs[:, 1])
+            keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+            pairs = np.stack([keys // num_components, keys % num_components], axis=1)
+        self._dag_indices = pairs[:, 1].copy()
+        self._dag_indptr = np.zeros(num_components + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=num_components), out=self._dag_indptr[1:])
+        by_target = np.argsort(pairs[:, 1], kind='stable')
+        self._dag_in_indices = pairs[by_target, 0]
+        self._dag_in_indptr = np.zeros(num_components + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 1], minlength=num_components), out=self._dag_in_indptr[1:])
+
+    def _update_condensation(self, n: int, indptr: np.ndarray, indices: np.ndarray):
+        """
+        Patches the condensation for the edges changed since the last query
+        instead of rerunning Tarjan on the whole graph:
+
+        - nodes interned since then become singleton components;
+        - a component that lost an internal edge is re-split by running
+          Tarjan on its own members only;
+        - an added edge that runs against the topological order either
+          closes a cycle, whose components are merged, or reorders the
+          components between its ends (Pearce-Kelly), touching only the
+          components whose position lies between the two.
+
+        Closures that could see a changed component are dropped; the DAG
+        arrays are rebuilt with numpy, which is cheap next to Tarjan.
+        """
+        pending, self._pending_edges = self._pending_edges, set()
+        touched: Set[int] = set()
+        if n > len(self._component):
+            extra = n - len(self._component)
+            self._component = np.concatenate([self._component, np.arange(self._next_component, self._next_component + extra)])
+            top = np.nanmax(self._order) + 1 if self._order.size and not np.isnan(self._order).all() else 0.0
+            self._order = np.concatenate([self._order, top + np.arange(extra, dtype=np.float64)])
+            self._next_component += extra
+
+        split, added = set(), []
+        for caller, callee in pending:
+            if caller >= n or callee >= n:
+                continue
+            caller_component, callee_component = int(self._component[caller]), int(self._component[callee])
+            touched.update((caller_component, callee_component))
+            present = bool((indices[indptr[callee]:indptr[callee + 1]] == caller).any())
+            if caller_component == callee_component:
+                if not present and not self._still_reaches(callee, caller, caller_component, indptr, indices):
+                    split.add(caller_component)
+            elif present:
+                added.append((caller, callee))
+
+        for c in split:
+            touched.update(self._split_component(c, indptr, indices))
+        # Pearce-Kelly needs every other edge in order, so the added ones join the DAG one at a time
+        self._build_dag(n, indptr, indices, without=added)
+        for i, (caller, callee) in enumerate(added):
+            source, target = int(self._component[callee]), int(self._component[caller])
+            if source == target:
+                continue
+            self._extra_out.setdefault(source, set()).add(target)
+            self._extra_in.setdefault(target, set()).add(source)
+            if self._order[source] > self._order[target]:
+                merged = self._reorder(source, target)
+                if merged:
+                    touched.update(merged)
+                    self._build_dag(n, indptr, indices, without=added[i + 1:])
+        if self._extra_out:
+            self._build_dag(n, indptr, indices)
+
+        live = np.flatnonzero(np.bincount(self._component, minlength=self._next_component))
+        if self._next_component > 2 * len(live) + 1024:
+            # Mostly merged-away ids: renumber so bitsets stay short; every closure is stale then
+            order = self._order[live]
+            self._component = np.searchsorted(live, self._component)
+            self._next_component = len(live)
+            self._order = np.argsort(np.argsort(order, kind='stable'), kind='stable').astype(np.float64)
+            self._closure.clear()
+            self._build_dag(n, indptr, indices)
+            return
+        # Back to integer positions, so later splits have room between neighbours
+        self._order[live] = np.argsort(np.argsort(self._order[live], kind='stable'), kind='stable')
+
+        mask = 0
+        for c in touched:
+            mask |= 1 << c
+        for c, bits in self._closure.items():
+            if c in touched or bits & mask:
+                self._closure.pop(c)
+
+    def _still_reaches(self, start: int, goal: int, c: int, indptr: np.ndarray, indices: np.ndarray) -> bool:
+        """
+        Whether `start` still reaches `goal` inside component c. If so, every
+        cycle through a removed start -> goal edge can detour, and c holds.
+        Stops at the first path found, which in a large cycle is usually soon.
+        """
+        component = self._component
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for neighbour in indices[indptr[node]:indptr[node + 1]].tolist():
+                if neighbour == goal:
+                    return True
+                if neighbour not in seen and component[neighbour] == c:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return False
+
+    def _split_component(self, c: int, indptr: np.ndarray, indices: np.ndarray) -> List[int]:
+        """Re-runs Tarjan on one component's members; returns the ids of its pieces."""
+        members = np.flatnonzero(self._component == c)
+        if members.size < 2:
+            return [c]
+        starts, ends = indptr[members], indptr[members + 1]
+        neighbours = indices[np.repeat(starts - np.cumsum(ends - starts) + (ends - starts), ends - starts)
+                             + np.arange(int((ends - starts).sum()))]
+        sources = np.repeat(np.arange(members.size), ends - starts)
+        inside = np.isin(neighbours, members)
+        local_indices = np.searchsorted(members, neighbours[inside])
+        local_indptr = np.zeros(members.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources[inside], minlength=members.size), out=local_indptr[1:])
+        local = strongly_connected_components(members.size, local_indptr, local_indices)
+        pieces = int(local.max()) + 1
+        if pieces == 1:
+            return [c]
+
+        ids = np.concatenate([[c], np.arange(self._next_component, self._next_component + pieces - 1)])
+        self._next_component += pieces - 1
+        self._component[members] = ids[local]
+        # The pieces take c's place in the order, callees first as in _ensure_condensation
+        order = self._order[c] + (pieces - np.arange(pieces)) / (pieces + 1)
+        self._order = np.concatenate([self._order, np.empty(pieces - 1)])
+        self._order[ids] = order
+        return ids.tolist()
+
+    def _reorder(self, source: int, target: int) -> Set[int]:
+        """
+        Restores the topological order after a DAG edge source -> target was
+        added with order[source] > order[target]. Returns the components
+        merged because the edge closed a cycle (empty if it did not).
+        """
+        order = self._order
+        lower, upper = order[target], order[source]
+        forward = self._search(target, self._dag_indptr, self._dag_indices, self._extra_out, lambda ids: order[ids] <= upper)
+        backward = self._search(source, self._dag_in_indptr, self._dag_in_indices, self._extra_in, lambda ids: order[ids] >= lower)
+        cycle = forward & backward if source in forward else set()
+        positions = np.sort(order[list(forward | backward)])
+
+        by_order = lambda ids: sorted(ids, key=lambda c: order[c])
+        sequence = by_order(backward - cycle)
+        if cycle:
+            merged_into = min(cycle)
+            self._component[np.isin(self._component, list(cycle))] = merged_into
+            sequence.append(merged_into)
+        after = by_order(forward - cycle)
+        # Whatever reaches the edge moves down, whatever it reaches moves up; a merged cycle sits between
+        for c in cycle:
+            order[c] = np.nan
+        for c, position in zip(sequence, positions):
+            order[c] = position
+        for c, position in zip(after, positions[len(positions) - len(after):]):
+            order[c] = position
+        return cycle
+
+    @staticmethod
+    def _search(start: int, indptr: np.ndarray, indices: np.ndarray, extra: Dict[int, Set[int]], within) -> Set[int]:
+        seen = {start}
+        stack = [start]
+        while stack:
+            c = stack.pop()
+            neighbours = indices[indptr[c]:indptr[c + 1]]
+            if c in extra:
+                neighbours = np.concatenate([neighbours, np.fromiter(extra[c], dtype=np.int64)])
+            for neighbour in neighbours[within(neighbours)].tolist():
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return seen
+
+    def _component_closure(self, component: int) -> int:
+        closure = self._closure.get(component)
+        if closure is not None:
+            return closure
+
+        # Collect the not-yet-memoized part of the ancestor DAG, pinning the memoized closures it borders...
+        known: Dict[int, int] = {}
+        pending = set()
+        needed: Dict[int, int] = {}
+        stack = [component]
+        while stack:
+            c = stack.pop()
+            if c in pending or c in known:
+                continue
+            bits = self._closure.get(c)
+            if bits is not None:
+                known[c] = bits
+                continue
+            pending.add(c)
+            parents = self._dag_indices[self._dag_indptr[c]:self._dag_indptr[c + 1]].tolist()
+            for parent in parents:
+                needed[parent] = needed.get(parent, 0) + 1
+            stack.extend(parents)
+
+        # ...and fill it callers first, letting go of each closure once every
+        # pending callee has used it, so only the frontier is held at a time
+        for c in sorted(pending, key=lambda c: self._order[c], reverse=True):
+            bits = 0
+            for parent in self._dag_indices[self._dag_indptr[c]:self._dag_indptr[c + 1]].tolist():
+                bits |= known[parent] | (1 << parent)
+                needed[parent] -= 1
+                if not needed[parent]:
+                    del known[parent]
+            known[c] = bits
+            self._closure.put(c, bits)
+        return known[component]
+
+    @staticmethod
+    def _bits_to_ids(bits: int) -> np.ndarray:
+        if not bits:
+            return np.empty(0, dtype=np.int64)
+        raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little')).astype(np.int64)
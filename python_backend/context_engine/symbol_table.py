@@ -0,0 +1,135 @@
+# python_backend/context_engine/symbol_table.py
+from typing import Dict, Iterator, List, Tuple
+from .name_index import NameIndex
+
+class Symbol:
+    """
+    A compact definition record kept in place of the full AST.
+    `parent` is the position of the enclosing class/function in the same file's
+    symbol list (-1 for top-level definitions) and `calls` holds the
+    (callee_name, line) call sites made directly from this symbol's body.
+    """
+    __slots__ = ("name", "kind", "file_id", "start_line", "end_line", "parent", "calls")
+
+    def __init__(self, name: str, kind: str, file_id: int, start_line: int, end_line: int, parent: int, calls: Tuple[Tuple[str, int], ...]):
+        self.name = name
+        self.kind = kind
+        self.file_id = file_id
+        self.start_line = start_line
+        self.end_line = end_line
+        self.parent = parent
+        self.calls = calls
+
+class SymbolTable:
+    """
+    Holds the symbols of every indexed file. File paths are interned to small
+    integer ids so each symbol only stores an int instead of a path string.
+    """
+    def __init__(self):
+        self._file_ids: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self._symbols: Dict[int, List[Symbol]] = {}
+        self._imports: Dict[int, Tuple[tuple, ...]] = {}
+        self._qualnames: Dict[int, Dict[str, Symbol]] = {}
+        # Inverted name -> definitions/call sites index for symbol search
+        self.names = NameIndex()
+
+    def file_id(self, file_path: str) -> int:
+        """Returns the interned id for a path, assigning a new one if needed."""
+        file_id = self._file_ids.get(file_path)
+        if file_id is None:
+            file_id = len(self._paths)
+            self._file_ids[file_path] = file_id
+            self._paths.append(file_path)
+        return file_id
+
+    def path(self, file_id: int) -> str:
+        """Returns the path behind an interned file id."""
+        return self._paths[file_id]
+
+    def set_file_symbols(self, file_path: str, records: List[tuple], imports: List[tuple] = ()) -> List[Symbol]:
+        """
+        Replaces a file's symbols with the given (name, kind, start_line,
+        end_line, parent, calls) records and its (local_name, module, attr,
+        level) import records, as produced by parse_worker.
+        """
+        file_id = self.file_id(file_path)
+        symbols = [Symbol(name, kind, file_id, start_line, end_line, parent, tuple(calls))
+                   for name, kind, start_line, end_line, parent, calls in records]
+        self._symbols[file_id] = symbols
+        self._imports[file_id] = tuple(imports)
+        self._qualnames.pop(file_id, None)
+        self.names.set_file(file_id, symbols)
+        return symbols
+
+    def remove_file(self, file_path: str):
+        """Drops a file's symbols. Its id stays reserved so existing references remain valid."""
+        file_id = self._file_ids.get(file_path)
+        if file_id is not None:
+            self._symbols.pop(file_id, None)
+            self._imports.pop(file_id, None)
+            self._qualnames.pop(file_id, None)
+            self.names.remove_file(file_id)
+
+    def clear(self):
+        self._file_ids.clear()
+        self._paths.clear()
+        self._symbols.clear()
+        self._imports.clear()
+        self._qualnames.clear()
+        self.names.clear()
+
+    def has_file(self, file_path: str) -> bool:
+        file_id = self._file_ids.get(file_path)
+        return file_id is not None and file_id in self._symbols
+
+    def symbols_in(self, file_path: str) -> List[Symbol]:
+        """Returns the symbols defined in a file, in source order of discovery."""
+        file_id = self._file_ids.get(file_path)
+        if file_id is None:
+            return []
+        return self._symbols.get(file_id, [])
+
+    def imports_in(self, file_path: str) -> Tuple[tuple, ...]:
+        """Returns a file's (local_name, module, attr, level) import records."""
+        file_id = self._file_ids.get(file_path)
+        return self._imports.get(file_id, ()) if file_id is not None else ()
+
+    def lookup(self, file_path: str, qualified_name: str) -> Symbol | None:
+        """Finds a symbol by its dotted name (e.g. `ClassName.method`) within a file."""
+        file_id = self._file_ids.get(file_path)
+        if file_id is None or file_id not in self._symbols:
+            return None
+        qualnames = self._qualnames.get(file_id)
+        if qualnames is None:
+            # Built lazily; most files are never the target of a qualified lookup
+            qualnames = {self.qualified_name(symbol): symbol for symbol in self._symbols[file_id]}
+            self._qualnames[file_id] = qualnames
+        return qualnames.get(qualified_name)
+
+    def enclosing_class(self, symbol: Symbol) -> Symbol | None:
+        """Returns the nearest class a symbol is defined in, if any."""
+        siblings = self._symbols.get(symbol.file_id, [])
+        parent = symbol.parent
+        while parent >= 0:
+            if siblings[parent].kind == "class":
+                return siblings[parent]
+            parent = siblings[parent].parent
+        return None
+
+    def files(self) -> Iterator[str]:
+        """Iterates over the paths of all files that currently have symbols."""
+        return (self._paths[file_id] for file_id in self._symbols)
+
+    def qualified_name(self, symbol: Symbol) -> str:
+        """Builds a dotted name such as `ClassName.method` from the parent chain."""
+        siblings = self._symbols.get(symbol.file_id, [])
+        parts = [symbol.name]
+        parent = symbol.parent
+        while parent >= 0:
+            parts.append(siblings[parent].name)
+            parent = siblings[parent].parent
+        return ".".join(reversed(parts))
+
+    def __len__(self) -> int:
+        return sum(len(symbols) for symbols in self._symbols.values())
@@ -1,38 +1,53 @@
 # python_backend/context_engine/vector_store.py
 import os
-import openai
+import re
+import hashlib
+import threading
 import numpy as np
 import chromadb
-from .tokenization import get_tokenizer
+from .tokenization import get_tokenizer, chunk_content_by_ast
+from .embedding_pipeline import embedding_pipeline
 
-EMBEDDING_DIM = 1536 # text-embedding-3-small
+DEFAULT_COLLECTION = "code_assistant_v2"
 
 def generate_embeddings(text_chunks: list[str]) -> list[list[float]]:
-    """Generates embeddings for a list of text chunks."""
+    """
+    Generates embeddings for a list of text chunks through the shared pipeline
+    and its configured provider (OpenAI or local). Returns an empty list if
+    any chunk could not be embedded; use embedding_pipeline.embed directly to
+    keep partial results.
+    """
     if not text_chunks:
         return []
     
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("Warning: OPENAI_API_KEY not found. Skipping embedding generation.")
+    if not embedding_pipeline.available():
+        print(f"Warning: embedding provider '{embedding_pipeline.provider.name}' is unavailable. Skipping embedding generation.")
         return []
 
-    client = openai.OpenAI(api_key=api_key)
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=[chunk.replace("\n", " ") for chunk in text_chunks]
-        )
-        return [embedding.embedding for embedding in response.data]
-    except Exception as e:
-        print(f"An error occurred while generating embeddings: {e}")
-        return []
+    embeddings = embedding_pipeline.embed(text_chunks)
+    return embeddings if all(e is not None for e in embeddings) else []
+
+def chunk_id(file_path: str, chunk: dict) -> str:
+    """
+    A stable id for a chunk: its file, kind, name and a hash of its content.
+    Unlike line numbers it does not shift when code above the chunk moves.
+    """
+    digest = hashlib.blake2b(chunk["content"].encode("utf-8"), digest_size=8).hexdigest()
+    return f"{file_path}:{chunk['type']}:{chunk['name']}:{digest}"
+
+def collection_name_for(model: str) -> str:
+    """Each embedding model gets its own collection, since vector spaces can't be mixed."""
+    if model == "text-embedding-3-small":
+        return DEFAULT_COLLECTION # Keeps existing stores valid
+    return f"{DEFAULT_COLLECTION}_{re.sub(r'[^A-Za-z0-9_-]', '_', model)}"[:63]
 
 class ChromaVectorStore:
     def __init__(self, path="./chroma_db"):
         self.client = chromadb.PersistentClient(path=path)
-        self.collection = self.client.get_or_create_collection(name="code_assistant_v2")
+        self.collection = self.client.get_or_create_collection(name=collection_name_for(embedding_pipeline.model))
         self.tokenizer = get_tokenizer()
+        # Bumped on every write so caches of search results can tell they are stale
+        self.version = 0
 
     def add_chunks(self, file_path: str, chunks: list[dict]):
         """
@@ -42,35 +57,74 @@ class ChromaVectorStore:
         if not chunks:
             return
 
-        contents = [chunk["content"] for chunk in chunks]
-        embeddings = generate_embeddings(contents)
-        if not embeddings:
+        if not embedding_pipeline.available():
+            print(f"Warning: embedding provider '{embedding_pipeline.provider.name}' is unavailable. Skipping embedding generation.")
             return
 
+        contents = [chunk["content"] for chunk in chunks]
+        token_counts = [len(self.tokenizer.encode(content)) for content in contents]
+        embeddings = embedding_pipeline.embed(contents, token_counts)
+
+        # Chunks whose batch failed are skipped; the rest of the file is still stored
+        kept_embeddings = []
         metadatas = []
         ids = []
-        for i, chunk in enumerate(chunks):
+        seen_ids = set()
+        for chunk, token_count, embedding in zip(chunks, token_counts, embeddings):
+            if embedding is None:
+                continue
+            chunk_key = chunk_id(file_path, chunk)
+            if chunk_key in seen_ids:
+                continue # Identical chunk already queued in this upsert
+            seen_ids.add(chunk_key)
+            kept_embeddings.append(embedding)
             metadatas.append({
                 "file_path": file_path,
                 "type": chunk["type"],
                 "name": chunk["name"],
                 "start_line": chunk["start_line"],
                 "end_line": chunk["end_line"],
-                "token_count": len(self.tokenizer.encode(chunk["content"])),
+                "token_count": token_count,
                 "content_preview": chunk["content"][:200] # For quick inspection
             })
-            ids.append(f"{file_path}:{chunk['name']}:{chunk['start_line']}")
+            ids.append(chunk_key)
 
-        self.collection.add(embeddings=embeddings, metadatas=metadatas, ids=ids)
+        if kept_embeddings:
+            self.collection.upsert(embeddings=kept_embeddings, metadatas=metadatas, ids=ids)
+            self.version += 1
 
-    def search(self, query: str, k: int = 10) -> list[dict]:
+    def remove_file(self, file_path: str):
+        """Deletes every chunk that belongs to a file."""
+        self.collection.delete(where={"file_path": file_path})
+        self.version += 1
+
+    def update_file(self, file_path: str, content: str):
+        """
+        Replaces a file's chunks with freshly chunked content. Unchanged chunks
+        keep their ids and come from the embedding cache, so only edited code
+        is re-embedded; chunks that no longer exist are deleted.
+        """
+        chunks = chunk_content_by_ast(content, file_path)
+        self.add_chunks(file_path, chunks)
+        current_ids = {chunk_id(file_path, chunk) for chunk in chunks}
+        existing_ids = self.collection.get(where={"file_path": file_path}, include=[])["ids"]
+        stale_ids = [i for i in existing_ids if i not in current_ids]
+        if stale_ids:
+            self.collection.delete(ids=stale_ids)
+            self.version += 1
+
+    def search(self, query: str, k: int = 10, query_embedding: list[float] | None = None) -> list[dict]:
         """
-        Searches for the k most similar vectors to the query.
+        Searches for the k most similar vectors to the query. Pass
+        `query_embedding` when the caller already embedded the query.
         """
         if self.collection.count() == 0:
             return []
             
-        query_embedding = generate_embeddings([query])
+        if query_embedding is not None:
+            query_embedding = [query_embedding]
+        else:
+            query_embedding = generate_embeddings([query])
         if not query_embedding:
             return []
 
@@ -81,3 +135,19 @@ class ChromaVectorStore:
         # The result is a dict with 'ids', 'distances', 'metadatas', etc.
         # We return the list of metadatas for the first query.
         return results.get('metadatas', [[]])[0]
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+def get_vector_store(path: str = "./chroma_db") -> ChromaVectorStore:
+    """
+    Returns the process-wide store for a database path, so the Chroma client
+    stays open and every writer bumps the same version counter.
+    """
+    key = os.path.realpath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ChromaVectorStore(path=path)
+            _stores[key] = store
+        return store
@@ -5,6 +5,9 @@ from orchestrator.prompt_parser import PromptParser
 from orchestrator.command_handler import COMMAND_REGISTRY
 from orchestrator.context_builder import ContextBuilder
 from orchestrator.workflow_runner import WorkflowRunner
+from context_engine import parse_worker
+from context_engine.file_watcher import watcher_registry
+from services.prompt_registry import prompt_registry
 import json
 import asyncio
 import uuid
@@ -19,6 +22,19 @@ PROJECT_ROOT = os.path.abspath(os.getenv("PROJECT_ROOT", os.path.join(os.path.di
 class UserInput(BaseModel):
     text: str
 
+@app.on_event("startup")
+async def startup():
+    """Validates the prompt templates and reloads them when they are edited."""
+    for name, problems in prompt_registry.validate().items():
+        print(f"Prompt '{name}': {'; '.join(problems)}")
+    prompt_registry.watch()
+
+@app.on_event("shutdown")
+def shutdown():
+    """Stops the shared indexing worker processes and the prompt watcher."""
+    parse_worker.shutdown_pool()
+    prompt_registry.stop()
+
 @app.post("/api/v1/connect")
 async def connect():
     """Generates a unique ID for a new client connection."""
@@ -27,7 +43,8 @@ async def connect():
     print(f"Generated connection ID: {connection_id}")
     
     print("Initializing AgentState...")
-    state = AgentState(connection_id, project_root=PROJECT_ROOT)
+    # In a worker thread: a cold start loads the index snapshot and rebuilds the call graph
+    state = await asyncio.to_thread(AgentState, connection_id, project_root=PROJECT_ROOT)
     active_connections[connection_id] = state
     print("AgentState initialized and stored.")
     
@@ -46,6 +63,10 @@ async def websocket_endpoint(websocket: WebSocket, connection_id: str):
     # Announce connection readiness before starting the context build
     await state.send_message("connection_ready", {"connection_id": connection_id})
     
+    # Keep the shared index fresh as files are saved. Subscribing before the scan
+    # starts means a disconnect during the scan always unsubscribes afterwards.
+    watcher_registry.subscribe(state)
+
     # --- Trigger Initial Context Build ---
     # This runs in the background, sending updates to the client.
     async def initial_context_build():
@@ -54,18 +75,22 @@ async def websocket_endpoint(websocket: WebSocket, connection_id: str):
         await context_builder.run_initial_scan()
         await state.send_log("Workspace context is ready.")
     
-    asyncio.create_task(initial_context_build())
+    build_task = asyncio.create_task(initial_context_build())
     # ------------------------------------
 
     try:
-        # Keep the connection alive to receive broadcasts
+        # Keep the connection alive to receive broadcasts. Input arrives over HTTP, but
+        # reading is what notices the client going away (receive raises WebSocketDisconnect).
         while True:
-            await asyncio.sleep(3600) # Sleep for a long time
-            
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        state.disconnect()
-        if connection_id in active_connections:
-            del active_connections[connection_id]
+        pass
+    finally:
+        build_task.cancel()
+        active_connections.pop(connection_id, None)
+        watcher_registry.unsubscribe(state)
+        # Shielded, since the server may cancel this handler once the client has gone
+        await asyncio.shield(state.disconnect())
 
 # ... (Models and WebSocket endpoint remain the same) ...
 
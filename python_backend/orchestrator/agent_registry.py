@@ -1,12 +1,22 @@
 # python_backend/orchestrator/agent_registry.py
 import json
+import asyncio
+import inspect
 import importlib
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
+from services.response_cache import response_cache
+
+# Threads for legacy agents whose `run` is still synchronous
+AGENT_THREADS = int(os.getenv("AGENT_THREADS", "8"))
 
 class AgentRegistry:
     """
     Dynamically loads and provides access to agent modules based on agents.json.
+    An agent defined with `"cache": false` never has its LLM calls served
+    from the response cache (e.g. one that is meant to vary between runs).
     """
     def __init__(self, agents_file_path: str = 'agents.json'):
         # Build a path to agents.json relative to this file's location
@@ -17,6 +27,7 @@ class AgentRegistry:
         with open(full_path, 'r') as f:
             self._agent_definitions = json.load(f)
         self._loaded_agents = {}
+        self._executor = ThreadPoolExecutor(max_workers=AGENT_THREADS, thread_name_prefix="agent")
 
     def _load_agent_module(self, agent_name: str) -> Any:
         """Dynamically imports an agent's module."""
@@ -41,9 +52,11 @@ class AgentRegistry:
                 return agent_def
         raise ValueError(f"Agent '{agent_name}' not found in definitions.")
 
-    def run_agent(self, agent_name: str, state: 'AgentState') -> 'AgentState':
+    async def run_agent(self, agent_name: str, state: 'AgentState') -> 'AgentState':
         """
-        Loads and runs the specified agent's `run` method.
+        Loads and runs the specified agent's `run` method. Async agents are
+        awaited on the event loop; synchronous ones run in a worker thread so
+        they cannot block other sessions.
         """
         agent_module = self._load_agent_module(agent_name)
         
@@ -51,7 +64,19 @@ class AgentRegistry:
             raise NotImplementedError(f"Agent module for '{agent_name}' does not have a 'run' function.")
             
         print(f"Executing agent: {agent_name}")
-        return agent_module.run(state)
+        with response_cache.bypassed(not self._uses_cache(agent_name)):
+            if inspect.iscoroutinefunction(agent_module.run):
+                return await agent_module.run(state)
+            loop = asyncio.get_running_loop()
+            # run_in_executor does not carry the context over, which holds the cache opt-out
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, context.run, agent_module.run, state)
+
+    def _uses_cache(self, agent_name: str) -> bool:
+        for agent_def in self._agent_definitions:
+            if agent_def["name"] == agent_name:
+                return agent_def.get("cache", True)
+        return True
 
 # A single, shared instance of the registry
 agent_registry = AgentRegistry()
@@ -1,7 +1,10 @@
 # python_backend/orchestrator/agent_state.py
 from orchestrator.conversation_history import ConversationHistory
-from context_engine.codebase_index import CodebaseIndex
+from context_engine.index_registry import index_registry
+from context_engine.context_packer import ContextPacker, CONTEXT_TOKEN_BUDGET
+from orchestrator.delta_stream import DeltaStream
 import json
+import asyncio
 
 class AgentState:
     """
@@ -12,19 +15,29 @@ class AgentState:
         history_path = f".conversation_history_{connection_id}.json"
         self.conversation_history = ConversationHistory(persist_path=history_path)
         
-        # Centralized Code Index
-        self.codebase_index = CodebaseIndex()
+        # Read-only view of the code index shared with every other session on the same project root
+        self.codebase_index = index_registry.acquire(project_root)
+        self._index_released = False
 
         # File Management
         self.loaded_files = {}  # path: content
         self.modified_buffers = {} # path: new_content
+        self.ranked_chunks = [] # search results for the current request, best first
         
         # Connection & Workflow State
         self.websocket = None
+        self._stream_suffix = "" # tells apart the streams of concurrent drafts, e.g. "#2"
         self.user_request = ""
         self.last_agent_output = None
         self.proposed_strategies = []
         self.selected_solution = None
+        # Fields the workflow steps read and write (their inputs/outputs in workflows.json)
+        self.requirements = None
+        self.proposed_diff = None
+        self.change_summary = None
+        self.commit_message = None
+        self.git_commands = None
+        self.structure_summary = None
         self.project_root = project_root
 
     async def connect(self, websocket):
@@ -32,10 +45,15 @@ class AgentState:
         await websocket.accept()
         self.websocket = websocket
 
-    def disconnect(self):
+    async def disconnect(self):
         """Clears the WebSocket connection."""
         self.websocket = None
-        self.conversation_history.save() # Save history on disconnect
+        # Flush the history journal on disconnect; joining its writer thread waits on an fsync, so not on the loop
+        await asyncio.to_thread(self.conversation_history.close)
+        if not self._index_released:
+            self._index_released = True
+            # The last session on a root writes the index snapshot
+            await asyncio.to_thread(index_registry.release, self.project_root)
 
     def add_message(self, role: str, content: str, embed: bool = False):
         """Adds a message to the conversation history."""
@@ -55,11 +73,77 @@ class AgentState:
             "last_agent_output": self.last_agent_output
         }
 
+    def read_file_for_context(self, file_path: str):
+        """Returns a file's current text: edited buffer, loaded file, or disk."""
+        if file_path in self.modified_buffers:
+            return self.modified_buffers[file_path]
+        if file_path in self.loaded_files:
+            return self.loaded_files[file_path]
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError, TypeError):
+            return None
+
+    def get_packed_context_for_prompt(self, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+        """
+        Assembles the prompt context within `token_budget` tokens: the request,
+        the last agent output and recent history first, then the best-ranked
+        code chunks that fit, with an outline of the rest. Edited buffers
+        rank above every search result and loaded files are used when no
+        search has run.
+        """
+        packer = ContextPacker(self.read_file_for_context)
+        sections = [f"User request:\n{self.user_request}"]
+        if self.last_agent_output:
+            output = json.dumps(self.last_agent_output, indent=2)
+            tokens = packer.tokenizer.encode(output)
+            if len(tokens) > token_budget // 4:
+                output = packer.tokenizer.decode(tokens[:token_budget // 4]) + "\n...(truncated)"
+            sections.append(f"Last agent output:\n{output}")
+        remaining = token_budget - sum(packer.count_tokens(section) for section in sections)
+
+        # Newest messages first, up to a quarter of what is left
+        history_budget = remaining // 4
+        history_lines = []
+        for message in reversed(self.conversation_history.get_history()):
+            line = f"{message['role']}: {message['content']}"
+            cost = packer.count_tokens(line) + 1
+            if cost > history_budget:
+                break
+            history_lines.append(line)
+            history_budget -= cost
+        if history_lines:
+            history = "Conversation history:\n" + "\n".join(reversed(history_lines))
+            sections.append(history)
+            remaining -= packer.count_tokens(history)
+
+        candidates = list(self.ranked_chunks) or [
+            {"file_path": path, "type": "file", "name": path, "score": 1.0 / (1 + rank)}
+            for rank, path in enumerate(self.loaded_files)
+        ]
+        top_score = max((c.get("score") or 0.0 for c in candidates), default=0.0)
+        candidates = [
+            {"file_path": path, "type": "modified", "name": path, "score": 2 * top_score + 1.0}
+            for path in self.modified_buffers
+        ] + candidates
+
+        # Section separators and the heading below
+        remaining -= 2 * len(sections) + 4
+        packed = packer.pack(candidates, remaining)
+        if packed.chunks or packed.outline:
+            sections.append("Relevant code:\n" + packed.render())
+        return "\n\n".join(sections)
+
     async def send_message(self, type: str, data: dict):
         """Sends a structured message to the frontend."""
         if self.websocket:
             await self.websocket.send_text(json.dumps({"type": type, "data": data}))
 
+    def stream_deltas(self, agent: str) -> DeltaStream:
+        """Returns a stream that forwards an agent's partial output as agent_delta frames."""
+        return DeltaStream(self, agent + self._stream_suffix)
+
     async def send_log(self, data: str):
         """Sends a log message to the frontend."""
         if self.websocket:
@@ -1,10 +1,14 @@
 # python_backend/orchestrator/command_handler.py
 from orchestrator.agent_state import AgentState
+from orchestrator.workflow_runner import WorkflowRunner
+from orchestrator.workflow_checkpoints import workflow_checkpoints
+from services.response_cache import response_cache
 from utils.path_validator import PathValidator
-from context_engine.file_discovery import discover_files
+from context_engine.index_registry import index_registry
 from agents.code_search_agent import CodeSearchAgent
 from agents import diff_agent, refactor_agent, change_summarizer_agent, conventional_commit_agent, version_control_agent
 import json
+import asyncio
 
 # --- Command Implementations ---
 
@@ -16,38 +20,38 @@ async def handle_index(state: AgentState, args: list):
         return
 
     await state.send_log(f"Starting codebase indexing at: {validator.absolute_path}...")
-    file_count = 0
-    for file_path in discover_files(validator.absolute_path):
-        if file_path.endswith('.py'):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                state.codebase_index.index_file(file_path, content)
-                file_count += 1
-            except Exception:
-                continue
-    
-    state.codebase_index.build_call_graph()
-    await state.send_log(f"Indexing complete. Parsed {file_count} Python files and built function call graph.")
+    # Run off the event loop so other sessions stay responsive while files are parsed
+    stats = await asyncio.to_thread(index_registry.index_directory, state.project_root, validator.absolute_path)
+    await state.send_log(
+        f"Indexing complete. Parsed {stats['parsed']} changed Python files, removed {stats['removed']}, "
+        f"{stats['unchanged']} unchanged. Function call graph updated."
+    )
 
 async def handle_impact(state: AgentState, args: list):
-    if len(args) != 1 or ':' not in args[0]:
-        await state.send_log("Usage: /impact <file_path>:<function_name>")
-        return
-    
-    file_path, function_name = args[0].split(':', 1)
-    validator = PathValidator(file_path)
-    if not validator.validate():
-        await state.send_log(f"Error: {validator.error}")
+    if not args or any(':' not in arg for arg in args):
+        await state.send_log("Usage: /impact <file_path>:<function_name> [<file_path>:<function_name> ...]")
         return
 
-    await state.send_log(f"Analyzing impact of changes to {function_name} in {file_path}...")
-    impact_results = state.codebase_index.get_impacted_functions(validator.absolute_path, function_name)
-    
-    await state.websocket.send_text(json.dumps({
-        "type": "impact_analysis",
-        "data": {"target": f"{file_path}:{function_name}", "impacted_functions": impact_results}
-    }))
+    targets = []
+    for arg in args:
+        file_path, function_name = arg.split(':', 1)
+        validator = PathValidator(file_path)
+        if not validator.validate():
+            await state.send_log(f"Error: {validator.error}")
+            return
+        targets.append((arg, validator.absolute_path, function_name))
+
+    await state.send_log(f"Analyzing impact of changes to {', '.join(arg for arg, _, _ in targets)}...")
+    # One batch call so the reachability index is prepared once for all targets; off the event loop,
+    # since the first query after a large edit may still patch or build the condensation
+    impact_results = await asyncio.to_thread(
+        state.codebase_index.get_impacted_functions_batch, [(path, func) for _, path, func in targets])
+
+    for arg, path, function_name in targets:
+        await state.websocket.send_text(json.dumps({
+            "type": "impact_analysis",
+            "data": {"target": arg, "impacted_functions": impact_results[(path, function_name)]}
+        }))
 
 async def handle_refactor(state: AgentState, args: list):
     if len(args) < 3:
@@ -67,9 +71,10 @@ async def handle_commit(state: AgentState, args: list):
     target_file = list(state.modified_buffers.keys())[0]
     await state.send_log(f"Finalizing changes for {target_file}...")
     
-    change_summarizer_agent.run(state, target_file)
-    conventional_commit_agent.run(state)
-    version_control_agent.run(state, target_file)
+    state.proposed_diff = {"file_path": target_file, "diff": state.last_agent_output}
+    await change_summarizer_agent.run(state)
+    await conventional_commit_agent.run(state)
+    version_control_agent.run(state)
     
     await state.websocket.send_text(json.dumps({
         "type": "final_commands",
@@ -79,6 +84,35 @@ async def handle_commit(state: AgentState, args: list):
         }
     }))
 
+async def handle_resume(state: AgentState, args: list):
+    if args:
+        run = await asyncio.to_thread(workflow_checkpoints.get_run, args[0])
+    else:
+        run = await asyncio.to_thread(workflow_checkpoints.latest_unfinished_run, state.project_root)
+    if run is None:
+        await state.send_log("Error: No workflow run to resume. Usage: /resume [run_id]")
+        return
+    if run["status"] == "completed":
+        await state.send_log(f"Workflow run {run['run_id']} already completed.")
+        return
+
+    # The run's request is what its checkpoints were keyed on
+    state.user_request = run["user_request"]
+    workflow_runner = WorkflowRunner(state)
+    asyncio.create_task(workflow_runner.execute_workflow(run["workflow"], run_id=run["run_id"]))
+
+async def handle_llm_cache(state: AgentState, args: list):
+    if args and args[0] == "clear":
+        await asyncio.to_thread(response_cache.clear)
+        await state.send_log("LLM response cache cleared.")
+        return
+
+    stats = response_cache.stats()
+    await state.send_log(
+        f"LLM response cache {'enabled' if stats['enabled'] else 'disabled'}: hit rate {stats['hit_rate']:.0%} "
+        f"({stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, {stats['misses']} misses)."
+    )
+
 # --- Command Registry ---
 
 COMMAND_REGISTRY = {
@@ -86,5 +120,7 @@ COMMAND_REGISTRY = {
     "impact": handle_impact,
     "refactor": handle_refactor,
     "commit": handle_commit,
+    "resume": handle_resume,
+    "llmcache": handle_llm_cache,
     # Add other commands like 'search', 'diff' here
 }
@@ -1,8 +1,10 @@
 # python_backend/orchestrator/context_builder.py
 import os
+import asyncio
 from orchestrator.agent_state import AgentState
 from agents.code_search_agent import CodeSearchAgent
 from context_engine.file_discovery import discover_files
+from context_engine.index_registry import index_registry
 
 class ContextBuilder:
     """
@@ -17,15 +19,21 @@ class ContextBuilder:
         Performs the initial, one-time scan and indexing of the entire project.
         This is typically run once when the server starts or a new project is loaded.
         """
+        if self.state.codebase_index.is_indexed():
+            # Another session already built the shared index; only revalidate changed files.
+            await self.state.send_log("Reusing shared codebase index for this project.")
+            await asyncio.to_thread(index_registry.index_directory, self.project_root)
+            return
+
         await self.state.send_log("Performing initial codebase scan...")
         
         # 1. Discover all files and convert the generator to a list
-        all_files = list(discover_files(self.project_root))
+        all_files = await asyncio.to_thread(lambda: list(discover_files(self.project_root)))
         await self.state.send_log(f"Found {len(all_files)} total files.")
         
         # 2. Index the entire directory for future searches
         await self.state.send_log("Creating codebase index for semantic search...")
-        self.state.codebase_index.index_directory(self.project_root)
+        await asyncio.to_thread(index_registry.index_directory, self.project_root)
         await self.state.send_log("Codebase indexing complete.")
 
     async def run(self):
@@ -43,17 +51,26 @@ class ContextBuilder:
             await self.state.send_log("Warning: Codebase index is not ready. Context may be incomplete.")
             return
 
-        # Perform a semantic search to find the most relevant files
+        # Perform a hybrid (lexical + semantic) search to find the most relevant files
         await self.state.send_log(f"Searching for files relevant to: '{self.state.user_request}'")
-        search_agent = CodeSearchAgent(self.state)
-        search_results = search_agent.run(self.state.user_request)
+        # Off the event loop: embedding the query can block on the API, including its rate-limit backoff
+        search_results = await asyncio.to_thread(lambda: CodeSearchAgent(self.state).run(self.state.user_request))
 
         if not search_results:
             await self.state.send_log("No relevant files found from search.")
             return
+
+        # Agents pack these ranked chunks into their prompts within a token budget
+        self.state.ranked_chunks = search_results
             
-        # Load the top 3 most relevant files into the agent's state
-        files_to_load = [result['file_path'] for result in search_results[:3]]
+        # Load the top 3 files of the fused ranking into the agent's state
+        files_to_load = []
+        for result in search_results:
+            file_path = result['file_path']
+            if file_path not in files_to_load and os.path.isfile(file_path):
+                files_to_load.append(file_path)
+            if len(files_to_load) == 3:
+                break
         
         await self.state.send_log(f"Loading top {len(files_to_load)} files into context...")
         for file_path in files_to_load:
@@ -2,123 +2,268 @@ import json
 import os
 import tiktoken
 import numpy as np
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Deque, List, Dict, Optional
+from context_engine.embedding_pipeline import EmbeddingPipeline, embedding_pipeline
+from orchestrator.history_journal import HistoryJournal
 
-# Lazy loading for sentence_transformers
-SentenceTransformer = None
+# Compact the journal once it holds this many records beyond twice the live window
+COMPACT_SLACK = 1000
 
-def _lazy_load_transformer():
-    global SentenceTransformer
-    if SentenceTransformer is None:
-        try:
-            from sentence_transformers import SentenceTransformer as STransformer
-            SentenceTransformer = STransformer
-        except ImportError:
-            raise RuntimeError("SentenceTransformer is not installed. Please `pip install sentence-transformers`.")
-    return SentenceTransformer
+class EmbeddingMatrix:
+    """
+    Message embeddings as rows of one preallocated float32 matrix, normalized
+    on insert so cosine similarity is a plain dot product. Rows are appended
+    at the end and evicted from the front; the buffer doubles (or compacts)
+    when it runs out, so both stay amortized O(1). Messages that were not
+    embedded keep a zero row and are masked out of searches.
+    """
+    def __init__(self, capacity: int = 64):
+        self.vectors: Optional[np.ndarray] = None # allocated once the dimension is known
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def _reserve(self, dim: Optional[int] = None):
+        capacity = len(self.valid)
+        if self.vectors is None and dim is not None:
+            self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        if self.end < capacity:
+            return
+        live = len(self)
+        new_capacity = capacity if self.start >= capacity // 2 else max(2 * capacity, 64)
+        valid = np.zeros(new_capacity, dtype=bool)
+        valid[:live] = self.valid[self.start:self.end]
+        self.valid = valid
+        if self.vectors is not None:
+            vectors = np.zeros((new_capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:live] = self.vectors[self.start:self.end]
+            self.vectors = vectors
+        self.start, self.end = 0, live
+
+    def append(self, embedding: Optional[np.ndarray]):
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32).ravel()
+            norm = float(np.linalg.norm(embedding))
+            if norm == 0.0 or (self.vectors is not None and embedding.shape[0] != self.vectors.shape[1]):
+                embedding = None
+        self._reserve(embedding.shape[0] if embedding is not None else None)
+        row = self.end
+        self.end += 1
+        if embedding is not None:
+            self.vectors[row] = embedding / norm
+            self.valid[row] = True
+        else:
+            self.valid[row] = False
+            if self.vectors is not None:
+                self.vectors[row] = 0.0
+
+    def popleft(self):
+        self.valid[self.start] = False
+        self.start += 1
+
+    def clear(self):
+        self.vectors = None
+        self.valid = np.zeros(64, dtype=bool)
+        self.start = self.end = 0
+
+    def top_k(self, query: np.ndarray, k: int) -> List[int]:
+        """Positions (0 = oldest kept message) of the k rows most similar to `query`, best first."""
+        if self.vectors is None or k <= 0:
+            return []
+        valid = self.valid[self.start:self.end]
+        count = int(valid.sum())
+        if count == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or query.shape[0] != self.vectors.shape[1]:
+            return []
+        scores = self.vectors[self.start:self.end] @ (query / norm)
+        scores[~valid] = -np.inf
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+    def rows(self):
+        """The live rows and their validity mask, for persistence."""
+        if self.vectors is None:
+            return None, self.valid[self.start:self.end].copy()
+        return self.vectors[self.start:self.end].copy(), self.valid[self.start:self.end].copy()
 
 class ConversationHistory:
     def __init__(self, 
                  max_tokens: int = 3500, 
-                 embedding_model_name: str = "all-MiniLM-L6-v2",
+                 embedder: Optional[EmbeddingPipeline] = None,
                  persist_path: Optional[str] = None):
-        self.history: List[Dict[str, str]] = []
+        self.history: Deque[Dict[str, str]] = deque()
+        # Token count of each message, taken once at insert, and their running sum
+        self.token_counts: Deque[int] = deque()
+        self.total_tokens = 0
         self.max_tokens = max_tokens
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
         self.persist_path = persist_path
         
-        # For embeddings
-        self.embedding_model_name = embedding_model_name
-        self._embedding_model = None  # Lazy-loaded
-        self.embeddings: List[np.ndarray] = []
+        # For embeddings; shares the provider and cache used for code chunks by default
+        self.embedder = embedder or embedding_pipeline
+        self.embeddings = EmbeddingMatrix()
+
+        # Messages are journaled as they arrive; the JSON file at persist_path is only read for migration
+        self.journal = HistoryJournal(f"{os.path.splitext(persist_path)[0]}.jsonl") if persist_path else None
 
         if self.persist_path:
             self.load()
 
-    @property
-    def embedding_model(self):
-        """Lazy-loads the embedding model on first access."""
-        if self._embedding_model is None:
-            print("Lazy loading embedding model...")
-            TransformerClass = _lazy_load_transformer()
-            self._embedding_model = TransformerClass(self.embedding_model_name)
-            print("Embedding model loaded.")
-        return self._embedding_model
-
     def add_message(self, role: str, content: str, embed: bool = False):
         """Add a message to history; optionally embed content."""
-        self.history.append({"role": role, "content": content})
+        message = {"role": role, "content": content}
+        count = self._count_tokens(content)
+        emb = None
         if embed:
             try:
                 emb = self._get_embedding(content)
-                self.embeddings.append(emb)
             except Exception as e:
                 print(f"Error embedding message: {e}")
-                self.embeddings.append(None)
-        else:
-            self.embeddings.append(None)
+        self._append(message, count, emb)
+        if self.journal is not None:
+            self.journal.append(message, count, emb)
 
         self._truncate_to_fit()
+        self._maybe_compact()
+
+    def _append(self, message: Dict[str, str], count: int, emb: Optional[np.ndarray]):
+        self.history.append(message)
+        self.token_counts.append(count)
+        self.total_tokens += count
+        self.embeddings.append(emb)
 
     def _count_tokens(self, text: str) -> int:
         return len(self.tokenizer.encode(text))
 
     def _truncate_to_fit(self):
-        """Truncate oldest messages until token limit is met."""
-        total_tokens = sum(self._count_tokens(m["content"]) for m in self.history)
-        while total_tokens > self.max_tokens and len(self.history) > 1:
-            self.history.pop(0)
-            self.embeddings.pop(0)
-            total_tokens -= self._count_tokens(m["content"])
+        """Evict oldest messages until the running token total fits the limit."""
+        while self.total_tokens > self.max_tokens and len(self.history) > 1:
+            self.history.popleft()
+            self.embeddings.popleft()
+            self.total_tokens -= self.token_counts.popleft()
 
     def get_history(self) -> List[Dict[str, str]]:
         """Return messages list ready for GPT API call."""
-        self._truncate_to_fit()
-        return self.history
+        return list(self.history)
 
     def _get_embedding(self, text: str) -> np.ndarray:
         """Generates an embedding for the given text."""
-        return self.embedding_model.encode(text)
+        embedding = self.embedder.embed_one(text)
+        if embedding is None:
+            raise RuntimeError(f"Embedding provider '{self.embedder.provider.name}' returned no embedding.")
+        return np.asarray(embedding, dtype=np.float32)
 
     def get_relevant_messages(self, query: str, top_k: int = 3) -> List[Dict[str, str]]:
         """Return top_k relevant past messages by semantic similarity to query."""
-        valid_embeddings = [(i, e) for i, e in enumerate(self.embeddings) if e is not None]
-        if not valid_embeddings:
+        if not self.embeddings.valid[self.embeddings.start:self.embeddings.end].any():
             return []
 
         query_emb = self._get_embedding(query)
-        
-        indices, embeddings = zip(*valid_embeddings)
-        similarities = [self._cosine_similarity(query_emb, e) for e in embeddings]
-        
-        ranked = sorted(zip(indices, similarities), key=lambda x: x[1], reverse=True)
-        top_indices = [idx for idx, sim in ranked[:top_k]]
-        
-        return [self.history[i] for i in top_indices]
+        return [self.history[i] for i in self.embeddings.top_k(query_emb, top_k)]
 
-    @staticmethod
-    def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-        dot_product = np.dot(a, b)
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
-        return dot_product / (norm_a * norm_b) if norm_a != 0 and norm_b != 0 else 0.0
+    def _maybe_compact(self):
+        """Rewrites the journal to the live window once evicted records dominate it."""
+        if self.journal is None or self.journal.records <= 2 * len(self.history) + COMPACT_SLACK:
+            return
+        vectors, valid = self.embeddings.rows()
+        self.journal.compact([
+            (message, count, vectors[i] if valid[i] else None)
+            for i, (message, count) in enumerate(zip(self.history, self.token_counts))
+        ])
 
     def save(self):
-        if not self.persist_path:
+        """Waits until every journaled message is on disk."""
+        if self.journal is not None:
+            self.journal.flush(timeout=5.0)
+
+    def close(self):
+        """Flushes the journal and stops its writer thread."""
+        if self.journal is not None:
+            self.journal.close()
+
+    def load(self):
+        """Streams the journal back in, keeping only the window that fits max_tokens."""
+        if not self.journal:
+            return
+        self.history = deque()
+        self.token_counts = deque()
+        self.total_tokens = 0
+        self.embeddings.clear()
+        if not os.path.exists(self.journal.path):
+            self._migrate_json()
             return
         try:
-            with open(self.persist_path, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            for message, count, emb in self.journal.read():
+                if not isinstance(count, int):
+                    count = self._count_tokens(message["content"])
+                self._append(message, count, emb)
+                self._truncate_to_fit()
+        except OSError as e:
+            print(f"Error reading conversation journal {self.journal.path}: {e}")
+        self._maybe_compact()
 
-    def load(self):
-        if not self.persist_path or not os.path.exists(self.persist_path):
+    def _migrate_json(self):
+        """Imports a history saved as a single JSON document (with its .embeddings.npz) into the journal."""
+        if not os.path.exists(self.persist_path):
             return
         try:
             with open(self.persist_path, "r", encoding="utf-8") as f:
-                self.history = json.load(f)
-            self.embeddings = [None] * len(self.history)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.history = []
-            self.embeddings = []
+                messages = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        vectors, valid = self._load_legacy_embeddings(len(messages))
+        for i, message in enumerate(messages):
+            emb = vectors[i] if vectors is not None and valid[i] else None
+            self._append(message, self._count_tokens(message["content"]), emb)
+            self._truncate_to_fit()
+        vectors, valid = self.embeddings.rows()
+        self.journal.compact([
+            (message, count, vectors[i] if valid[i] else None)
+            for i, (message, count) in enumerate(zip(self.history, self.token_counts))
+        ])
+
+    def _load_legacy_embeddings(self, count: int):
+        path = f"{os.path.splitext(self.persist_path)[0]}.embeddings.npz"
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    vectors, valid = data["vectors"], data["valid"]
+                if len(valid) == count and len(vectors) == count:
+                    return vectors.astype(np.float32, copy=False), valid.astype(bool, copy=False)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable conversation embeddings {path}: {e}")
+        return None, np.zeros(count, dtype=bool)
+
+# Micro-benchmark: python -m orchestrator.conversation_history (from python_backend)
+if __name__ == '__main__':
+    import time
+
+    for max_tokens in (3500, 10**9):
+        history = ConversationHistory(max_tokens=max_tokens)
+        messages = [f"message {i}: " + "lorem ipsum dolor sit amet " * (1 + i % 20) for i in range(10_000)]
+        start = time.perf_counter()
+        for i, content in enumerate(messages):
+            history.add_message("user" if i % 2 else "assistant", content)
+        elapsed = time.perf_counter() - start
+        print(f"max_tokens={max_tokens}: 10k add_message calls in {elapsed:.3f}s "
+              f"({elapsed / len(messages) * 1e6:.1f} us/message), {len(history.history)} messages kept, "
+              f"{history.total_tokens} tokens")
+
+    for count, dim in ((10_000, 256), (100_000, 256)):
+        matrix = EmbeddingMatrix()
+        rng = np.random.default_rng(0)
+        for row in rng.standard_normal((count, dim), dtype=np.float32):
+            matrix.append(row)
+        query = rng.standard_normal(dim, dtype=np.float32)
+        start = time.perf_counter()
+        for _ in range(20):
+            matrix.top_k(query, 5)
+        print(f"top-5 over {count} x {dim} embeddings: {(time.perf_counter() - start) / 20 * 1e3:.2f} ms/query")
@@ -0,0 +1,67 @@
+# python_backend/orchestrator/delta_stream.py
+import asyncio
+import time
+from typing import List
+
+# Streamed tokens are forwarded at most this often, per agent
+DELTA_INTERVAL = 0.05
+
+class DeltaStream:
+    """
+    Forwards partial LLM output to the client as `agent_delta` frames.
+    Tokens are buffered and sent together once DELTA_INTERVAL has passed
+    since the last frame, so a fast stream becomes ~20 frames a second
+    instead of one per token; a final frame with `done: true` closes it.
+    Use as `async with state.stream_deltas("AgentName") as stream:` and
+    pass `stream.push` as the `on_delta` callback of LLMService.
+    """
+    def __init__(self, state, agent: str, interval: float = DELTA_INTERVAL):
+        self.state = state
+        self.agent = agent
+        self.interval = interval
+        self._buffer: List[str] = []
+        self._last_sent = 0.0
+        self._pending: asyncio.Task | None = None
+        self._failed = False
+
+    async def push(self, text: str):
+        if not text or self._failed or self.state.websocket is None:
+            return
+        self._buffer.append(text)
+        wait = self._last_sent + self.interval - time.monotonic()
+        if wait <= 0:
+            await self._flush()
+        elif self._pending is None:
+            # Tokens that arrive during a pause still go out within the interval
+            self._pending = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        self._pending = None
+        await self._flush()
+
+    async def _flush(self, done: bool = False):
+        if not self._buffer and not done:
+            return
+        delta = "".join(self._buffer)
+        self._buffer.clear()
+        self._last_sent = time.monotonic()
+        try:
+            await self.state.send_message("agent_delta", {"agent": self.agent, "delta": delta, "done": done})
+        except Exception as e:
+            # A dropped socket must not fail the completion that is feeding it
+            print(f"Could not forward {self.agent} output: {e}")
+            self._failed = True
+
+    async def close(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if not self._failed and self.state.websocket is not None:
+            await self._flush(done=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
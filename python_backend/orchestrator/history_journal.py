@@ -0,0 +1,171 @@
+# python_backend/orchestrator/history_journal.py
+import os
+import json
+import time
+import base64
+import queue
+import threading
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+# How long appended records may sit in the OS page cache before an fsync
+FSYNC_INTERVAL = float(os.getenv("HISTORY_FSYNC_INTERVAL", "1.0"))
+
+_CLOSE = object()
+
+def encode_record(message: dict, tokens: int, embedding: Optional[np.ndarray]) -> str:
+    record = {"role": message["role"], "content": message["content"], "tokens": tokens}
+    if embedding is not None:
+        record["embedding"] = base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode("ascii")
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+class HistoryJournal:
+    """
+    An append-only JSONL log of conversation messages. `append` only puts
+    the record on a queue; a background thread writes queued records in
+    batches and fsyncs at most every FSYNC_INTERVAL seconds, so persisting a
+    message is O(1) for the caller and never blocks the event loop.
+    `compact` replaces the file with a snapshot of the live window (written
+    to a temporary file, then renamed), in order with the appends around it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0 # records in the file, including evicted messages
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-journal", daemon=True)
+                self._thread.start()
+
+    def read(self) -> Iterator[Tuple[dict, Optional[int], Optional[np.ndarray]]]:
+        """
+        Streams (message, token count, embedding) back from the file. A torn
+        last line (a record cut short by a crash) is skipped and, once the
+        whole file has been read, truncated away, so the next append starts
+        on a line of its own instead of being merged into the fragment.
+        """
+        if not os.path.exists(self.path):
+            return
+        complete = 0 # end of the last whole line
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                    message = {"role": record["role"], "content": record["content"]}
+                except (ValueError, KeyError, TypeError):
+                    continue # e.g. a line that is not a record
+                self.records += 1
+                embedding = record.get("embedding")
+                if embedding is not None:
+                    embedding = np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+                yield message, record.get("tokens"), embedding
+        if complete < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(complete)
+
+    def append(self, message: dict, tokens: int, embedding: Optional[np.ndarray] = None):
+        self._start()
+        self.records += 1
+        self._queue.put(("append", (message, tokens, embedding)))
+
+    def compact(self, entries: List[Tuple[dict, int, Optional[np.ndarray]]]):
+        """Rewrites the journal to hold exactly `entries` (the live window)."""
+        self._start()
+        self.records = len(entries)
+        self._queue.put(("compact", entries))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Blocks until everything queued so far is written and fsynced."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self):
+        """Blocks until the writer thread has written, fsynced and exited; async callers run it in a thread."""
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        f = None
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            try:
+                item = self._queue.get(timeout=FSYNC_INTERVAL if dirty else None)
+            except queue.Empty:
+                item = None
+            # Drain whatever else is already queued into the same batch
+            batch = [item] if item is not None else []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = _CLOSE in batch
+            waiters = [entry[1] for entry in batch if entry is not _CLOSE and entry[0] == "flush"]
+            try:
+                for entry in batch:
+                    if entry is _CLOSE:
+                        continue
+                    op, payload = entry
+                    if op == "append":
+                        if f is None:
+                            f = self._open()
+                        f.write(encode_record(*payload))
+                        dirty = True
+                    elif op == "compact":
+                        if f is not None:
+                            f.close()
+                        f = self._rewrite(payload)
+                        dirty = False
+                        last_sync = time.monotonic()
+
+                # Every batch reaches the OS right away (surviving a process crash);
+                # fsync, which also survives power loss, is batched
+                if f is not None:
+                    f.flush()
+                if dirty and (waiters or closing or time.monotonic() - last_sync >= FSYNC_INTERVAL):
+                    os.fsync(f.fileno())
+                    dirty = False
+                    last_sync = time.monotonic()
+            except OSError as e:
+                # Keep serving the queue; later batches retry with a fresh handle
+                print(f"Conversation journal {self.path} failed: {e}")
+                if f is not None:
+                    f.close()
+                f = None
+                dirty = False
+            for done in waiters:
+                done.set()
+            if closing:
+                if f is not None:
+                    f.close()
+                return
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return open(self.path, "a", encoding="utf-8")
+
+    def _rewrite(self, entries):
+        tmp_path = f"{self.path}.tmp"
+        self._open().close() # creates the directory if needed
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            tmp.writelines(encode_record(*entry) for entry in entries)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, self.path)
+        return self._open()
@@ -6,7 +6,7 @@ class Orchestrator:
     def __init__(self, repo_path="."):
         # Initialize all the critical tools
         self.ast_parser = swe_tools.ASTParserTool()
-        self.code_retriever = swe_tools.CodeRetrieverTool()
+        self.code_retriever = swe_tools.get_code_retriever()
         self.token_estimator = swe_tools.TokenEstimateTool()
         self.prompt_builder = swe_tools.PromptContextBuilderTool()
         self.diff_formatter = swe_tools.DiffFormatterTool()
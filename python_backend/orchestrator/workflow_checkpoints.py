@@ -0,0 +1,149 @@
+# python_backend/orchestrator/workflow_checkpoints.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from context_engine.index_snapshot import INDEX_CACHE_DIR
+
+CHECKPOINT_PATH = os.getenv("WORKFLOW_CHECKPOINT_PATH", os.path.join(INDEX_CACHE_DIR, "workflow_runs.db"))
+
+# AgentState fields that are never checkpointed: live connections, shared
+# indexes, and the conversation, which has its own journal
+UNCHECKPOINTED_FIELDS = frozenset({"websocket", "conversation_history", "codebase_index", "project_root", "loaded_files"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    project_root TEXT NOT NULL,
+    user_request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id TEXT NOT NULL,
+    step_key TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (run_id, step_key)
+) WITHOUT ROWID;
+"""
+
+def fingerprint(*parts: Any) -> str:
+    """A stable hash of JSON-like values (step definitions, state fields, other fingerprints)."""
+    data = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+def checkpointable_fields(state) -> Dict[str, str]:
+    """The state's public, JSON-serializable fields, as field -> JSON text."""
+    fields = {}
+    for name, value in vars(state).items():
+        if name.startswith("_") or name in UNCHECKPOINTED_FIELDS:
+            continue
+        try:
+            fields[name] = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            continue
+    return fields
+
+def input_values(state, fields) -> Dict[str, Any]:
+    """
+    The values of the state fields a step reads, as they enter its input
+    hash. The codebase index counts by its files' content digests; the
+    conversation is left out, since every message (including `/resume`
+    itself) would otherwise invalidate the run it is resuming.
+    """
+    values = {}
+    for field in fields:
+        if field == "conversation_history":
+            continue
+        value = getattr(state, field, None)
+        if field == "codebase_index" and value is not None:
+            value = value.file_digests()
+        values[field] = value
+    return values
+
+class CheckpointStore:
+    """
+    Per-step checkpoints of workflow runs in SQLite. After a step succeeds,
+    the state fields it wrote are stored under (run id, step key) together
+    with a hash of its inputs; resuming the run replays every step whose
+    inputs still hash the same instead of calling its agent again.
+    """
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def start_run(self, run_id: str, workflow: str, project_root: str, user_request: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs (run_id, workflow, project_root, user_request, status, updated) VALUES (?, ?, ?, ?, 'running', ?) "
+                    "ON CONFLICT (run_id) DO UPDATE SET status = 'running', updated = excluded.updated",
+                    (run_id, workflow, project_root, user_request or "", time.time_ns()))
+
+    def finish_run(self, run_id: str, status: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("UPDATE runs SET status = ?, updated = ? WHERE run_id = ?", (status, time.time_ns(), run_id))
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT run_id, workflow, project_root, user_request, status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return self._run_dict(row)
+
+    def latest_unfinished_run(self, project_root: str) -> Optional[dict]:
+        """The most recent run on a project that failed or was interrupted."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT run_id, workflow, project_root, user_request, status FROM runs "
+                "WHERE project_root = ? AND status != 'completed' ORDER BY updated DESC LIMIT 1", (project_root,)).fetchone()
+        return self._run_dict(row)
+
+    @staticmethod
+    def _run_dict(row) -> Optional[dict]:
+        if row is None:
+            return None
+        return dict(zip(("run_id", "workflow", "project_root", "user_request", "status"), row))
+
+    def load_step(self, run_id: str, step_key: str, input_hash: str) -> Optional[Dict[str, Any]]:
+        """The fields a step wrote, if it completed with the same input hash."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT input_hash, fields FROM steps WHERE run_id = ? AND step_key = ?", (run_id, step_key)).fetchone()
+        if row is None or row[0] != input_hash:
+            return None
+        return {name: json.loads(value) for name, value in json.loads(row[1]).items()}
+
+    def save_step(self, run_id: str, step_key: str, input_hash: str, fields: Dict[str, str]):
+        """Stores a completed step's fields (field -> JSON text)."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO steps (run_id, step_key, input_hash, fields) VALUES (?, ?, ?, ?)",
+                                 (run_id, step_key, input_hash, json.dumps(fields, ensure_ascii=False)))
+        except sqlite3.Error as e:
+            print(f"Workflow checkpoint write failed: {e}")
+
+# A single, shared instance of the store
+workflow_checkpoints = CheckpointStore()
@@ -1,9 +1,57 @@
 # python_backend/orchestrator/workflow_runner.py
 import json
 import asyncio
+import copy
 import os
+import uuid
 from orchestrator.agent_state import AgentState
 from orchestrator.agent_registry import agent_registry
+from orchestrator.workflow_checkpoints import workflow_checkpoints, fingerprint, checkpointable_fields, input_values
+
+# Agents a single workflow run may have in flight at once
+WORKFLOW_CONCURRENCY = int(os.getenv("WORKFLOW_CONCURRENCY", "4"))
+# Proposals drafted concurrently per deliberation turn (a step opts in with "candidates"),
+# and how many must finish before the challenger runs
+DELIBERATION_CANDIDATES = int(os.getenv("DELIBERATION_CANDIDATES", "1"))
+DELIBERATION_QUORUM = int(os.getenv("DELIBERATION_QUORUM", "2"))
+
+class StepFailed(Exception):
+    """Raised when a workflow step's output is an error."""
+    def __init__(self, agent: str, message: str):
+        super().__init__(message)
+        self.agent = agent
+        self.message = message
+
+def _is_error(output) -> bool:
+    return isinstance(output, dict) and bool(output.get('error'))
+
+def _is_declared(step: dict) -> bool:
+    return "inputs" in step or "outputs" in step
+
+def step_dependencies(sequence: list) -> list:
+    """
+    Returns, for each step, the indices of the earlier steps it must wait
+    for. A step may declare the state fields it reads (`inputs`) and writes
+    (`outputs`); it then waits only for earlier steps that write what it
+    reads or writes, or read what it writes. A step without declarations
+    is a barrier: it waits for every earlier step and every later step
+    waits for it, which keeps undeclared workflows strictly sequential.
+    """
+    dependencies = []
+    for index, step in enumerate(sequence):
+        declared = _is_declared(step)
+        reads, writes = set(step.get("inputs", ())), set(step.get("outputs", ()))
+        after = []
+        for earlier in range(index):
+            previous = sequence[earlier]
+            if not declared or not _is_declared(previous):
+                after.append(earlier)
+                continue
+            previous_reads, previous_writes = set(previous.get("inputs", ())), set(previous.get("outputs", ()))
+            if previous_writes & (reads | writes) or previous_reads & writes:
+                after.append(earlier)
+        dependencies.append(after)
+    return dependencies
 
 class WorkflowRunner:
     def __init__(self, state: AgentState):
@@ -11,36 +59,40 @@ class WorkflowRunner:
         dir_path = os.path.dirname(os.path.realpath(__file__))
         full_path = os.path.join(dir_path, '..', '..', 'workflows.json')
         with open(full_path, 'r') as f:
-            self.workflows = json.load()["workflows"]
+            self.workflows = json.load(f)["workflows"]
         self.state = state
+        self.run_id = None
+        self._slots = asyncio.Semaphore(WORKFLOW_CONCURRENCY)
 
-    async def execute_workflow(self, name: str):
-        """Executes a workflow defined in workflows.json."""
+    async def execute_workflow(self, name: str, run_id: str = None):
+        """
+        Executes a workflow defined in workflows.json. Every step that
+        succeeds is checkpointed under the run id; passing the id of an
+        earlier run resumes it, replaying each step whose inputs are unchanged.
+        Checkpoints are read and written in worker threads, off the event loop.
+        """
         workflow = self.workflows.get(name)
         if not workflow:
             await self.state.send_log(f"Error: Workflow '{name}' not found.")
             return
 
-        await self.state.send_log(f"Starting workflow: {workflow['description']}")
-
-        for step in workflow["sequence"]:
-            step_type = step.get("type", "standard")
-            
-            if step_type == "deliberation":
-                await self._run_deliberation_step(step)
-            else:
-                agent_name = step.get("agent")
-                if agent_name:
-                    await self._run_standard_step(agent_name)
-                else:
-                    await self.state.send_log(f"Skipping invalid step: {step}")
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        await asyncio.to_thread(workflow_checkpoints.start_run, self.run_id, name, self.state.project_root, self.state.user_request)
+        verb = "Resuming" if run_id else "Starting"
+        await self.state.send_log(f"{verb} workflow: {workflow['description']} (run {self.run_id})")
 
-            if self.state.last_agent_output and isinstance(self.state.last_agent_output, dict) and self.state.last_agent_output.get('error'):
-                error_message = self.state.last_agent_output['error']
-                agent_name_in_error = agent_name or step.get("proposer") # Best guess
-                await self.state.send_log(f"Workflow halted due to an error in agent '{agent_name_in_error}': {error_message}")
-                return
+        try:
+            await self._run_sequence(workflow["sequence"], name)
+        except StepFailed as e:
+            await asyncio.to_thread(workflow_checkpoints.finish_run, self.run_id, "failed")
+            await self.state.send_log(f"Workflow halted due to an error in agent '{e.agent}': {e.message}")
+            await self.state.send_log(f"Resume it from the last good step with /resume {self.run_id}")
+            return
+        except BaseException:
+            await asyncio.to_thread(workflow_checkpoints.finish_run, self.run_id, "interrupted")
+            raise
 
+        await asyncio.to_thread(workflow_checkpoints.finish_run, self.run_id, "completed")
         await self.state.send_log("Workflow finished successfully.")
         
         # --- After workflow, handle the final output ---
@@ -54,39 +106,276 @@ class WorkflowRunner:
                 summary = final_output.get("summary", json.dumps(final_output))
                 await self.state.send_log(f"Final result: {summary}")
 
-    async def _run_standard_step(self, agent_name: str):
+    async def _run_sequence(self, sequence: list, path: str):
+        """
+        Runs a workflow's steps as a DAG: each step starts as soon as the steps
+        it depends on (see step_dependencies) have finished, with at most
+        WORKFLOW_CONCURRENCY agents running at once. Raises StepFailed for the
+        first step that fails and cancels the rest.
+        Each step is checkpointed under `<path>/<index>`, keyed by a hash of
+        its definition, the state fields it reads and its dependencies'
+        results, so a step is replayed only if none of those changed.
+        Returns the output of the sequence's last step.
+        """
+        dependencies = step_dependencies(sequence)
+        outputs = [None] * len(sequence)
+        results = [None] * len(sequence) # hashes of each step's inputs and output
+        tasks = []
+
+        async def run_node(index: int, step: dict, after: list):
+            if after:
+                await asyncio.gather(*after)
+            step_key = f"{path}/{index}"
+            input_hash = self._input_hash(step, [results[d] for d in dependencies[index]])
+            if step.get("type") == "workflow":
+                # A nested workflow schedules (and checkpoints) its own steps, so it holds no slot itself
+                output = await self._run_step(step, step_key, self.state)
+            else:
+                fields = await self._replay_step(step, step_key, input_hash)
+                if fields is not None:
+                    output = fields.get("last_agent_output")
+                else:
+                    output = await self._run_agent_step(step, step_key, input_hash)
+            if _is_error(output):
+                raise StepFailed(step.get("agent") or step.get("proposer") or step.get("name"), output['error'])
+            outputs[index] = output
+            results[index] = fingerprint(input_hash, output)
+
+        for index, step in enumerate(sequence):
+            after = [tasks[d] for d in dependencies[index]]
+            tasks.append(asyncio.create_task(run_node(index, step, after)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        # Steps may finish out of order; the workflow's output is its last step's
+        if sequence:
+            self.state.last_agent_output = outputs[-1]
+        return outputs[-1] if sequence else None
+
+    async def _run_agent_step(self, step: dict, step_key: str, input_hash: str):
+        """
+        Runs an agent or deliberation step and checkpoints it if it succeeds;
+        returns its output. A declared step runs on its own shallow copy of
+        the state, so steps running side by side never read each other's
+        last_agent_output, and only its declared outputs are written back.
+        An undeclared step is a barrier and runs on the state itself.
+        """
+        declared = _is_declared(step)
+        if declared:
+            state = copy.copy(self.state)
+            state.last_agent_output = None
+            before = None
+        else:
+            state = self.state
+            before = checkpointable_fields(self.state)
+        async with self._slots:
+            output = await self._run_step(step, step_key, state)
+        if _is_error(output):
+            return output
+        for field in step.get("outputs", ()):
+            setattr(self.state, field, getattr(state, field, None))
+        await self._checkpoint_step(step, step_key, input_hash, before, output)
+        return output
+
+    def _input_hash(self, step: dict, dependency_results: list) -> str:
+        # An undeclared step may read anything; the request stands in for its inputs
+        inputs = step.get("inputs", ()) if _is_declared(step) else ("user_request",)
+        return fingerprint(step, input_values(self.state, inputs), dependency_results)
+
+    async def _replay_step(self, step: dict, step_key: str, input_hash: str):
+        """
+        Restores a step's checkpointed fields onto the state, if its inputs
+        are unchanged, and returns them (None if the step must run).
+        """
+        fields = await asyncio.to_thread(workflow_checkpoints.load_step, self.run_id, step_key, input_hash)
+        if fields is None:
+            return None
+        for field, value in fields.items():
+            if field != "last_agent_output":
+                setattr(self.state, field, value)
+        label = step.get("agent") or step.get("proposer") or step.get("name")
+        await self.state.send_log(f"--- Replaying {label} from checkpoint ---")
+        return fields
+
+    async def _checkpoint_step(self, step: dict, step_key: str, input_hash: str, before: dict, output):
+        """
+        Stores what a finished step wrote, with its output: its declared
+        outputs, or for an undeclared step (a barrier, so nothing else ran
+        meanwhile) every field that changed since `before`. Steps with
+        unserializable outputs are not checkpointed and simply run again on
+        resume.
+        """
+        if before is None:
+            fields = {}
+            for field in step.get("outputs", ()):
+                try:
+                    fields[field] = json.dumps(getattr(self.state, field, None), sort_keys=True, ensure_ascii=False)
+                except (TypeError, ValueError):
+                    return
+        else:
+            after = checkpointable_fields(self.state)
+            fields = {field: value for field, value in after.items() if before.get(field) != value}
+        try:
+            fields["last_agent_output"] = json.dumps(output, sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        await asyncio.to_thread(workflow_checkpoints.save_step, self.run_id, step_key, input_hash, fields)
+
+    async def _run_step(self, step: dict, step_key: str, state: AgentState):
+        """Runs one step against `state` and returns its output (the last_agent_output it left)."""
+        step_type = step.get("type", "standard")
+        if step_type == "deliberation":
+            await self._run_deliberation_step(step, state)
+        elif step_type == "workflow":
+            workflow = self.workflows.get(step.get("name"))
+            if not workflow:
+                await state.send_log(f"Skipping unknown workflow step: {step}")
+                return None
+            await state.send_log(f"--- Running Workflow: {step['name']} ---")
+            return await self._run_sequence(workflow["sequence"], f"{step_key}:{step['name']}")
+        else:
+            agent_name = step.get("agent")
+            if agent_name:
+                await self._run_standard_step(agent_name, state)
+            else:
+                await state.send_log(f"Skipping invalid step: {step}")
+        return state.last_agent_output
+
+    async def _run_standard_step(self, agent_name: str, state: AgentState):
         """Executes a single, standard agent step using the registry."""
-        await self.state.send_log(f"--- Running Agent: {agent_name} ---")
+        await state.send_log(f"--- Running Agent: {agent_name} ---")
         try:
-            agent_registry.run_agent(agent_name, self.state)
+            await agent_registry.run_agent(agent_name, state)
         except (ValueError, NotImplementedError) as e:
-            await self.state.send_log(f"Error executing agent '{agent_name}': {e}")
-            self.state.last_agent_output = {"error": str(e)}
+            await state.send_log(f"Error executing agent '{agent_name}': {e}")
+            state.last_agent_output = {"error": str(e)}
+
+    async def _run_deliberation_step(self, step: dict, state: AgentState):
+        """
+        Manages a conversational loop between two agents to reach a decision.
+        A step with `"candidates"` above 1 drafts that many proposals
+        concurrently each round and the challenger weighs them in one call;
+        every draft costs an LLM call, so this is opt-in per step.
+        """
+        if step.get("candidates", DELIBERATION_CANDIDATES) > 1:
+            await self._run_speculative_deliberation(step, state)
+            return
 
-    async def _run_deliberation_step(self, step: dict):
-        """Manages a conversational loop between two agents to reach a decision."""
         proposer_name = step["proposer"]
         challenger_name = step["challenger"]
         max_turns = step.get("max_turns", 2)
 
-        await self.state.send_log(f"--- Starting Deliberation: {proposer_name} vs. {challenger_name} ---")
+        await state.send_log(f"--- Starting Deliberation: {proposer_name} vs. {challenger_name} ---")
 
         for i in range(max_turns):
-            await self.state.send_log(f"Deliberation Turn {i+1}...")
+            await state.send_log(f"Deliberation Turn {i+1}...")
             
             # 1. Proposer makes a suggestion
-            await self._run_standard_step(proposer_name)
-            if self.state.last_agent_output.get('error'): return # Halt on error
+            await self._run_standard_step(proposer_name, state)
+            if _is_error(state.last_agent_output): return # Halt on error
 
             # 2. Challenger evaluates the proposal
-            await self._run_standard_step(challenger_name)
-            if self.state.last_agent_output.get('error'): return # Halt on error
+            await self._run_standard_step(challenger_name, state)
+            if _is_error(state.last_agent_output): return # Halt on error
 
             # 3. Check for consensus
-            if self.state.selected_solution:
-                await self.state.send_log("Consensus reached. Optimal solution selected.")
+            if state.selected_solution:
+                await state.send_log("Consensus reached. Optimal solution selected.")
                 return
 
-        await self.state.send_log("Deliberation failed to reach consensus after max turns.")
+        await state.send_log("Deliberation failed to reach consensus after max turns.")
         # In a real system, an escalation policy would be triggered here.
-        self.state.last_agent_output = {"error": "Deliberation failed."}
\ No newline at end of file
+        state.last_agent_output = {"error": "Deliberation failed."}
+
+    async def _run_speculative_deliberation(self, step: dict, state: AgentState):
+        proposer_name = step["proposer"]
+        challenger_name = step["challenger"]
+        max_turns = step.get("max_turns", 2)
+        candidates = step.get("candidates", DELIBERATION_CANDIDATES)
+        quorum = min(step.get("quorum", DELIBERATION_QUORUM), candidates)
+
+        await state.send_log(
+            f"--- Starting Deliberation: {proposer_name} vs. {challenger_name} ({candidates} candidates per turn) ---")
+
+        for i in range(max_turns):
+            await state.send_log(f"Deliberation Turn {i+1}...")
+
+            # 1. Take the first `quorum` proposals of this round; drafted after the
+            #    previous round's critique is in the state, so they can answer it
+            strategies = await self._propose(proposer_name, candidates, quorum, state)
+            if _is_error(strategies):
+                state.last_agent_output = strategies
+                return
+            state.proposed_strategies = strategies
+            state.last_agent_output = strategies
+
+            # 2. The challenger weighs every proposal at once
+            await self._run_standard_step(challenger_name, state)
+            if _is_error(state.last_agent_output): return # Halt on error
+
+            # 3. Check for consensus
+            if state.selected_solution:
+                await state.send_log("Consensus reached. Optimal solution selected.")
+                return
+
+        await state.send_log("Deliberation failed to reach consensus after max turns.")
+        state.last_agent_output = {"error": "Deliberation failed."}
+
+    async def _propose(self, proposer_name: str, candidates: int, quorum: int, state: AgentState):
+        """
+        Runs the proposer `candidates` times concurrently, each on its own
+        shallow copy of the state so the drafts cannot overwrite each other;
+        each draft streams under its own label (e.g. CreativeArchitect#2),
+        so the client shows them as separate entries instead of one mix.
+        Returns the merged strategies of the first `quorum` drafts to finish
+        (cancelling the rest), or an error dict if every draft failed.
+        """
+        await state.send_log(f"--- Running Agent: {proposer_name} x{candidates} ---")
+
+        async def draft(index: int):
+            candidate_state = copy.copy(state)
+            candidate_state.selected_solution = None
+            candidate_state._stream_suffix = f"#{index + 1}"
+            await agent_registry.run_agent(proposer_name, candidate_state)
+            output = candidate_state.last_agent_output
+            if _is_error(output):
+                return output
+            return [dict(strategy, id=f"c{index + 1}-{strategy.get('id', n + 1)}")
+                    for n, strategy in enumerate(candidate_state.proposed_strategies or [])
+                    if isinstance(strategy, dict)]
+
+        tasks = [asyncio.create_task(draft(index)) for index in range(candidates)]
+        drafts, error = [], None
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    result = await finished
+                except (ValueError, NotImplementedError) as e:
+                    result = {"error": str(e)}
+                if _is_error(result):
+                    error = result
+                    continue
+                drafts.append(result)
+                if len(drafts) >= quorum:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not drafts:
+            return error or {"error": f"{proposer_name} produced no proposals."}
+        # Identical strategies from different drafts are weighed once
+        merged, seen = [], set()
+        for strategies in drafts:
+            for strategy in strategies:
+                key = (strategy.get("name") or "").strip().lower() or strategy["id"]
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(strategy)
+        return merged
@@ -0,0 +1,77 @@
+# python_backend/scripts/symbol_table_memory.py
+"""
+Compares the memory retained by full ASTs with the compact symbol table and
+call graph that CodebaseIndex keeps instead (see context_engine.symbol_table).
+
+    python scripts/symbol_table_memory.py [directory]
+
+Run from python_backend. The directory defaults to the standard library's
+asyncio package.
+"""
+import os
+import sys
+import ast
+import gc
+import asyncio
+import pickle
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), ".."))
+
+from context_engine import parse_worker
+from context_engine.symbol_table import SymbolTable
+from context_engine.call_resolver import CallResolver
+from context_engine.call_graph import CallGraph
+
+def python_files(directory: str) -> dict:
+    sources = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    sources[path] = f.read()
+    return sources
+
+def retained(build) -> int:
+    """Bytes still allocated by `build()`'s result once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def build_asts(sources: dict) -> dict:
+    return {path: ast.parse(source, filename=path) for path, source in sources.items()}
+
+def build_symbols(payload: bytes):
+    # Unpickled inside the measurement, as records arrive from the parse workers
+    records = pickle.loads(payload)
+    symbols = SymbolTable()
+    resolver = CallResolver(symbols)
+    graph = CallGraph()
+    for path, (symbol_records, imports) in records.items():
+        symbols.set_file_symbols(path, symbol_records, imports)
+        resolver.add_module(path)
+    for path in records:
+        graph.set_file_edges(path, *resolver.resolve_file(path))
+    return symbols, resolver, graph
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(asyncio.__file__)
+    sources = python_files(directory)
+    records = {}
+    for path, source in sources.items():
+        tree = ast.parse(source, filename=path)
+        records[path] = (parse_worker.extract_symbols(tree), parse_worker.extract_imports(tree))
+
+    ast_bytes = retained(lambda: build_asts(sources))
+    payload = pickle.dumps(records)
+    del records
+    symbol_bytes = retained(lambda: build_symbols(payload))
+    print(f"{len(sources)} files under {directory}")
+    print(f"retained ASTs:             {ast_bytes / 2**20:6.2f} MiB")
+    print(f"symbol table + call graph: {symbol_bytes / 2**20:6.2f} MiB ({ast_bytes / max(symbol_bytes, 1):.1f}x smaller)")
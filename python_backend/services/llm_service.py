@@ -2,33 +2,136 @@
 import openai
 import os
 import json
-from typing import Dict, Any
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+from services.response_cache import response_cache, request_key
+from services.prompt_registry import PromptTemplate
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4.1-mini")
+# Per-request timeout in seconds, and completions in flight across every session
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
 
 class LLMService:
     """
     A centralized service for interacting with the OpenAI API.
-    Handles client initialization, prompt execution, and response parsing.
+    One pooled AsyncOpenAI client is shared by every agent and session, each
+    request carries a timeout, and a semaphore bounds the completions in
+    flight, so a slow completion never blocks the event loop. Completions
+    can also be streamed, handing each partial token to an `on_delta`
+    callback as it arrives. Text completions (`generate`, `stream` and
+    `execute_prompt`) are served from the shared response cache when the
+    same request finished before.
     """
-    def __init__(self, model: str = "gpt-4.1-mini"):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model: str = DEFAULT_MODEL, timeout: float = LLM_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY):
         self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=self.timeout, max_retries=LLM_MAX_RETRIES)
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _request(self, messages, response_format, model, temperature) -> Dict[str, Any]:
+        request = {"model": model or self.model, "messages": messages, "timeout": self.timeout}
+        if response_format is not None:
+            request["response_format"] = response_format
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+
+    async def complete(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, str]] = None,
+                       model: Optional[str] = None, temperature: Optional[float] = None):
+        """Runs one chat completion and returns the raw response."""
+        request = self._request(messages, response_format, model, temperature)
+        async with self._get_semaphore():
+            return await self._get_client().chat.completions.create(**request)
+
+    async def generate(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, str]] = None,
+                       model: Optional[str] = None, temperature: Optional[float] = None,
+                       on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Tuple[str, Optional[str]]:
+        """
+        Runs one completion, streamed through `on_delta` if given, and returns
+        its text and finish reason. A cached response is handed to `on_delta`
+        in one piece; only completions that stopped normally are cached.
+        """
+        key = None
+        if response_cache.active():
+            key = request_key(model or self.model, messages, response_format, temperature)
+            cached = await response_cache.aget(key)
+            if cached is not None:
+                if on_delta is not None and cached[0]:
+                    await on_delta(cached[0])
+                return cached
 
-    def execute_prompt(self, prompt_template: str, context: Dict[str, Any], is_json: bool = False) -> str | Dict[str, Any]:
+        if on_delta is not None:
+            content, finish_reason = await self._stream(messages, on_delta, response_format, model, temperature)
+        else:
+            response = await self.complete(messages, response_format=response_format, model=model, temperature=temperature)
+            choice = response.choices[0]
+            content, finish_reason = choice.message.content, choice.finish_reason
+
+        if key is not None and finish_reason == "stop" and content is not None:
+            await response_cache.aput(key, content, finish_reason)
+        return content, finish_reason
+
+    async def stream(self, messages: List[Dict[str, str]], on_delta: Callable[[str], Awaitable[None]],
+                     response_format: Optional[Dict[str, str]] = None, model: Optional[str] = None,
+                     temperature: Optional[float] = None) -> Tuple[str, Optional[str]]:
+        """Streams one chat completion through `on_delta`; returns the full text and the finish reason."""
+        return await self.generate(messages, response_format, model, temperature, on_delta=on_delta)
+
+    async def _stream(self, messages, on_delta, response_format, model, temperature) -> Tuple[str, Optional[str]]:
+        request = self._request(messages, response_format, model, temperature)
+        parts = []
+        finish_reason = None
+        async with self._get_semaphore():
+            stream = await self._get_client().chat.completions.create(stream=True, **request)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta is not None and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    await on_delta(choice.delta.content)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        return "".join(parts), finish_reason
+
+    async def execute_prompt(self, prompt_template: str | PromptTemplate, context: Dict[str, Any], is_json: bool = False,
+                             system_prompt: Optional[str] = None,
+                             on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> str | Dict[str, Any]:
         """
-        Formats a prompt, executes it against the LLM, and returns the response.
+        Formats a prompt (a compiled template from prompt_registry, or a plain
+        format string), executes it against the LLM, and returns the response.
+        With `on_delta`, the completion is streamed through it as it is generated.
         """
-        final_prompt = prompt_template.format(**context)
-        
+        if isinstance(prompt_template, PromptTemplate):
+            final_prompt = prompt_template.render(context)
+        else:
+            final_prompt = prompt_template.format(**context)
+
         response_format = {"type": "json_object"} if is_json else {"type": "text"}
-        
+        messages = [{"role": "user", "content": final_prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": final_prompt}],
-                response_format=response_format
-            )
-            content = response.choices[0].message.content
-            
+            content, _ = await self.generate(messages, response_format=response_format, on_delta=on_delta)
+
             if is_json:
                 return json.loads(content)
             return content
@@ -39,3 +142,6 @@ class LLMService:
             if is_json:
                 return {"error": error_message}
             return error_message
+
+# A single, shared instance of the service
+llm_service = LLMService()
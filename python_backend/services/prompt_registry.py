@@ -0,0 +1,201 @@
+# python_backend/services/prompt_registry.py
+import os
+import asyncio
+import string
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+PROMPTS_DIR = os.getenv("PROMPTS_DIR", os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'prompts'))
+
+# Lazy loading for watchfiles, as in context_engine.file_watcher; falls back to polling
+awatch = None
+
+def _lazy_load_awatch():
+    global awatch
+    if awatch is None:
+        try:
+            from watchfiles import awatch as _awatch
+            awatch = _awatch
+        except ImportError:
+            print("Warning: watchfiles is not installed; falling back to polling for file changes (pip install watchfiles)")
+            return None
+    return awatch
+
+class PromptTemplate:
+    """
+    A prompt template compiled once: the text is split into literal parts
+    and `{placeholder}` names up front, so rendering is a single join and
+    the placeholders it needs are known before it is ever called.
+    """
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        self._simple = True
+        fields = set()
+        # Raises ValueError for unbalanced braces
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is not None:
+                if not field.isidentifier() or spec or conversion:
+                    self._simple = False # e.g. {x.attr} or {x:>10}; rendered by str.format
+                fields.add(field.split(".")[0].split("[")[0])
+            self._parts.append((literal, field))
+        self.fields = frozenset(fields)
+
+    def missing(self, keys: Iterable[str]) -> Set[str]:
+        """The placeholders that `keys` would leave unfilled."""
+        return set(self.fields) - set(keys)
+
+    def render(self, context: Dict[str, Any]) -> str:
+        missing = self.missing(context)
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing {', '.join(sorted(missing))}")
+        if not self._simple:
+            return self.text.format(**context)
+        return "".join(literal + (str(context[field]) if field is not None else "") for literal, field in self._parts)
+
+class PromptRegistry:
+    """
+    Loads every template in the prompts directory once and serves them from
+    memory, so running an agent reads no files. Agents declare the keys they
+    fill with `expect`, and any placeholder those keys miss is reported when
+    the template loads instead of when the agent runs. While `watch` runs,
+    edited templates are recompiled and swapped in; a template that no
+    longer compiles keeps its previous version.
+    """
+    def __init__(self, directory: str = PROMPTS_DIR, poll_interval: float = 2.0):
+        self.directory = os.path.realpath(directory)
+        self.poll_interval = poll_interval
+        self.errors: Dict[str, str] = {}
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._expected: Dict[str, frozenset] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _name(name_or_path: str) -> str:
+        # Accepts "change_summarizer" as well as old-style paths like "prompts/change_summarizer.md"
+        name = os.path.basename(name_or_path)
+        return name[:-3] if name.endswith(".md") else name
+
+    def load(self) -> List[str]:
+        """(Re)loads changed, new and deleted templates; returns the names that changed."""
+        with self._lock:
+            try:
+                entries = {entry.name[:-3]: entry for entry in os.scandir(self.directory)
+                           if entry.name.endswith(".md") and entry.is_file()}
+            except OSError as e:
+                print(f"Could not load prompts from {self.directory}: {e}")
+                entries = {}
+
+            templates = dict(self._templates)
+            changed = [name for name in templates if name not in entries]
+            for name in changed:
+                del templates[name]
+                self._mtimes.pop(name, None)
+            for name, entry in entries.items():
+                mtime = entry.stat().st_mtime_ns
+                if self._mtimes.get(name) == mtime:
+                    continue
+                self._mtimes[name] = mtime
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        template = PromptTemplate(name, f.read())
+                except (OSError, UnicodeDecodeError, ValueError) as e:
+                    self.errors[name] = str(e)
+                    print(f"Prompt '{name}' could not be loaded: {e}")
+                    continue
+                self.errors.pop(name, None)
+                templates[name] = template
+                changed.append(name)
+
+            self._templates = templates # swapped whole, so readers never see a partial reload
+            self._loaded = True
+
+        for name in changed:
+            if name in self._expected:
+                self._validate(name, self._expected[name])
+        return changed
+
+    def get(self, name: str) -> PromptTemplate:
+        """The compiled template for a prompt name; never touches the disk after the first load."""
+        if not self._loaded:
+            self.load()
+        name = self._name(name)
+        template = self._templates.get(name)
+        if template is None:
+            raise ValueError(f"Prompt '{name}' not found in {self.directory}.")
+        return template
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        return self.get(name).render(context)
+
+    def expect(self, name: str, keys: Iterable[str]) -> str:
+        """
+        Declares the context keys an agent will render `name` with, and
+        reports now (and after every reload) any placeholder they miss.
+        Returns the normalized prompt name.
+        """
+        name = self._name(name)
+        self._expected[name] = frozenset(keys)
+        if not self._loaded:
+            self.load()
+        else:
+            self._validate(name, self._expected[name])
+        return name
+
+    def _validate(self, name: str, keys: frozenset) -> bool:
+        template = self._templates.get(name)
+        if template is None:
+            print(f"Prompt '{name}' is used by an agent but missing from {self.directory}.")
+            return False
+        missing = template.missing(keys)
+        if missing:
+            print(f"Prompt '{name}' has placeholders its agent does not fill: {', '.join(sorted(missing))}")
+            return False
+        return True
+
+    def validate(self) -> Dict[str, List[str]]:
+        """Loads everything and returns the problems found, per prompt name."""
+        self.load()
+        problems = {name: [error] for name, error in self.errors.items()}
+        for name, keys in self._expected.items():
+            template = self._templates.get(name)
+            if template is None:
+                problems.setdefault(name, []).append("template not found")
+            elif template.missing(keys):
+                problems.setdefault(name, []).append(f"unfilled placeholders: {', '.join(sorted(template.missing(keys)))}")
+        return problems
+
+    def watch(self):
+        """Starts reloading edited templates in a background task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        watch = _lazy_load_awatch()
+        if watch is not None:
+            try:
+                async for _ in watch(self.directory):
+                    self._report(await asyncio.to_thread(self.load))
+                return
+            except (OSError, RuntimeError) as e:
+                print(f"Prompt watcher falling back to polling: {e}")
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self._report(await asyncio.to_thread(self.load))
+
+    @staticmethod
+    def _report(changed: List[str]):
+        if changed:
+            print(f"Reloaded prompts: {', '.join(sorted(changed))}")
+
+# A single, shared instance of the registry
+prompt_registry = PromptRegistry()
@@ -0,0 +1,179 @@
+# python_backend/services/response_cache.py
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from context_engine.index_snapshot import INDEX_CACHE_DIR
+from utils.ttl_cache import TTLCache
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(INDEX_CACHE_DIR, "llm_responses.db"))
+# How long a response may be served from the cache, in seconds (default: a day)
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key BLOB PRIMARY KEY,
+    content TEXT NOT NULL,
+    finish_reason TEXT,
+    expires_at REAL NOT NULL,
+    last_used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+# Set while an agent that opted out of caching (`"cache": false` in agents.json) runs
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+def request_key(model: str, messages: List[Dict[str, str]], response_format: Optional[Dict[str, str]],
+                temperature: Optional[float]) -> bytes:
+    """Hash of everything that determines a completion: the model, the messages and the sampling parameters."""
+    data = json.dumps([model, messages, response_format, temperature], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+class ResponseCache:
+    """
+    Caches finished LLM completions under request_key, so re-running an
+    agent on an identical prompt (the same diff, the same analysis) costs
+    no API call. A small in-memory LRU sits in front of a SQLite table that
+    survives restarts; entries expire after `ttl_seconds` and the least
+    recently used rows are evicted beyond `max_entries`. Hits and misses
+    are counted per tier for `stats()`. On the event loop use `aget` and
+    `aput`, which keep the memory tier inline and run SQLite in a thread.
+    """
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: float = LLM_CACHE_TTL,
+                 memory_entries: int = LLM_CACHE_MEMORY_ENTRIES, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = TTLCache(max_size=memory_entries, ttl_seconds=ttl_seconds)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def active(self) -> bool:
+        """Whether the current call may use the cache (it is on, and the running agent did not opt out)."""
+        return self.enabled and not _bypass.get()
+
+    @contextmanager
+    def bypassed(self, bypass: bool = True):
+        """Skips the cache for LLM calls made inside the block, including in tasks it starts."""
+        token = _bypass.set(bypass or _bypass.get())
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def get(self, key: bytes) -> Optional[Tuple[str, Optional[str]]]:
+        """The cached (content, finish_reason) for a request, if present and not expired."""
+        cached = self._get_memory(key)
+        return cached if cached is not None else self._get_disk(key)
+
+    async def aget(self, key: bytes) -> Optional[Tuple[str, Optional[str]]]:
+        """get for the event loop: a memory hit returns at once, SQLite is read in a worker thread."""
+        cached = self._get_memory(key)
+        return cached if cached is not None else await asyncio.to_thread(self._get_disk, key)
+
+    def _get_memory(self, key: bytes) -> Optional[Tuple[str, Optional[str]]]:
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] > time.time():
+            self.memory_hits += 1
+            return entry[1], entry[2]
+        return None
+
+    def _get_disk(self, key: bytes) -> Optional[Tuple[str, Optional[str]]]:
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT content, finish_reason, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[2] > time.time():
+                    with conn:
+                        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time_ns(), key))
+                else:
+                    row = None
+            except sqlite3.Error as e:
+                print(f"LLM response cache read failed: {e}")
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        content, finish_reason, expires_at = row
+        self._memory.put(key, (expires_at, content, finish_reason))
+        return content, finish_reason
+
+    def put(self, key: bytes, content: str, finish_reason: Optional[str]):
+        """Stores a finished completion in both tiers."""
+        self._put_disk(key, content, finish_reason, self._put_memory(key, content, finish_reason))
+
+    async def aput(self, key: bytes, content: str, finish_reason: Optional[str]):
+        """put for the event loop: the memory tier is updated at once, SQLite is written in a worker thread."""
+        expires_at = self._put_memory(key, content, finish_reason)
+        await asyncio.to_thread(self._put_disk, key, content, finish_reason, expires_at)
+
+    def _put_memory(self, key: bytes, content: str, finish_reason: Optional[str]) -> float:
+        expires_at = time.time() + self.ttl_seconds
+        self._memory.put(key, (expires_at, content, finish_reason))
+        return expires_at
+
+    def _put_disk(self, key: bytes, content: str, finish_reason: Optional[str], expires_at: float):
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO responses (key, content, finish_reason, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                                 (key, content, finish_reason, expires_at, time.time_ns()))
+                    excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,))
+            except sqlite3.Error as e:
+                print(f"LLM response cache write failed: {e}")
+
+    def clear(self):
+        """Drops every cached response, in memory and on disk."""
+        self._memory.clear()
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                print(f"LLM response cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+# A single, shared instance of the cache
+response_cache = ResponseCache()
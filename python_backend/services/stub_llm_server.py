@@ -0,0 +1,139 @@
+# python_backend/services/stub_llm_server.py
+import json
+import time
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if not path.endswith(("/chat/completions", "/embeddings")):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status = server.failures.pop(0) if server.failures else None
+        if server.latency:
+            time.sleep(server.latency)
+        if status is not None:
+            self._json({"error": {"message": f"stub error {status}", "type": "stub"}}, status, {"retry-after": str(server.retry_after)})
+            return
+        if path.endswith("/embeddings"):
+            self._embeddings(request)
+            return
+        content = server.reply(request)
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.end_headers()
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                delta = word if i == 0 else " " + word
+                self._event({"choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}, request)
+            self._event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}, request)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        self._json({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": request["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def _embeddings(self, request: dict):
+        inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        with self.server.lock:
+            self.server.embedding_batches.append(len(inputs))
+        data = [{"object": "embedding", "index": i, "embedding": self.server.embed(text)} for i, text in enumerate(inputs)]
+        self._json({"object": "list", "data": data, "model": request["model"],
+                    "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}})
+
+    def _json(self, payload: dict, status: int = 200, headers: dict | None = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, payload: dict, request: dict):
+        payload.update({"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": request["model"]})
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+def default_reply(request: dict) -> str:
+    """A deterministic answer derived from the prompt; JSON when JSON was requested."""
+    digest = hashlib.blake2b(json.dumps(request["messages"], sort_keys=True).encode("utf-8"), digest_size=4).hexdigest()
+    if (request.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"summary": f"stub response {digest}"})
+    return f"stub response {digest}"
+
+def default_embedding(text: str, dimension: int = 8) -> list:
+    """A deterministic vector derived from the text."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=dimension).digest()
+    return [byte / 255.0 for byte in digest]
+
+class StubLLMServer:
+    """
+    A local stand-in for the OpenAI chat completions and embeddings APIs,
+    for exercising the LLM service, its cache and the embedding pipeline
+    without network access or an API key. Start it and point the client at
+    it with OPENAI_BASE_URL=<server.base_url>. `requests` counts the
+    requests it served and `embedding_batches` the size of each embeddings
+    request; `reply(request) -> str`, `embed(text) -> list` and `latency`
+    shape its answers, and `fail(*statuses)` makes the next requests fail
+    with those HTTP statuses (with Retry-After: `retry_after`).
+    """
+    def __init__(self, reply=default_reply, latency: float = 0.0, port: int = 0, embed=default_embedding,
+                 retry_after: float = 0.01):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+        self._server.reply = reply
+        self._server.embed = embed
+        self._server.latency = latency
+        self._server.retry_after = retry_after
+        self._server.requests = 0
+        self._server.failures = []
+        self._server.embedding_batches = []
+        self._server.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def embedding_batches(self) -> list:
+        return self._server.embedding_batches
+
+    def fail(self, *statuses: int):
+        with self._server.lock:
+            self._server.failures.extend(statuses)
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+if __name__ == "__main__":
+    server = StubLLMServer().start()
+    print(f"Stub LLM server listening; export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=stub")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
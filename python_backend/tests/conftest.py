@@ -0,0 +1,6 @@
+# python_backend/tests/conftest.py
+import os
+import sys
+
+# The backend imports its packages top-level (orchestrator, services, ...), as when run from python_backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
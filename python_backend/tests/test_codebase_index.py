@@ -0,0 +1,38 @@
+# python_backend/tests/test_codebase_index.py
+import threading
+from context_engine import codebase_index
+from context_engine.codebase_index import CodebaseIndex
+
+def make_index(tmp_path) -> CodebaseIndex:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "app.py").write_text("def helper():\n    return 1\n\ndef main():\n    return helper()\n")
+    index = CodebaseIndex(snapshot_path=str(tmp_path / "index.db"))
+    index.index_directory(str(project))
+    return index
+
+def test_queries_run_while_the_snapshot_is_written(tmp_path, monkeypatch):
+    index = make_index(tmp_path)
+    write = codebase_index.index_snapshot.save_snapshot
+    found = []
+    def save_snapshot(*args):
+        # Another session's query, made mid-write from its own thread
+        reader = threading.Thread(target=lambda: found.extend(index.search_symbols("function", "helper")))
+        reader.start()
+        reader.join(timeout=5)
+        write(*args)
+    monkeypatch.setattr(codebase_index.index_snapshot, "save_snapshot", save_snapshot)
+
+    index._dirty = True
+    index.flush_snapshot()
+
+    assert [match["name"] for match in found] == ["helper"]
+    assert not index._dirty
+
+def test_snapshot_round_trip(tmp_path):
+    index = make_index(tmp_path)
+    restored = CodebaseIndex(snapshot_path=index.snapshot_path)
+
+    assert restored.load_snapshot()
+    assert restored.file_count() == 1
+    assert [match["name"] for match in restored.search_symbols("function", "main")] == ["main"]
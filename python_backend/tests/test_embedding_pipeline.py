@@ -0,0 +1,89 @@
+# python_backend/tests/test_embedding_pipeline.py
+import pytest
+from context_engine import embedding_providers
+from context_engine.embedding_cache import EmbeddingCache, normalize_text
+from context_engine.embedding_pipeline import EmbeddingPipeline
+from context_engine.embedding_providers import OpenAIEmbeddingProvider
+from services.stub_llm_server import StubLLMServer, default_embedding
+
+@pytest.fixture
+def start_server(monkeypatch):
+    servers = []
+    def start(**kwargs) -> StubLLMServer:
+        server = StubLLMServer(**kwargs).start()
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "stub")
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def server(start_server):
+    return start_server()
+
+def make_pipeline(tmp_path) -> EmbeddingPipeline:
+    return EmbeddingPipeline(OpenAIEmbeddingProvider(), EmbeddingCache(str(tmp_path / "embeddings.db")))
+
+def test_batches_are_capped_by_tokens_and_size(server, monkeypatch):
+    monkeypatch.setattr(embedding_providers, "MAX_BATCH_TOKENS", 10)
+    monkeypatch.setattr(embedding_providers, "MAX_BATCH_SIZE", 3)
+    provider = OpenAIEmbeddingProvider()
+    texts = [f"chunk {i}" for i in range(8)]
+
+    embeddings = provider.embed(texts, [4, 4, 4, 1, 1, 1, 1, 9])
+
+    assert sorted(server.embedding_batches) == [1, 2, 2, 3]
+    assert embeddings == [default_embedding(text) for text in texts]
+
+def test_rate_limits_and_server_errors_are_retried(server):
+    provider = OpenAIEmbeddingProvider()
+    server.fail(429, 503)
+
+    embeddings = provider.embed(["a", "b"], [1, 1])
+
+    assert provider.retries == 2
+    assert server.requests == 3
+    assert embeddings == [default_embedding("a"), default_embedding("b")]
+
+def test_a_failed_batch_leaves_none_for_its_inputs_only(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(embedding_providers, "MAX_BATCH_SIZE", 2)
+    monkeypatch.setattr(embedding_providers, "MAX_RETRIES", 1)
+    monkeypatch.setattr(embedding_providers, "MAX_CONCURRENCY", 1) # batches run in order
+    pipeline = make_pipeline(tmp_path)
+    server.fail(500, 500)
+
+    embeddings = pipeline.embed(["a", "b", "c"], [1, 1, 1])
+
+    assert embeddings == [None, None, default_embedding("c")]
+    assert pipeline.stats.failed_chunks == 2
+
+def test_batches_of_the_wrong_dimension_are_rejected(start_server, monkeypatch, tmp_path):
+    dimensions = {"odd": 4}
+    server = start_server(embed=lambda text: default_embedding(text, dimensions.get(text, 8)))
+    monkeypatch.setattr(embedding_providers, "MAX_BATCH_SIZE", 1)
+    pipeline = make_pipeline(tmp_path)
+
+    assert pipeline.embed(["first"], [1]) == [default_embedding("first")]
+    embeddings = pipeline.embed(["odd", "last"], [1, 1])
+
+    assert pipeline.provider.dimension == 8
+    assert embeddings == [None, default_embedding("last")]
+    # The rejected vector was not cached, so it is asked for again
+    dimensions.clear()
+    assert pipeline.embed(["odd"], [1]) == [default_embedding("odd")]
+    assert server.embedding_batches == [1, 1, 1, 1]
+
+def test_pipeline_serves_repeats_from_the_cache(server, tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    texts = ["def f():\n    pass", "def g():\n    pass", "def f():\n    pass"]
+
+    first = pipeline.embed(texts, [5, 5, 5])
+    second = pipeline.embed(texts, [5, 5, 5])
+
+    expected = [default_embedding(normalize_text(text)) for text in texts]
+    assert first == expected
+    assert [pytest.approx(embedding) for embedding in second] == expected # cached as float32
+    assert server.embedding_batches == [2] # the duplicate was sent once, the second call not at all
+    assert pipeline.stats.cache_hits == 4
@@ -0,0 +1,18 @@
+# python_backend/tests/test_history_journal.py
+from orchestrator.history_journal import HistoryJournal, encode_record
+
+def messages(journal: HistoryJournal) -> list:
+    return [message["content"] for message, _, _ in journal.read()]
+
+def test_append_after_a_torn_record_starts_a_new_line(tmp_path):
+    path = tmp_path / "history.jsonl"
+    first = encode_record({"role": "user", "content": "first"}, 1, None)
+    torn = encode_record({"role": "assistant", "content": "cut short"}, 2, None)[:20]
+    path.write_text(first + torn, encoding="utf-8") # as left by a crash mid-write
+
+    journal = HistoryJournal(str(path))
+    assert messages(journal) == ["first"]
+    journal.append({"role": "user", "content": "after the crash"}, 3)
+    journal.close()
+
+    assert messages(HistoryJournal(str(path))) == ["first", "after the crash"]
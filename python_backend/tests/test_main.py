@@ -0,0 +1,32 @@
+# python_backend/tests/test_main.py
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from context_engine.file_watcher import watcher_registry
+from context_engine.index_registry import index_registry
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "app.py").write_text("def main():\n    return 1\n")
+    monkeypatch.chdir(tmp_path) # the index snapshot and history journal land here
+    monkeypatch.setattr(main, "PROJECT_ROOT", str(project))
+    with TestClient(main.app) as client:
+        yield client
+
+def test_disconnect_releases_the_session(client):
+    connection_id = client.post("/api/v1/connect").json()["connection_id"]
+
+    with client.websocket_connect(f"/ws/{connection_id}") as websocket:
+        assert websocket.receive_json()["type"] == "connection_ready"
+        assert index_registry.active_roots() and watcher_registry._watchers
+
+    # The endpoint's cleanup finishes after the client has gone
+    deadline = time.monotonic() + 5
+    while index_registry.active_roots() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index_registry.active_roots() == []
+    assert connection_id not in main.active_connections
+    assert watcher_registry._watchers == {}
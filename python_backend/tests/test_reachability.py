@@ -0,0 +1,49 @@
+# python_backend/tests/test_reachability.py
+import random
+from collections import defaultdict
+from context_engine.call_graph import CallGraph
+
+def brute_force_ancestors(edges, target):
+    callers = defaultdict(set)
+    for caller, callee in edges:
+        callers[callee].add(caller)
+    seen, stack = set(), [target]
+    while stack:
+        for caller in callers[stack.pop()]:
+            if caller not in seen:
+                seen.add(caller)
+                stack.append(caller)
+    seen.discard(target)
+    return seen
+
+def test_incremental_condensation_matches_brute_force():
+    rng = random.Random(7)
+    graph = CallGraph()
+    files = {f"f{i}.py": set() for i in range(12)}
+    nodes = [("f.py", f"n{i}") for i in range(60)]
+
+    for round_ in range(150):
+        # Edit a couple of files per round: new calls (often closing cycles), dropped calls, new nodes
+        for path in rng.sample(sorted(files), 2):
+            edges = files[path]
+            for _ in range(rng.randint(0, 3)):
+                if edges and rng.random() < 0.5:
+                    edges.discard(rng.choice(sorted(edges)))
+            for _ in range(rng.randint(0, 3)):
+                edges.add((rng.choice(nodes), rng.choice(nodes)))
+            if rng.random() < 0.1:
+                nodes.append(("f.py", f"n{len(nodes)}"))
+            graph.set_file_edges(path, [], sorted(edges))
+
+        all_edges = set().union(*files.values())
+        for node in rng.sample(nodes, 8):
+            expected = brute_force_ancestors(all_edges, node)
+            assert graph.ancestors(node) == (expected if node in graph._node_ids else set()), f"round {round_}"
+
+def test_closure_cache_stays_within_budget():
+    graph = CallGraph()
+    graph.reachability = type(graph.reachability)(cache_bytes=4096)
+    chain = [("f.py", f"n{i}") for i in range(2000)]
+    graph.set_file_edges("f.py", chain, list(zip(chain[:-1], chain[1:])))
+    assert len(graph.ancestors(chain[-1])) == len(chain) - 1
+    assert graph.reachability._closure.size <= 2048
@@ -0,0 +1,106 @@
+# python_backend/tests/test_response_cache.py
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+from orchestrator.agent_registry import agent_registry
+from services import llm_service
+from services.response_cache import ResponseCache
+from services.stub_llm_server import StubLLMServer
+
+def make_cache(tmp_path) -> ResponseCache:
+    return ResponseCache(str(tmp_path / "responses.db"), ttl_seconds=60, memory_entries=4, max_entries=16)
+
+def test_disk_tier_runs_off_the_event_loop(tmp_path):
+    cache = make_cache(tmp_path)
+    disk_threads = []
+    for name in ("_get_disk", "_put_disk"):
+        method = getattr(cache, name)
+        def traced(*args, method=method):
+            disk_threads.append(threading.get_ident())
+            return method(*args)
+        setattr(cache, name, traced)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        assert await cache.aget(b"k") is None
+        await cache.aput(b"k", "answer", "stop")
+        assert await cache.aget(b"k") == ("answer", "stop") # served from memory
+        return loop_thread
+
+    loop_thread = asyncio.run(main())
+
+    assert len(disk_threads) == 2 # one read miss, one write; the memory hit stayed inline
+    assert loop_thread not in disk_threads
+    assert (cache.memory_hits, cache.disk_hits, cache.misses) == (1, 0, 1)
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    asyncio.run(make_cache(tmp_path).aput(b"k", "answer", "stop"))
+    cache = make_cache(tmp_path) # a restart: empty memory tier, same SQLite file
+
+    async def main():
+        return await cache.aget(b"k"), await cache.aget(b"k")
+
+    assert asyncio.run(main()) == (("answer", "stop"), ("answer", "stop"))
+    assert (cache.memory_hits, cache.disk_hits, cache.misses) == (1, 1, 0)
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"), ttl_seconds=0.05)
+
+    async def main():
+        await cache.aput(b"k", "answer", "stop")
+        await asyncio.sleep(0.1)
+        return await cache.aget(b"k")
+
+    assert asyncio.run(main()) is None # expired in memory and on disk alike
+    assert (cache.memory_hits, cache.disk_hits, cache.misses) == (0, 0, 1)
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    """A fresh LLMService and cache, talking to the stub server."""
+    server = StubLLMServer().start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    cache = make_cache(tmp_path)
+    monkeypatch.setattr(llm_service, "response_cache", cache)
+    yield llm_service.LLMService(), cache, server
+    server.stop()
+
+def prompt(service):
+    return service.execute_prompt("Summarize {diff}", {"diff": "+ print('hi')"}, is_json=True)
+
+def test_repeated_prompts_are_served_from_the_cache(llm):
+    service, cache, server = llm
+
+    async def main():
+        return [await prompt(service) for _ in range(3)]
+
+    first, *repeats = asyncio.run(main())
+    assert first["summary"].startswith("stub response")
+    assert repeats == [first, first]
+    assert server.requests == 1
+    assert (cache.memory_hits, cache.disk_hits, cache.misses) == (2, 0, 1)
+
+def test_agents_that_opt_out_skip_the_cache(llm, monkeypatch):
+    service, cache, server = llm
+    async def cached_agent(state):
+        state.append(await prompt(service))
+    def uncached_sync_agent(state):
+        # A legacy synchronous agent, run in the registry's worker threads
+        state.append(asyncio.run(prompt(service)))
+    monkeypatch.setattr(agent_registry, "_loaded_agents", {
+        "CachedAgent": SimpleNamespace(run=cached_agent), "UncachedAgent": SimpleNamespace(run=uncached_sync_agent)})
+    monkeypatch.setattr(agent_registry, "_agent_definitions", [{"name": "CachedAgent"}, {"name": "UncachedAgent", "cache": False}])
+    results = []
+
+    async def main():
+        await agent_registry.run_agent("CachedAgent", results)
+        for _ in range(2):
+            await agent_registry.run_agent("UncachedAgent", results)
+        await agent_registry.run_agent("CachedAgent", results)
+
+    asyncio.run(main())
+
+    assert len(set(map(str, results))) == 1
+    assert server.requests == 3 # the opted-out agent went to the server both times
+    assert (cache.memory_hits, cache.misses) == (1, 1)
@@ -0,0 +1,191 @@
+# python_backend/tests/test_workflow_runner.py
+import asyncio
+import threading
+import pytest
+from orchestrator import workflow_runner
+from orchestrator.agent_state import AgentState
+from orchestrator.workflow_checkpoints import CheckpointStore
+from orchestrator.workflow_runner import WorkflowRunner, step_dependencies
+
+class FakeState:
+    """The parts of AgentState the runner touches."""
+    def __init__(self):
+        self.project_root = "/tmp/project"
+        self.user_request = "add a button"
+        self.last_agent_output = None
+        self.proposed_diff = {"file_path": "src/app.py", "diff": "+button()"}
+        self.change_summary = None
+        self.commit_message = None
+        self.git_commands = None
+        self.proposed_strategies = []
+        self.selected_solution = None
+        self._stream_suffix = ""
+        self.logs = []
+
+    async def send_log(self, message: str):
+        self.logs.append(message)
+
+async def summarize(state):
+    await asyncio.sleep(0.05)
+    state.change_summary = {"summary": f"changes {state.proposed_diff['file_path']}"}
+    state.last_agent_output = state.change_summary
+
+async def commit_message(state):
+    await asyncio.sleep(0.01)
+    state.commit_message = f"feat: {state.change_summary['summary']}"
+    state.last_agent_output = state.commit_message
+
+async def git_commands(state):
+    await asyncio.sleep(0.02)
+    state.git_commands = [f"git add {state.proposed_diff['file_path']}", "git commit -F -"]
+    state.last_agent_output = {"commands": state.git_commands}
+
+@pytest.fixture
+def agents(monkeypatch, tmp_path):
+    """Replaces the registry's agents with `agents[name]`, recording when each one ran."""
+    agents = {"ChangeSummarizerAgent": summarize, "ConventionalCommitAgent": commit_message, "VersionControlAgent": git_commands}
+    agents_ran = {}
+
+    async def run_agent(name, state):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await agents[name](state)
+        agents_ran[name] = (start, loop.time())
+        return state
+
+    monkeypatch.setattr(workflow_runner.agent_registry, "run_agent", run_agent)
+    monkeypatch.setattr(workflow_runner, "workflow_checkpoints", CheckpointStore(str(tmp_path / "runs.db")))
+    return agents, agents_ran
+
+def test_finalize_and_commit_declares_its_real_data_flow():
+    sequence = WorkflowRunner(FakeState()).workflows["FinalizeAndCommit"]["sequence"]
+    # The commit message waits for the summary; the git commands only need the diff
+    assert step_dependencies(sequence) == [[], [0], []]
+
+def test_independent_steps_overlap(agents):
+    _, ran = agents
+    state = FakeState()
+
+    asyncio.run(WorkflowRunner(state).execute_workflow("FinalizeAndCommit"))
+
+    summary, message, commands = ran["ChangeSummarizerAgent"], ran["ConventionalCommitAgent"], ran["VersionControlAgent"]
+    assert commands[0] < summary[1] and summary[0] < commands[1] # ran side by side
+    assert message[0] >= summary[1]
+    assert state.commit_message == "feat: changes src/app.py"
+    assert state.git_commands == ["git add src/app.py", "git commit -F -"]
+    assert state.last_agent_output == {"commands": state.git_commands}
+    assert "Workflow finished successfully." in state.logs
+
+def test_each_step_is_judged_by_its_own_output(agents):
+    registry, _ = agents
+    async def failing_git_commands(state):
+        await asyncio.sleep(0.01)
+        state.last_agent_output = {"error": "not a git repository"}
+    registry["VersionControlAgent"] = failing_git_commands
+    state = FakeState()
+
+    asyncio.run(WorkflowRunner(state).execute_workflow("FinalizeAndCommit"))
+
+    assert any("error in agent 'VersionControlAgent': not a git repository" in log for log in state.logs)
+    # The failed step wrote nothing back; the summary had not finished and was cancelled
+    assert state.git_commands is None
+    assert state.change_summary is None
+
+def test_resume_replays_the_steps_that_succeeded(agents):
+    registry, ran = agents
+    async def failing_commit_message(state):
+        state.last_agent_output = {"error": "model unavailable"}
+    registry["ConventionalCommitAgent"] = failing_commit_message
+    state = FakeState()
+    runner = WorkflowRunner(state)
+    asyncio.run(runner.execute_workflow("FinalizeAndCommit"))
+    assert state.commit_message is None and state.git_commands is not None
+
+    registry["ConventionalCommitAgent"] = commit_message
+    ran.clear()
+    resumed = FakeState()
+    asyncio.run(WorkflowRunner(resumed).execute_workflow("FinalizeAndCommit", run_id=runner.run_id))
+
+    assert set(ran) == {"ConventionalCommitAgent"}
+    assert resumed.change_summary == {"summary": "changes src/app.py"}
+    assert resumed.commit_message == "feat: changes src/app.py"
+    assert resumed.last_agent_output == {"commands": ["git add src/app.py", "git commit -F -"]}
+
+def test_checkpoints_are_written_off_the_event_loop(agents, monkeypatch):
+    store = workflow_runner.workflow_checkpoints
+    threads = []
+    for name in ("start_run", "load_step", "save_step", "finish_run"):
+        method = getattr(store, name)
+        def traced(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+        monkeypatch.setattr(store, name, traced)
+
+    async def main():
+        await WorkflowRunner(FakeState()).execute_workflow("FinalizeAndCommit")
+        return threading.get_ident()
+    loop_thread = asyncio.run(main())
+
+    assert len(threads) == 8 # start, three loads, three saves, finish
+    assert loop_thread not in threads
+
+def test_concurrent_drafts_stream_under_their_own_labels(agents):
+    registry, _ = agents
+    labels = []
+    async def propose(state):
+        labels.append(AgentState.stream_deltas(state, "CreativeArchitect").agent)
+        await asyncio.sleep(0.01)
+        state.proposed_strategies = [{"name": f"strategy {state._stream_suffix}"}]
+        state.last_agent_output = state.proposed_strategies
+    registry["CreativeArchitect"] = propose
+    state = FakeState()
+
+    strategies = asyncio.run(WorkflowRunner(state)._propose("CreativeArchitect", 3, 3, state))
+
+    assert sorted(labels) == ["CreativeArchitect#1", "CreativeArchitect#2", "CreativeArchitect#3"]
+    assert len(strategies) == 3
+    assert state._stream_suffix == ""
+
+def test_deliberation_drafts_once_per_turn_by_default(agents):
+    registry, _ = agents
+    seen = []
+    async def propose(state):
+        seen.append(state.last_agent_output) # the previous turn's critique, if any
+        state.proposed_strategies = [{"name": f"strategy {len(seen)}"}]
+        state.last_agent_output = state.proposed_strategies
+    async def challenge(state):
+        if len(seen) > 1:
+            state.selected_solution = state.proposed_strategies[0]
+        state.last_agent_output = {"critique": f"weighed {len(state.proposed_strategies)}"}
+    registry.update(CreativeArchitect=propose, TechnicalAnalyst=challenge)
+    step = {"type": "deliberation", "proposer": "CreativeArchitect", "challenger": "TechnicalAnalyst", "max_turns": 3}
+    state = FakeState()
+
+    asyncio.run(WorkflowRunner(state)._run_deliberation_step(step, state))
+
+    assert seen == [None, {"critique": "weighed 1"}]
+    assert state.selected_solution == {"name": "strategy 2"}
+
+def test_candidate_drafts_answer_the_previous_critique(agents):
+    registry, _ = agents
+    seen = []
+    async def propose(state):
+        seen.append(state.last_agent_output)
+        state.proposed_strategies = [{"name": f"strategy {state._stream_suffix}"}]
+        state.last_agent_output = state.proposed_strategies
+    async def challenge(state):
+        turn = len(seen) // 2
+        if turn == 2:
+            state.selected_solution = state.proposed_strategies[0]
+        state.last_agent_output = {"critique": f"turn {turn}"}
+    registry.update(CreativeArchitect=propose, TechnicalAnalyst=challenge)
+    step = {"type": "deliberation", "proposer": "CreativeArchitect", "challenger": "TechnicalAnalyst",
+            "max_turns": 2, "candidates": 2, "quorum": 2}
+    state = FakeState()
+
+    asyncio.run(WorkflowRunner(state)._run_deliberation_step(step, state))
+
+    # No draft of the second turn started before the first turn's critique was in
+    assert seen[2:] == [{"critique": "turn 1"}] * 2
+    assert len(state.proposed_strategies) == 2
+    assert state.selected_solution is not None
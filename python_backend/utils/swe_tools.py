@@ -5,6 +5,7 @@ import networkx as nx
 import tiktoken
 import diff_match_patch as dmp_module
 from context_engine import vector_store # Corrected import path
+from utils.ttl_cache import TTLCache
 
 # 1. ASTParserTool
 class ASTParserTool:
@@ -17,15 +18,44 @@ class ASTParserTool:
 
 # 2. CodeRetrieverTool (Semantic Search)
 class CodeRetrieverTool:
-    """Finds relevant code chunks using semantic search (RAG)."""
-    def __init__(self, db_path="./chroma_db"):
-        self.vector_store = vector_store.ChromaVectorStore(path=db_path)
+    """
+    Finds relevant code chunks using semantic search (RAG). Keeps the shared
+    vector store open across calls, embeds each query once, and caches both
+    query embeddings and top-k results; results are keyed by the store's
+    version, so any index write invalidates them.
+    """
+    def __init__(self, db_path="./chroma_db", cache_size: int = 256, ttl_seconds: float = 300.0):
+        self.vector_store = vector_store.get_vector_store(db_path)
+        self.query_embeddings = TTLCache(cache_size, ttl_seconds)
+        self.results = TTLCache(cache_size, ttl_seconds)
 
     def search(self, query: str, k: int = 5) -> list[dict]:
-        query_embedding = vector_store.generate_embeddings([query])
-        if not query_embedding:
-            return []
-        return self.vector_store.search(query, k=k)
+        results_key = (query, k, self.vector_store.version)
+        cached = self.results.get(results_key)
+        if cached is not None:
+            return list(cached)
+
+        embedding_key = (vector_store.embedding_pipeline.model, query)
+        query_embedding = self.query_embeddings.get(embedding_key)
+        if query_embedding is None:
+            embeddings = vector_store.generate_embeddings([query])
+            if not embeddings:
+                return []
+            query_embedding = embeddings[0]
+            self.query_embeddings.put(embedding_key, query_embedding)
+
+        results = self.vector_store.search(query, k=k, query_embedding=query_embedding)
+        self.results.put(results_key, results)
+        return results
+
+_retrievers: dict = {}
+
+def get_code_retriever(db_path="./chroma_db") -> CodeRetrieverTool:
+    """Returns the shared retriever for a database path, so its caches survive across agents."""
+    retriever = _retrievers.get(db_path)
+    if retriever is None:
+        retriever = _retrievers.setdefault(db_path, CodeRetrieverTool(db_path))
+    return retriever
 
 # 3. TokenEstimateTool
 class TokenEstimateTool: